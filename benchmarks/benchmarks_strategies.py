@@ -0,0 +1,95 @@
+from __future__ import print_function, absolute_import, division
+"""Suggestion latency and memory of the search strategies, as a function of
+the size of the history and the dimensionality of the search space.
+
+Run with airspeed velocity (https://asv.readthedocs.io), e.g.
+
+    $ asv run --bench Suggest
+    $ asv dev --bench "Suggest.time_suggest"   # quick run in the current env
+
+Combinations which a strategy can't handle in reasonable time (e.g. the GP on
+very large histories) or which need a missing optional dependency are
+skipped.
+"""
+
+from .common import make_searchspace, make_history, make_history_list
+
+from osprey.history import History
+from osprey.strategies import (RandomSearch, SobolSearch, GridSearch,
+                               HyperoptTPE, GP)
+
+N_TRIALS = [10, 100, 1000, 10000]
+N_DIMS = [2, 10, 50]
+
+# The GP is cubic in the number of trials: cap the history size it is
+# benchmarked on, and use fewer restarts/acquisition starts than the
+# defaults to keep a full run tractable.
+GP_MAX_TRIALS = 1000
+GP_PARAMS = {'seed': 0, 'n_init': 2, 'n_iter': 5, 'max_iter': 100}
+
+
+def _require(module):
+    try:
+        __import__(module)
+    except ImportError:
+        raise NotImplementedError('%s is not installed' % module)
+
+
+def make_strategy(name, n_trials):
+    if name == 'random':
+        return RandomSearch(seed=0)
+    elif name == 'sobol':
+        _require('SALib')
+        # the sequence has to extend past the trials already in the history
+        return SobolSearch(length=n_trials + 1)
+    elif name == 'grid':
+        return GridSearch()
+    elif name == 'hyperopt_tpe':
+        _require('hyperopt')
+        return HyperoptTPE(seed=0)
+    elif name == 'gp':
+        _require('GPy')
+        return GP(**GP_PARAMS)
+    raise ValueError(name)
+
+
+class Suggest(object):
+    params = (['random', 'sobol', 'grid', 'hyperopt_tpe', 'gp'],
+              N_TRIALS, N_DIMS)
+    param_names = ['strategy', 'n_trials', 'n_dims']
+    timeout = 600
+
+    def setup(self, strategy, n_trials, n_dims):
+        if strategy == 'gp' and n_trials > GP_MAX_TRIALS:
+            raise NotImplementedError('history too large for the GP')
+        # check the optional dependencies once, outside of the timed code
+        make_strategy(strategy, n_trials)
+        kind = 'enum' if strategy == 'grid' else 'mixed'
+        self.searchspace = make_searchspace(n_dims, kind=kind)
+        self.history = make_history(self.searchspace, n_trials)
+
+    def time_suggest(self, strategy, n_trials, n_dims):
+        # a fresh strategy for each call, so that stateful strategies (sobol,
+        # grid) pay the same cost as the first suggestion of a new worker
+        make_strategy(strategy, n_trials).suggest(self.history,
+                                                  self.searchspace)
+
+    def peakmem_suggest(self, strategy, n_trials, n_dims):
+        make_strategy(strategy, n_trials).suggest(self.history,
+                                                  self.searchspace)
+
+
+class BuildHistory(object):
+    """Cost of converting the list-of-records history into a `History`."""
+    params = (N_TRIALS, N_DIMS)
+    param_names = ['n_trials', 'n_dims']
+
+    def setup(self, n_trials, n_dims):
+        self.searchspace = make_searchspace(n_dims)
+        self.records = make_history_list(self.searchspace, n_trials)
+
+    def time_from_list(self, n_trials, n_dims):
+        History.from_list(self.records, self.searchspace)
+
+    def peakmem_from_list(self, n_trials, n_dims):
+        History.from_list(self.records, self.searchspace)
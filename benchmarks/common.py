@@ -0,0 +1,64 @@
+from __future__ import print_function, absolute_import, division
+"""Helpers to build synthetic search spaces and histories for the benchmarks.
+"""
+
+import numpy as np
+
+from osprey.search_space import SearchSpace
+from osprey.history import History
+
+# fraction of the synthetic trials which are FAILED or still PENDING
+FAILED_FRACTION = 0.05
+PENDING_FRACTION = 0.02
+
+
+def make_searchspace(n_dims, kind='mixed'):
+    """A search space with `n_dims` variables.
+
+    With kind='mixed', the variables cycle through float, log-warped float,
+    int and enum. With kind='enum', all of the variables are two-valued
+    enums (e.g. for grid search).
+    """
+    searchspace = SearchSpace()
+    for i in range(n_dims):
+        name = 'x%02d' % i
+        if kind == 'enum':
+            searchspace.add_enum(name, ['a', 'b'])
+        elif i % 4 == 0:
+            searchspace.add_float(name, -10, 10)
+        elif i % 4 == 1:
+            searchspace.add_float(name, 1e-3, 1e3, warp='log')
+        elif i % 4 == 2:
+            searchspace.add_int(name, 1, 100)
+        else:
+            searchspace.add_enum(name, ['a', 'b', 'c'])
+    return searchspace
+
+
+def make_history(searchspace, n_trials, n_folds=3, seed=0):
+    """A synthetic `History` with `n_trials` trials.
+
+    The scores are a smooth function of the parameters (on the unit cube)
+    plus per-fold noise, so that model-based strategies have something
+    sensible to fit.
+    """
+    random = np.random.RandomState(seed)
+    history = History(searchspace, capacity=n_trials)
+    for i in range(n_trials):
+        params = searchspace.rvs(random)
+        u = random.uniform()
+        if u < FAILED_FRACTION:
+            history.append(params, None, 'FAILED', trial_id=i)
+        elif u < FAILED_FRACTION + PENDING_FRACTION:
+            history.append(params, None, 'PENDING', trial_id=i)
+        else:
+            x = np.asarray(searchspace.point_to_gp(params))
+            score = -np.sum((x - 0.3) ** 2)
+            scores = score + 0.01 * random.randn(n_folds)
+            history.append(params, scores.tolist(), 'SUCCEEDED', trial_id=i)
+    return history
+
+
+def make_history_list(searchspace, n_trials, n_folds=3, seed=0):
+    """Same as `make_history`, but in the list-of-records format."""
+    return list(make_history(searchspace, n_trials, n_folds, seed))
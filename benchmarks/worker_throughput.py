@@ -0,0 +1,294 @@
+"""End-to-end throughput of `osprey worker`, independent of the model cost.
+
+This script runs N simulated workers in parallel processes against a shared
+trials database. Each worker runs the same loop as `osprey worker`
+(`execute_worker.initialize_trial` followed by `execute_worker.run_single_trial`)
+with a trivial estimator whose fit costs next to nothing, and reports where
+the time per trial goes:
+
+ - suggest:     strategy.suggest()
+ - db_read:     SELECT statements
+ - db_write:    INSERT/UPDATE statements and commits
+ - fit:         fit_and_score_estimator() (cross-validation)
+ - bookkeeping: everything else (session setup, ORM overhead, printing, ...)
+
+By default the database is a file-backed SQLite database in a temporary
+directory, shared by all of the worker processes, so the benchmark runs fully
+offline without a database server. Any SQLAlchemy URI (e.g. a local postgres)
+can be given with --uri instead; every run uses its own project name, so the
+runs don't see each other's history.
+
+Example:
+
+    $ python -m benchmarks.worker_throughput --n-workers 1 4 8 \\
+        --history-size 0 1000 --n-trials 20
+"""
+from __future__ import print_function, absolute_import, division
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from sklearn.base import BaseEstimator
+from sklearn.model_selection import KFold
+
+from osprey import execute_worker
+from osprey.trials import Base, Trial, _create_all
+from osprey.history import History
+from osprey.subclass_factory import init_subclass_by_name
+from osprey.strategies import BaseStrategy
+
+from .common import make_searchspace, make_history
+
+PHASES = ['suggest', 'db_read', 'db_write', 'fit', 'bookkeeping']
+
+
+class TrivialEstimator(BaseEstimator):
+    """An estimator that accepts any parameters, and whose fit and score
+    cost next to nothing."""
+
+    def __init__(self, **params):
+        self._params = params
+
+    def get_params(self, deep=True):
+        return dict(self._params)
+
+    def set_params(self, **params):
+        self._params.update(params)
+        return self
+
+    def fit(self, X, y=None):
+        self.mean_ = np.mean(y)
+        return self
+
+    def score(self, X, y=None):
+        return -np.mean((y - self.mean_) ** 2)
+
+
+class Timers(object):
+    def __init__(self):
+        self.totals = dict((p, 0.0) for p in PHASES)
+        # time spent in the database statements, which the cursor listeners
+        # add to db_read or db_write
+        self.cursor = 0.0
+
+    @contextlib.contextmanager
+    def time(self, phase):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.totals[phase] += time.time() - start
+
+
+class TimedStrategy(object):
+    """Proxy around a strategy that times calls to suggest()"""
+
+    def __init__(self, strategy, timers):
+        self._strategy = strategy
+        self._timers = timers
+
+    def suggest(self, history, searchspace):
+        with self._timers.time('suggest'):
+            return self._strategy.suggest(history, searchspace)
+
+    def __getattr__(self, attr):
+        return getattr(self._strategy, attr)
+
+
+class TimedSession(Session):
+    timers = None
+
+    def commit(self):
+        # the statements flushed by the commit are already timed by the
+        # cursor listeners, so only count the rest (the COMMIT itself)
+        timers = self.timers
+        start, cursor = time.time(), timers.cursor
+        try:
+            return super(TimedSession, self).commit()
+        finally:
+            timers.totals['db_write'] += (time.time() - start -
+                                          (timers.cursor - cursor))
+
+
+def make_engine(uri, timers):
+    engine = create_engine(uri, poolclass=NullPool)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.time())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.time() - conn.info['query_start'].pop()
+        phase = ('db_read' if statement.lstrip().upper().startswith('SELECT')
+                 else 'db_write')
+        timers.totals[phase] += elapsed
+        timers.cursor += elapsed
+
+    return engine
+
+
+def run_worker(args):
+    (uri, project_name, strategy_name, n_dims, n_trials, n_samples,
+     seed) = args
+    np.random.seed(seed)
+    timers = Timers()
+    engine = make_engine(uri, timers)
+    TimedSession.timers = timers
+    Trial.set_default_project_name(project_name)
+
+    @contextlib.contextmanager
+    def sessionbuilder():
+        session = TimedSession(engine)
+        yield session
+        session.close()
+
+    def timed_fit_and_score(*args, **kwargs):
+        with timers.time('fit'):
+            return fit_and_score_estimator(*args, **kwargs)
+
+    fit_and_score_estimator = execute_worker.fit_and_score_estimator
+    execute_worker.fit_and_score_estimator = timed_fit_and_score
+
+    searchspace = make_searchspace(n_dims)
+    strategy = TimedStrategy(
+        init_subclass_by_name(BaseStrategy, strategy_name, {}), timers)
+    estimator = TrivialEstimator(**searchspace.rvs(seed))
+    history = History(searchspace)
+
+    random = np.random.RandomState(seed)
+    X = random.randn(n_samples, 2)
+    y = random.randn(n_samples)
+    cv = KFold(n_splits=3)
+
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    start = time.time()
+    try:
+        for _ in range(n_trials):
+            trial_id, params = execute_worker.initialize_trial(
+                strategy, searchspace, estimator, config_sha1=None,
+                project_name=project_name, sessionbuilder=sessionbuilder,
+                max_param_suggestion_retries=None, history=history)
+            execute_worker.run_single_trial(
+                estimator=estimator, params=params, trial_id=trial_id,
+                scoring=None, X=X, y=y, cv=cv, n_jobs=1,
+                sessionbuilder=sessionbuilder)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        execute_worker.fit_and_score_estimator = fit_and_score_estimator
+
+    wall = time.time() - start
+    totals = timers.totals
+    totals['bookkeeping'] = wall - sum(totals[p] for p in PHASES
+                                       if p != 'bookkeeping')
+    totals['wall'] = wall
+    return totals
+
+
+def populate(uri, project_name, n_dims, history_size):
+    """Fill the database with `history_size` completed synthetic trials"""
+    engine = create_engine(uri, poolclass=NullPool)
+    _create_all(Base, engine)
+    session = Session(engine)
+    searchspace = make_searchspace(n_dims)
+    now = datetime.now()
+    history = make_history(searchspace, history_size)
+    session.add_all(
+        Trial(project_name=project_name, status=status, parameters=params,
+              test_scores=scores,
+              mean_test_score=None if scores is None else np.mean(scores),
+              started=now, completed=now)
+        for params, scores, status in history)
+    session.commit()
+    session.close()
+
+
+def run(uri, n_workers, history_size, strategy, n_dims, n_trials, n_samples):
+    project_name = 'throughput-%d-%d-%s' % (n_workers, history_size,
+                                            os.getpid())
+    populate(uri, project_name, n_dims, history_size)
+
+    jobs = [(uri, project_name, strategy, n_dims, n_trials, n_samples, seed)
+            for seed in range(n_workers)]
+    start = time.time()
+    pool = multiprocessing.Pool(n_workers)
+    try:
+        results = pool.map(run_worker, jobs)
+    finally:
+        pool.close()
+        pool.join()
+    wall = time.time() - start
+
+    total_trials = n_workers * n_trials
+    phases = dict((p, sum(r[p] for r in results)) for p in PHASES)
+    worker_time = sum(r['wall'] for r in results)
+    return total_trials / wall, phases, worker_time, total_trials
+
+
+def print_row(n_workers, history_size, throughput, phases, worker_time,
+              total_trials):
+    cells = ['%9d' % n_workers, '%9d' % history_size, '%10.2f' % throughput]
+    for p in PHASES:
+        cells.append('%7.2f (%4.1f%%)' % (1000 * phases[p] / total_trials,
+                                         100 * phases[p] / worker_time))
+    print(' '.join(cells))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    p.add_argument('--n-workers', type=int, nargs='+', default=[1, 2, 4],
+                   help='Number of concurrent worker processes')
+    p.add_argument('--history-size', type=int, nargs='+', default=[0, 1000],
+                   help='Number of completed trials already in the database')
+    p.add_argument('--n-trials', type=int, default=20,
+                   help='Number of trials run by each worker')
+    p.add_argument('--strategy', default='random',
+                   help='Name of the search strategy')
+    p.add_argument('--n-dims', type=int, default=5,
+                   help='Dimensionality of the search space')
+    p.add_argument('--n-samples', type=int, default=100,
+                   help='Number of samples in the (synthetic) dataset')
+    p.add_argument('--uri', default=None,
+                   help='SQLAlchemy database URI. Defaults to a SQLite '
+                   'database in a temporary directory')
+    args = p.parse_args(argv)
+
+    tmpdir = None
+    uri = args.uri
+    if uri is None:
+        tmpdir = tempfile.mkdtemp()
+        uri = 'sqlite:///%s' % os.path.join(tmpdir, 'osprey-trials.db')
+
+    print('database: %s' % uri)
+    print('strategy: %s, %d dims, %d trials per worker\n' % (
+        args.strategy, args.n_dims, args.n_trials))
+    print('%9s %9s %10s ' % ('n_workers', 'history', 'trials/s') +
+          ' '.join('%15s' % ('%s ms/trial' % p if p != 'bookkeeping'
+                             else 'other ms/trial') for p in PHASES))
+    try:
+        for history_size in args.history_size:
+            for n_workers in args.n_workers:
+                result = run(uri, n_workers, history_size, args.strategy,
+                             args.n_dims, args.n_trials, args.n_samples)
+                print_row(n_workers, history_size, *result)
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
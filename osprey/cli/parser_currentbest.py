@@ -15,5 +15,7 @@ def configure_parser(sub_parsers):
     p = sub_parsers.add_parser('current_best', description=help, help=help,
                                formatter_class=ArgumentDefaultsHelpFormatter)
     p.add_argument('config', help='Path to worker config file (yaml)')
+    p.add_argument('-k', '--top', type=int, default=1,
+                   help='Number of models to show, best first')
 
     p.set_defaults(func=func)
@@ -1,5 +1,6 @@
 from __future__ import print_function, absolute_import, division
-from argparse import ArgumentDefaultsHelpFormatter
+from datetime import datetime
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentTypeError
 
 
 def func(args, parser):
@@ -8,11 +9,45 @@ def func(args, parser):
     execute(args, parser)
 
 
+def parse_date(value):
+    # a date without a time is returned as a `date`, which selects that
+    # whole day (see `execute_dump.filter_criteria`)
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ArgumentTypeError('%r is not a date (YYYY-MM-DD[THH:MM:SS])'
+                            % value)
+
+
 def configure_parser(sub_parsers):
-    help = 'Dump history SQL database to CSV or JSON'
+    help = 'Dump history SQL database to CSV, JSON, Parquet, Arrow or NPZ'
     p = sub_parsers.add_parser('dump', description=help, help=help,
                                formatter_class=ArgumentDefaultsHelpFormatter)
     p.add_argument('config', help='Path to worker config file (yaml)')
-    p.add_argument('-o', '--output', choices=['csv', 'json'], default='json',
-                   help='output format')
+    p.add_argument('-o', '--output', default='json',
+                   choices=['csv', 'json', 'jsonl', 'parquet', 'arrow', 'npz'],
+                   help='output format. jsonl writes one JSON object per '
+                   'line. parquet and arrow require pyarrow')
+    p.add_argument('-f', '--filename', default=None,
+                   help='output file (default: stdout). Required by the '
+                   'parquet, arrow and npz formats, which store one typed '
+                   'column per hyperparameter')
+    p.add_argument('--project', default=None,
+                   help='only dump the trials of this project (default: all '
+                   'projects)')
+    p.add_argument('--status', action='append',
+                   choices=['PENDING', 'SUCCEEDED', 'FAILED', 'EXCEEDED'],
+                   help='only dump the trials with this status. May be given '
+                   'more than once')
+    p.add_argument('--since', type=parse_date, default=None,
+                   help='only dump the trials started on or after this date')
+    p.add_argument('--until', type=parse_date, default=None,
+                   help='only dump the trials started on or before this date. '
+                   'A date without a time includes that whole day')
     p.set_defaults(func=func)
@@ -0,0 +1,122 @@
+from __future__ import print_function, absolute_import, division
+"""column_codecs.py
+
+This module contains the codecs used to store the values of the
+`JSONEncoded` columns of the trials table (the parameters, the per-fold
+scores and number of samples, and the timings) as text.
+
+The default codec, 'json', stores plain JSON, as osprey always has. The
+other codecs store a compact binary encoding, as text of the form
+
+    ~<codec>[+zlib]:<base64 payload>
+
+which can't be mistaken for JSON, so a column can hold a mix of rows written
+with different codecs, and `decode` reads all of them.
+
+ - numpy:   lists of floats (or of ints) are stored as the raw bytes of a
+            float64 (int64) array. Anything else is stored as JSON.
+ - msgpack: every value is stored with msgpack (requires the msgpack
+            package).
+
+Either can be followed by '+zlib' (e.g. 'numpy+zlib') to compress the
+payload.
+"""
+
+import json
+import zlib
+import base64
+
+import numpy as np
+import six
+
+__all__ = ['encode', 'decode', 'check_codec', 'CODECS']
+
+CODECS = ('json', 'numpy', 'msgpack')
+
+_PREFIX = '~'
+_NUMPY_DTYPES = {b'f': np.dtype('<f8'), b'i': np.dtype('<i8')}
+
+
+def check_codec(name):
+    """Check that `name` is a valid codec, e.g. 'json' or 'numpy+zlib'.
+
+    Raises
+    ------
+    ValueError
+        If the codec is unknown, or its dependencies aren't installed.
+    """
+    codec, compress = _parse(name)
+    if codec == 'msgpack':
+        _import_msgpack()
+    return name
+
+
+def encode(value, codec='json'):
+    """Encode a JSON-serializable value as text with the given codec."""
+    codec, compress = _parse(codec)
+    if codec == 'numpy':
+        payload = _numpy_dumps(value)
+        if payload is None:
+            # not a flat list of numbers
+            return json.dumps(value)
+    elif codec == 'msgpack':
+        payload = _import_msgpack().packb(value, use_bin_type=True)
+    else:
+        return json.dumps(value)
+
+    if compress:
+        payload = zlib.compress(payload)
+        codec += '+zlib'
+    return '%s%s:%s' % (_PREFIX, codec,
+                        base64.b64encode(payload).decode('ascii'))
+
+
+def decode(text):
+    """Decode a value written by `encode`, with any codec."""
+    if not text.startswith(_PREFIX):
+        return json.loads(text)
+
+    name, payload = text[len(_PREFIX):].split(':', 1)
+    codec, compress = _parse(name)
+    payload = base64.b64decode(payload.encode('ascii'))
+    if compress:
+        payload = zlib.decompress(payload)
+    if codec == 'numpy':
+        dtype = _NUMPY_DTYPES[payload[:1]]
+        return np.frombuffer(payload[1:], dtype=dtype).tolist()
+    return _import_msgpack().unpackb(payload, raw=False)
+
+
+def _parse(name):
+    codec, _, compression = name.partition('+')
+    if codec not in CODECS or compression not in ('', 'zlib') or (
+            codec == 'json' and compression):
+        raise ValueError('unknown codec %r. The codecs are %s, and numpy or '
+                         'msgpack followed by "+zlib"' % (
+                             name, ', '.join(CODECS)))
+    return codec, compression == 'zlib'
+
+
+def _numpy_dumps(value):
+    if not isinstance(value, list) or len(value) == 0:
+        return None
+    if all(isinstance(v, float) for v in value):
+        kind = b'f'
+    elif all(isinstance(v, six.integer_types) and not isinstance(v, bool)
+             for v in value):
+        kind = b'i'
+    else:
+        return None
+    try:
+        array = np.array(value, dtype=_NUMPY_DTYPES[kind])
+    except OverflowError:
+        return None
+    return kind + array.tobytes()
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError('the msgpack codec requires the msgpack package')
+    return msgpack
@@ -14,10 +14,19 @@ osprey job file file. The config file has four major sections:
  - cv:             specification for cross-validation.
  - scoring:        the score function used in cross-validation. (optional)
  - random_seed:    random seed to be used. (optional)
+ - train_scoring:  whether to score the training sets in full, on a subsample,
+                   or not at all. (optional)
+ - warm_start:     the hyperparameters which can change between warm-started
+                   fits. (optional)
+ - path:           a hyperparameter evaluated for many values in each trial,
+                   e.g. along a regularization path. (optional)
+ - limits:         wall-clock time and memory limits for each trial.
+                   (optional)
 """
 
 import sys
 import six
+import json
 import hashlib
 import traceback
 import importlib
@@ -25,34 +34,40 @@ import contextlib
 from os.path import join, isfile, dirname, abspath
 
 import yaml
-import sklearn.base
 from six.moves import cPickle
 from six import iteritems
 from six.moves import reduce
-from pkg_resources import resource_filename
 
 from .entry_point import load_entry_point
 from .utils import (dict_merge, in_directory, prepend_syspath, num_samples,
                     trials_to_dict)
-from .search_space import SearchSpace
-from .strategies import BaseStrategy
-from .dataset_loaders import BaseDatasetLoader
-from .cross_validators import BaseCVFactory
 from .trials import Trial, make_session
 from .subclass_factory import init_subclass_by_name
-from . import eval_scopes
+
+# The search space, strategies, dataset loaders, cross validators and eval
+# scopes (and with them sklearn, scipy and the optional backends such as
+# hyperopt and GPy) are only imported by the methods that need them, so that
+# commands which only read the trials database (e.g. `osprey dump`) start
+# quickly.
+
+DEFAULT_CONFIG = join(dirname(abspath(__file__)), 'data',
+                      'default_config.yaml')
 
 FIELDS = {
     'estimator':       ['pickle', 'eval', 'eval_scope', 'entry_point',
                         'params', 'module'],
-    'dataset_loader':  ['name', 'params'],
-    'trials':          ['uri', 'project_name'],
+    'dataset_loader':  ['name', 'params', 'fingerprint'],
+    'trials':          ['uri', 'project_name', 'codec'],
     'search_space':    dict,
     'strategy':        ['name', 'params'],
     'cv':              (int, dict),
     'scoring':         (str, type(None)),
     'random_seed':     (int, type(None)),
     'max_param_suggestion_retries': (int, type(None)),
+    'train_scoring':   ['mode', 'fraction'],
+    'warm_start':      ['params'],
+    'path':            ['param', 'n_values'],
+    'limits':          ['time', 'memory'],
 }
 
 
@@ -81,8 +96,7 @@ class Config(object):
 
         in case of conflict, the config file dominates.
         """
-        fn = resource_filename('osprey', join('data', 'default_config.yaml'))
-        with open(fn) as f:
+        with open(DEFAULT_CONFIG) as f:
             default = parse(f)
         return reduce(dict_merge, [default, config])
 
@@ -152,6 +166,9 @@ class Config(object):
             entry_point: sklearn.linear_model.LogisticRegression
             module: myestimator
         """
+        import sklearn.base
+        from . import eval_scopes
+
         module_path = self.get_value('estimator/module')
         if module_path is not None:
             with prepend_syspath(dirname(abspath(self.path))):
@@ -172,7 +189,7 @@ class Config(object):
             else:
                 raise RuntimeError('unexpected type for estimator/eval_scope')
 
-            scope = {}
+            scope = eval_scopes.EstimatorScope()
             for pkg_name in got:
                 if pkg_name in eval_scopes.__all__:
                     scope.update(getattr(eval_scopes, pkg_name)())
@@ -227,6 +244,7 @@ class Config(object):
         raise RuntimeError('no estimator field')
 
     def search_space(self):
+        from .search_space import SearchSpace
         ss = self.get_section('search_space')
 
         searchspace = SearchSpace()
@@ -277,6 +295,7 @@ class Config(object):
         return searchspace
 
     def strategy(self):
+        from .strategies import BaseStrategy
         strategy_name = self.get_value('strategy/name')
         strategy_params = self.get_value('strategy/params', default={})
         strat = init_subclass_by_name(BaseStrategy, strategy_name,
@@ -284,6 +303,7 @@ class Config(object):
         return strat
 
     def dataset(self):
+        from .dataset_loaders import BaseDatasetLoader
         loader_name = self.get_value('dataset_loader/name')
         loader_params = self.get_value('dataset_loader/params', default={})
 
@@ -298,6 +318,21 @@ class Config(object):
 
         return X, y
 
+    def dataset_fingerprint(self, X, y=None):
+        """Fingerprint of the dataset, computed according to the
+        dataset_loader/fingerprint setting ('sample', 'full' or 'none').
+
+        Returns
+        -------
+        fingerprint : str or None
+        """
+        from .fingerprint import dataset_fingerprint, FINGERPRINT_MODES
+        mode = self.get_value('dataset_loader/fingerprint', default='sample')
+        if mode not in FINGERPRINT_MODES:
+            raise RuntimeError('dataset_loader/fingerprint must be one of %s, '
+                               'not %r' % (', '.join(FINGERPRINT_MODES), mode))
+        return dataset_fingerprint(X, y, mode=mode)
+
     def project_name(self):
         return self.get_value('trials/project_name')
 
@@ -307,8 +342,13 @@ class Config(object):
         if self.verbose:
             print('Loading trials database: %s...' % uri)
 
+        codec = self.get_value('trials/codec', default='json')
         with in_directory(dirname(abspath(self.path))):
-            value = make_session(uri, project_name=project_name)
+            try:
+                value = make_session(uri, project_name=project_name,
+                                     codec=codec)
+            except ValueError as e:
+                raise RuntimeError('trials/codec: %s' % e)
         return value
 
     def trial_results(self, table_name=None, success_only=True):
@@ -354,7 +394,99 @@ class Config(object):
         assert isinstance(max_param_suggestion_retries, (int, type(None)))
         return max_param_suggestion_retries
 
+    def train_scoring(self):
+        """How to score the training sets: 'full', 'skip' or 'subsample'.
+
+        Returns
+        -------
+        mode : str
+        fraction : float
+            The fraction of each training set scored when mode is
+            'subsample'.
+        """
+        mode = self.get_value('train_scoring/mode', default='full')
+        fraction = self.get_value('train_scoring/fraction', default=0.1)
+        if mode not in ('full', 'skip', 'subsample'):
+            raise RuntimeError('train_scoring/mode must be one of "full", '
+                               '"skip" or "subsample", not %r' % mode)
+        try:
+            fraction = float(fraction)
+        except (TypeError, ValueError):
+            raise RuntimeError('train_scoring/fraction must be a number')
+        if not 0 < fraction <= 1:
+            raise RuntimeError('train_scoring/fraction must be in (0, 1]')
+        return mode, fraction
+
+    def warm_start(self):
+        """The cache of warm-started fits, or None if warm_start/params is
+        empty.
+
+        Returns
+        -------
+        warm_start : osprey.warm_start.WarmStartCache or None
+        """
+        from .warm_start import WarmStartCache
+        params = self.get_value('warm_start/params', default=[])
+        if not isinstance(params, list) or not all(
+                isinstance(p, six.string_types) for p in params):
+            raise RuntimeError('warm_start/params must be a list of '
+                               'hyperparameter names')
+        if len(params) == 0:
+            return None
+        return WarmStartCache(params)
+
+    def limits(self):
+        """The wall-clock time (in seconds) and resident memory (in
+        megabytes) limits of each trial, each None if there is no limit.
+
+        Returns
+        -------
+        max_time : float or None
+        max_memory : float or None
+        """
+        limits = []
+        for key in ('time', 'memory'):
+            value = self.get_value('limits/%s' % key)
+            if value is not None:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = -1
+                if value <= 0:
+                    raise RuntimeError('limits/%s must be a positive number'
+                                       % key)
+            limits.append(value)
+        return tuple(limits)
+
+    def param_path(self, searchspace):
+        """The hyperparameter evaluated along a path in each trial, and its
+        values, or None if there is no path section.
+
+        Returns
+        -------
+        param : str
+        values : list
+            path/n_values values spread over the range of the parameter in
+            the search space.
+        """
+        from .paths import path_values
+        param = self.get_value('path/param')
+        if param is None:
+            return None
+        n_values = self.get_value('path/n_values', default=10)
+        if not isinstance(n_values, int) or n_values < 1:
+            raise RuntimeError('path/n_values must be a positive integer')
+        if param not in searchspace.variables:
+            raise RuntimeError('path/param %r is not a variable of the '
+                               'search space' % param)
+        try:
+            values = path_values(searchspace[param], n_values)
+        except ValueError as e:
+            raise RuntimeError(str(e))
+        return param, values
+
     def cv(self, X, y=None):
+        from .cross_validators import BaseCVFactory
         cv = self.get_section('cv')
         if isinstance(cv, int):
             cv_name = 'kfold'
@@ -365,6 +497,58 @@ class Config(object):
         return init_subclass_by_name(
             BaseCVFactory, cv_name, cv_params).create(X, y)
 
+    def cv_batch_size(self):
+        """Number of folds dispatched to a cross-validation job at a time
+        (an int, or 'auto')"""
+        batch_size = 'auto'
+        if isinstance(self.get_section('cv'), dict):
+            batch_size = self.get_value('cv/batch_size', default='auto')
+        if batch_size != 'auto' and (not isinstance(batch_size, int) or
+                                     batch_size < 1):
+            raise RuntimeError('cv/batch_size must be a positive integer or '
+                               '"auto", not %r' % batch_size)
+        return batch_size
+
+    def cv_fast_loo(self):
+        """Whether to use closed-form leave-one-out cross-validation for
+        the estimators which support it"""
+        fast_loo = True
+        if isinstance(self.get_section('cv'), dict):
+            fast_loo = self.get_value('cv/fast_loo', default=True)
+        if not isinstance(fast_loo, bool):
+            raise RuntimeError('cv/fast_loo must be true or false')
+        return fast_loo
+
+    def cv_cache_path(self, dataset_fingerprint):
+        """Path of the file in which the cross-validation splits are saved
+        (None if cv/cache is off).
+
+        The file is next to the trials database (for SQLite, otherwise next
+        to the config file), and its name depends on the fingerprint of the
+        dataset and on the cross-validator, so that changing either gives
+        new splits.
+        """
+        cv = self.get_section('cv')
+        cache = False
+        if isinstance(cv, dict):
+            cache = self.get_value('cv/cache', default=False)
+            cv = [cv.get('name'), cv.get('params', {})]
+        if not isinstance(cache, bool):
+            raise RuntimeError('cv/cache must be true or false')
+        if not cache:
+            return None
+        if dataset_fingerprint is None:
+            raise RuntimeError('cv/cache requires the dataset fingerprint, '
+                               'dataset_loader/fingerprint can\'t be "none"')
+
+        key = hashlib.sha1(json.dumps([dataset_fingerprint, cv],
+                                      sort_keys=True).encode('utf-8'))
+        directory = dirname(abspath(self.path))
+        uri = self.get_value('trials/uri')
+        if uri.startswith('sqlite:///') and uri != 'sqlite:///:memory:':
+            directory = dirname(join(directory, uri[len('sqlite:///'):]))
+        return join(directory, 'osprey-splits-%s.npz' % key.hexdigest()[:16])
+
     def sha1(self):
         """SHA1 hash of the config file itself."""
         with open(self.path, 'rb') as f:
@@ -1,5 +1,7 @@
 from __future__ import print_function, absolute_import, division
 
+import os
+
 from .utils import num_samples
 
 import numpy as np
@@ -172,3 +174,125 @@ class FixedCVFactory(BaseCVFactory):
         test_fold[train] = -1
 
         return model_selection.PredefinedSplit(test_fold)
+
+
+class CachedSplits(object):
+    """Cross-validation splits computed once, and stored as compact index
+    arrays, so that every trial reuses the same folds.
+
+    The test indices of every split are stored. The training indices are
+    only stored when they aren't simply the (sorted) complement of the test
+    indices, so e.g. LeaveOneOut takes O(n_samples) memory rather than
+    O(n_samples^2).
+
+    Use `from_cv` to compute the splits of a cross-validator, and `save` and
+    `load` to share them between workers.
+    """
+
+    def __init__(self, n_samples, test_indices, test_offsets, train_indices,
+                 train_offsets, train_is_complement):
+        self.n_samples = int(n_samples)
+        self.test_indices = test_indices
+        self.test_offsets = test_offsets
+        self.train_indices = train_indices
+        self.train_offsets = train_offsets
+        self.train_is_complement = train_is_complement
+        self.n_splits = len(train_is_complement)
+
+    @classmethod
+    def from_cv(cls, cv, X, y=None):
+        n_samples = num_samples(X)
+        dtype = np.int32 if n_samples < np.iinfo(np.int32).max else np.int64
+        tests, trains, is_complement = [], [], []
+        for train, test in cv.split(X, y):
+            mask = np.ones(n_samples, dtype=bool)
+            mask[test] = False
+            complement = np.array_equal(train, np.flatnonzero(mask))
+            tests.append(np.asarray(test, dtype=dtype))
+            trains.append(np.zeros(0, dtype=dtype) if complement
+                          else np.asarray(train, dtype=dtype))
+            is_complement.append(complement)
+
+        def concatenate(arrays):
+            offsets = np.cumsum([0] + [len(a) for a in arrays])
+            if arrays:
+                return np.concatenate(arrays), offsets
+            return np.zeros(0, dtype=dtype), offsets
+
+        test_indices, test_offsets = concatenate(tests)
+        train_indices, train_offsets = concatenate(trains)
+        return cls(n_samples, test_indices, test_offsets, train_indices,
+                   train_offsets, np.array(is_complement, dtype=bool))
+
+    def split(self, X=None, y=None, groups=None):
+        for i in range(self.n_splits):
+            test = self.test_indices[self.test_offsets[i]:
+                                     self.test_offsets[i + 1]]
+            if self.train_is_complement[i]:
+                mask = np.ones(self.n_samples, dtype=bool)
+                mask[test] = False
+                train = np.flatnonzero(mask)
+            else:
+                train = self.train_indices[self.train_offsets[i]:
+                                           self.train_offsets[i + 1]]
+            yield train, test
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.n_splits
+
+    def is_leave_one_out(self):
+        """Does every split hold out a single sample, in turn?"""
+        return (self.n_splits == self.n_samples and
+                bool(self.train_is_complement.all()) and
+                np.array_equal(self.test_indices, np.arange(self.n_samples)))
+
+    def save(self, filename):
+        """Save the splits to an .npz file, unless the file already exists.
+
+        The file is created atomically, so that when several workers save
+        their splits at the same time, exactly one of them wins and the
+        others never see a partial file.
+        """
+        tmp = '%s.%d.tmp.npz' % (filename, os.getpid())
+        np.savez(tmp, n_samples=self.n_samples,
+                 test_indices=self.test_indices,
+                 test_offsets=self.test_offsets,
+                 train_indices=self.train_indices,
+                 train_offsets=self.train_offsets,
+                 train_is_complement=self.train_is_complement)
+        try:
+            os.link(tmp, filename)
+        except (OSError, AttributeError):
+            # already saved by another worker (or, on Windows with python 2,
+            # no os.link: the splits are then not persisted)
+            pass
+        finally:
+            os.remove(tmp)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as f:
+            return cls(int(f['n_samples']), f['test_indices'],
+                       f['test_offsets'], f['train_indices'],
+                       f['train_offsets'], f['train_is_complement'])
+
+
+def cached_splits(cv, X, y=None, filename=None):
+    """The splits of `cv`, computed once.
+
+    If `filename` is given and exists, the splits are loaded from it
+    instead, so that every worker uses the same folds (even for randomized
+    cross-validators without a random_state). Otherwise they are saved to
+    it.
+    """
+    if filename is not None and os.path.exists(filename):
+        return CachedSplits.load(filename)
+
+    splits = CachedSplits.from_cv(cv, X, y)
+    if filename is not None:
+        splits.save(filename)
+        # another worker may have saved its splits first; use whichever
+        # ended up in the file, so that all the workers agree
+        if os.path.exists(filename):
+            splits = CachedSplits.load(filename)
+    return splits
@@ -1,5 +1,7 @@
 from __future__ import print_function, absolute_import, division
 
+import os
+import json
 import warnings
 import pkgutil
 import inspect
@@ -10,6 +12,9 @@ from sklearn.base import BaseEstimator
 
 __all__ = ['msmbuilder', 'import_all_estimators', 'pyemma']
 
+# in-process memo of estimator_registry(), keyed by (package, version)
+_REGISTRY = {}
+
 
 def msmbuilder():
     with warnings.catch_warnings():
@@ -33,7 +38,84 @@ def pyemma():
     return scope
 
 
+class EstimatorScope(dict):
+    """A dict of estimator classes, keyed by class name, which imports each
+    class the first time it is looked up.
+
+    It can be used directly as the local scope for `eval()`.
+
+    Parameters
+    ----------
+    paths : dict, optional
+        Maps the class names to the name of the module which contains them.
+    """
+
+    def __init__(self, paths=None):
+        super(EstimatorScope, self).__init__()
+        self.paths = dict(paths or {})
+
+    def __missing__(self, name):
+        if name not in self.paths:
+            raise KeyError(name)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=DeprecationWarning)
+            mod = importlib.import_module(self.paths[name])
+        kls = getattr(mod, name)
+        self[name] = kls
+        return kls
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self.paths
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, EstimatorScope):
+            # the classes in `other` take precedence, whether or not they
+            # have been imported yet
+            for name in other.paths:
+                self.pop(name, None)
+            self.paths.update(other.paths)
+        dict.update(self, other, **kwargs)
+
+
 def import_all_estimators(pkg):
+    """All of the estimators in a package (and its subpackages).
+
+    Returns
+    -------
+    scope : EstimatorScope
+        Maps the name of each estimator class to the class. The modules are
+        only imported when a class is first looked up.
+    """
+    return EstimatorScope(estimator_registry(pkg))
+
+
+def estimator_registry(pkg):
+    """Map the name of each estimator class in a package (and its
+    subpackages) to the name of the module which contains it.
+
+    Finding the estimators means importing every module in the package, so
+    the result is memoized, and, for packages which have a version, also
+    cached on disk (in $OSPREY_CACHE_DIR, by default ~/.cache/osprey), so
+    that it is only computed once per version of the package. Set
+    OSPREY_CACHE_DIR to an empty string to disable the disk cache.
+    """
+    version = _package_version(pkg)
+    key = (pkg.__name__, version)
+    if key in _REGISTRY:
+        return _REGISTRY[key]
+
+    filename = _cache_filename(pkg.__name__, version)
+    paths = _load_registry(filename)
+    if paths is None:
+        paths = dict((name, kls.__module__) for name, kls in
+                     _find_all_estimators(pkg).items())
+        _save_registry(filename, paths)
+
+    _REGISTRY[key] = paths
+    return paths
+
+
+def _find_all_estimators(pkg):
 
     def estimator_in_module(mod):
         for name, obj in inspect.getmembers(mod):
@@ -52,7 +134,7 @@ def import_all_estimators(pkg):
                 warnings.simplefilter("ignore", category=DeprecationWarning)
                 mod = importlib.import_module(c)
             if ispkg:
-                result.update(import_all_estimators(mod))
+                result.update(_find_all_estimators(mod))
             for kls in estimator_in_module(mod):
                 if kls.__module__.startswith(pkg.__name__):
                     result[kls.__name__] = kls
@@ -60,3 +142,50 @@ def import_all_estimators(pkg):
             print('Import Error', c, e)
             continue
     return result
+
+
+def _package_version(pkg):
+    version = getattr(pkg, '__version__', None)
+    if version is None:
+        try:
+            version = importlib.import_module(
+                pkg.__name__ + '.version').version
+        except (ImportError, AttributeError):
+            return None
+    return str(version)
+
+
+def _cache_filename(name, version):
+    cache_dir = os.environ.get(
+        'OSPREY_CACHE_DIR', os.path.join('~', '.cache', 'osprey'))
+    if version is None or not cache_dir.strip():
+        return None
+    return os.path.join(os.path.expanduser(cache_dir),
+                        'estimators-%s-%s.json' % (name, version))
+
+
+def _load_registry(filename):
+    if filename is None:
+        return None
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _save_registry(filename, paths):
+    # write to a temporary file and rename, so that concurrent workers never
+    # see a partially written cache. Failures are not fatal, the registry
+    # will just be recomputed next time.
+    if filename is None:
+        return
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(tmp, 'w') as f:
+            json.dump(paths, f)
+        os.rename(tmp, filename)
+    except (IOError, OSError):
+        pass
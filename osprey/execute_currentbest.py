@@ -3,7 +3,6 @@ from __future__ import print_function
 import numpy as np
 from .config import Config
 from .trials import Trial
-from sklearn.pipeline import Pipeline
 
 
 def execute(args, parser):
@@ -11,39 +10,67 @@ def execute(args, parser):
 
     session = config.trials()
 
-    items = [curr.to_dict() for curr in session.query(Trial).all()]
-    if not items:
+    trials = best_trials(session, config.project_name(), k=args.top)
+    if not trials:
         print('No Models Found')
-    else:
-        mean_test_scores = np.nan_to_num(np.array([i["mean_test_score"]
-                                                  if i["mean_test_score"] is not None
-                                                  else -np.inf
-                                                  for i in items],
-                                                  dtype=float))
-        c_b_m = items[mean_test_scores.argmax()]
-        parameter_dict = c_b_m["parameters"]
-        weighted_mean = c_b_m["mean_test_score"]
-        raw_test_scores = np.array(c_b_m["test_scores"])
-        raw_test_weights = np.array(c_b_m["n_test_samples"])
-        weighted_var = np.average((raw_test_scores - weighted_mean)**2, weights=raw_test_weights)
-        weighted_std = np.sqrt(weighted_var)
-        print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
-        print('Best Current Model = %f +- %f' % (weighted_mean,
-                                                 weighted_std))
+        return
+
+    estimator = config.estimator()
+    search_space = list(config.search_space().variables.keys())
+    for rank, trial in enumerate(trials):
+        weighted_mean, weighted_std = weighted_score(trial)
         print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
-        if isinstance(config.estimator(), Pipeline):
-            print('PipelineStep\tParameter \t Value')
-            for i in config.estimator().steps:
-                print(i[0])
-                for param in sorted(parameter_dict.keys()):
-                    if str(param).startswith(i[0]):
-                        print("\t\t", param.split("__")[1], "\t",
-                              parameter_dict[param])
+        if rank == 0:
+            print('Best Current Model = %f +- %f' % (weighted_mean,
+                                                     weighted_std))
         else:
-            print(config.estimator())
-            search_space = config.search_space().variables.keys()
-            for param in sorted(parameter_dict.keys()):
-                if param in search_space:
-                    print("\t\t", param, "\t", parameter_dict[param])
+            print('Model #%d = %f +- %f' % (rank + 1, weighted_mean,
+                                            weighted_std))
+        print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
+        print_parameters(estimator, search_space, trial.parameters)
 
     return
+
+
+def best_trials(session, project_name, k=1):
+    """The `k` successful trials of a project with the highest mean test
+    score, best first.
+
+    The sorting and limiting happen in the database, so only `k` trials
+    are loaded.
+    """
+    return (session.query(Trial)
+            .filter(Trial.project_name == project_name)
+            .filter(Trial.status == 'SUCCEEDED')
+            .filter(Trial.mean_test_score.isnot(None))
+            .order_by(Trial.mean_test_score.desc(), Trial.id)
+            .limit(k)
+            .all())
+
+
+def weighted_score(trial):
+    """Mean test score of a trial, and the standard deviation of the
+    per-fold test scores weighted by the number of test samples"""
+    weighted_mean = trial.mean_test_score
+    raw_test_scores = np.array(trial.test_scores)
+    raw_test_weights = np.array(trial.n_test_samples)
+    weighted_var = np.average((raw_test_scores - weighted_mean)**2,
+                              weights=raw_test_weights)
+    return weighted_mean, np.sqrt(weighted_var)
+
+
+def print_parameters(estimator, search_space, parameter_dict):
+    from sklearn.pipeline import Pipeline
+    if isinstance(estimator, Pipeline):
+        print('PipelineStep\tParameter \t Value')
+        for i in estimator.steps:
+            print(i[0])
+            for param in sorted(parameter_dict.keys()):
+                if str(param).startswith(i[0]):
+                    print("\t\t", param.split("__")[1], "\t",
+                          parameter_dict[param])
+    else:
+        print(estimator)
+        for param in sorted(parameter_dict.keys()):
+            if param in search_space:
+                print("\t\t", param, "\t", parameter_dict[param])
@@ -1,37 +1,291 @@
 from __future__ import print_function, absolute_import, division
 
+import sys
 import csv
 import json
-from six.moves import cStringIO
+from datetime import datetime, time, timedelta
+
+import six
+import numpy as np
+from sqlalchemy.types import (Integer, Float, Boolean, DateTime, Interval)
+
 from .config import Config
-from .trials import Trial
+from .trials import Trial, JSONEncoded
+
+# number of trials fetched from the database (and written) at a time
+CHUNK_SIZE = 1000
+
+COLUMNAR_FORMATS = ('parquet', 'arrow', 'npz')
 
 
 def execute(args, parser):
     config = Config(args.config, verbose=False)
 
     session = config.trials()
-    columns = Trial.__mapper__.columns
+    criteria = filter_criteria(project=args.project, status=args.status,
+                               since=args.since, until=args.until)
+
+    if args.output in COLUMNAR_FORMATS:
+        if args.filename is None:
+            raise RuntimeError('the %s output format requires an output '
+                               'file (-f/--filename)' % args.output)
+        n_trials = dump_columnar(session, args.output, args.filename,
+                                 criteria=criteria)
+        print('Wrote %d trials to %s' % (n_trials, args.filename))
+        return
+
+    if args.filename is None:
+        dump_text(session, args.output, sys.stdout, criteria=criteria)
+    else:
+        with open(args.filename, 'w') as f:
+            dump_text(session, args.output, f, criteria=criteria)
+
+
+def filter_criteria(project=None, status=None, since=None, until=None):
+    """SQL criteria selecting the trials of a project, with one of the
+    given statuses, started within [since, until].
+
+    `since` and `until` are datetimes, or dates: a date `until` includes
+    the trials started at any time of that day.
+    """
+    criteria = []
+    if project is not None:
+        criteria.append(Trial.project_name == project)
+    if status:
+        criteria.append(Trial.status.in_(status))
+    if since is not None:
+        if not isinstance(since, datetime):
+            since = datetime.combine(since, time())
+        criteria.append(Trial.started >= since)
+    if until is not None:
+        if isinstance(until, datetime):
+            criteria.append(Trial.started <= until)
+        else:
+            next_day = datetime.combine(until + timedelta(days=1), time())
+            criteria.append(Trial.started < next_day)
+    return criteria
+
 
-    if args.output == 'json':
-        items = [curr.to_dict() for curr in session.query(Trial).all()]
-        new_items = []
+def dump_text(session, fmt, f, criteria=(), chunk_size=CHUNK_SIZE):
+    """Write the trials to the file object `f` as 'json', 'jsonl' (one JSON
+    object per line) or 'csv'.
+
+    The rows are written as they are fetched from the database,
+    `chunk_size` at a time, so the output is never held in memory.
+
+    Returns
+    -------
+    n_trials : int
+    """
+    columns = list(Trial.__table__.columns)
+    names = [c.name for c in columns]
+    query = (session.query(*columns).filter(*criteria).order_by(Trial.id)
+             .yield_per(chunk_size))
+
+    n_trials = 0
+    if fmt == 'csv':
+        json_columns = set(c.name for c in columns
+                           if isinstance(c.type, JSONEncoded))
+        outcsv = csv.writer(f)
+        outcsv.writerow(names)
+        for row in query:
+            outcsv.writerow([json.dumps(v) if k in json_columns and
+                             v is not None else v
+                             for k, v in zip(names, row)])
+            n_trials += 1
+        return n_trials
+
+    if fmt not in ('json', 'jsonl'):
+        raise RuntimeError('unknown output format: %s' % fmt)
+
+    if fmt == 'json':
+        f.write('[')
+    for row in query:
+        item = dict((k, str(v) if isinstance(v, (datetime, timedelta))
+                     else v) for k, v in zip(names, row))
         # Instead of saving the parameters on their own nested dict,
         # save them along the rest of elements
-        for item in items:
-            parameters = item.pop('parameters')  # remove dict
-            item.update(parameters)  # update original dict with the parameters
-            new_items.append(item)
-        value = json.dumps(new_items)
-
-    elif args.output == 'csv':
-        buf = cStringIO()
-        outcsv = csv.writer(buf)
-        outcsv.writerow([column.name for column in columns])
-        for curr in session.query(Trial).all():
-            row = [getattr(curr, column.name) for column in columns]
-            outcsv.writerow(row)
-        value = buf.getvalue()
-
-    print(value)
-    return value
+        item.update(item.pop('parameters') or {})
+        if fmt == 'json':
+            f.write(', ' if n_trials > 0 else '')
+            f.write(json.dumps(item))
+        else:
+            f.write(json.dumps(item) + '\n')
+        n_trials += 1
+    if fmt == 'json':
+        f.write(']\n')
+    return n_trials
+
+
+def dump_columnar(session, fmt, filename, criteria=(), chunk_size=CHUNK_SIZE):
+    """Write the trials to `filename` in a columnar format, with one typed
+    column per hyperparameter.
+
+    The trials are read from the database `chunk_size` at a time, as plain
+    rows rather than ORM objects. The parameter columns are found with a
+    first pass over the parameters, so that the schema is known before the
+    first chunk is written.
+
+    Parameters
+    ----------
+    session : sqlalchemy.orm.Session
+    fmt : {'parquet', 'arrow', 'npz'}
+        'parquet' and 'arrow' (the Arrow IPC file format) require pyarrow.
+    filename : str
+    criteria : list, optional
+        SQL criteria selecting the trials to write, see `filter_criteria`.
+
+    Returns
+    -------
+    n_trials : int
+    """
+    columns = [c for c in Trial.__table__.columns if c.name != 'parameters']
+    n_trials, param_kinds = _scan_parameters(session, criteria, chunk_size)
+
+    # the hyperparameters become columns alongside the trial's own columns,
+    # like in the JSON output. Parameters whose name clashes with one of
+    # the trial's columns get a 'param_' prefix, repeated until the name
+    # is used by neither a column nor another parameter.
+    names = [c.name for c in columns]
+    kinds = [_column_kind(c) for c in columns]
+    param_names = sorted(param_kinds)
+    taken = set(names) | set(param_names)
+    for name in param_names:
+        column = name
+        if name in names:
+            column = 'param_' + name
+            while column in taken:
+                column = 'param_' + column
+            taken.add(column)
+        names.append(column)
+        kinds.append(param_kinds[name])
+
+    def chunks():
+        query = (session.query(*(columns + [Trial.parameters]))
+                 .filter(*criteria).order_by(Trial.id)
+                 .yield_per(chunk_size))
+        chunk = []
+        for row in query:
+            parameters = row[-1] or {}
+            chunk.append(list(row[:-1]) +
+                         [parameters.get(p) for p in param_names])
+            if len(chunk) == chunk_size:
+                yield list(zip(*chunk))
+                chunk = []
+        if chunk:
+            yield list(zip(*chunk))
+
+    if fmt in ('parquet', 'arrow'):
+        _write_arrow(fmt, filename, names, kinds, chunks())
+    elif fmt == 'npz':
+        _write_npz(filename, names, kinds, chunks())
+    else:
+        raise RuntimeError('unknown output format: %s' % fmt)
+    return n_trials
+
+
+def _scan_parameters(session, criteria, chunk_size):
+    """Count the trials, and find the type of each of their parameters"""
+    n_trials = 0
+    seen = {}
+    for parameters, in (session.query(Trial.parameters).filter(*criteria)
+                        .yield_per(chunk_size)):
+        n_trials += 1
+        for key, value in six.iteritems(parameters or {}):
+            seen.setdefault(key, set()).add(_value_kind(value))
+    return n_trials, dict((k, _merge_kinds(v)) for k, v in six.iteritems(seen))
+
+
+def _value_kind(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, six.integer_types):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, six.string_types):
+        return 'str'
+    return 'json'
+
+
+def _merge_kinds(kinds):
+    kinds = set(kinds) - set([None])
+    if len(kinds) == 1:
+        return kinds.pop()
+    if kinds == set(['int', 'float']):
+        return 'float'
+    # parameters of mixed types (or which are always missing) are stored as
+    # JSON strings
+    return 'json'
+
+
+def _column_kind(column):
+    for type_, kind in [(Boolean, 'bool'), (Integer, 'int'),
+                        (Float, 'float'), (DateTime, 'datetime'),
+                        (Interval, 'timedelta'), (JSONEncoded, 'json')]:
+        if isinstance(column.type, type_):
+            return kind
+    return 'str'
+
+
+def _encode_json(values):
+    return [None if v is None else json.dumps(v) for v in values]
+
+
+def _write_arrow(fmt, filename, names, kinds, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('the %s output format requires pyarrow' % fmt)
+
+    types = {'bool': pa.bool_(), 'int': pa.int64(), 'float': pa.float64(),
+             'str': pa.string(), 'json': pa.string(),
+             'datetime': pa.timestamp('us'), 'timedelta': pa.duration('us')}
+    schema = pa.schema([pa.field(n, types[k]) for n, k in zip(names, kinds)])
+
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(filename, schema)
+        write = writer.write_table
+    else:
+        writer = pa.ipc.new_file(filename, schema)
+        write = writer.write
+    try:
+        for chunk in chunks:
+            arrays = [pa.array(_encode_json(values) if kind == 'json'
+                               else list(values), type=types[kind])
+                      for values, kind in zip(chunk, kinds)]
+            write(pa.Table.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
+
+
+def _write_npz(filename, names, kinds, chunks):
+    # np.savez needs all of the arrays at once, so the columns are
+    # accumulated (as lists of plain values, not ORM objects) until the end
+    data = [[] for _ in names]
+    for chunk in chunks:
+        for column, values in zip(data, chunk):
+            column.extend(values)
+
+    arrays = {}
+    for name, kind, values in zip(names, kinds, data):
+        missing = any(v is None for v in values)
+        if kind in ('bool', 'int') and not missing:
+            array = np.array(values, dtype=np.int64 if kind == 'int' else bool)
+        elif kind in ('bool', 'int', 'float'):
+            array = np.array([np.nan if v is None else v for v in values],
+                             dtype=float)
+        elif kind == 'datetime':
+            array = np.array(values, dtype='datetime64[us]')
+        elif kind == 'timedelta':
+            array = np.array(values, dtype='timedelta64[us]')
+        else:
+            if kind == 'json':
+                values = _encode_json(values)
+            array = np.array(['' if v is None else v for v in values],
+                             dtype=six.text_type)
+        arrays[name] = array
+    np.savez(filename, **arrays)
@@ -1,7 +1,6 @@
 from __future__ import print_function, absolute_import, division
 
 from os.path import join, exists
-from pkg_resources import resource_filename
 
 TEMPLATES = {'msmbuilder': 'msmbuilder_skeleton_config.yaml',
              'sklearn': 'sklearn_skeleton_config.yaml',
@@ -12,6 +11,9 @@ TEMPLATES = {'msmbuilder': 'msmbuilder_skeleton_config.yaml',
 
 
 def execute(args, parser):
+    # pkg_resources is slow to import, and this module is imported by
+    # `osprey -h`
+    from pkg_resources import resource_filename
     template_file = TEMPLATES.get(args.template, None)
     if template_file:
         fn = resource_filename('osprey', join('data', template_file))
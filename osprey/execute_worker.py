@@ -11,14 +11,19 @@ from datetime import datetime
 
 from six import iteritems
 from six.moves import cStringIO
-from sqlalchemy import func
+from sqlalchemy import func, inspect
 from sklearn.base import clone, BaseEstimator
 import numpy as np
 
 from . import __version__
 from .config import Config
 from .trials import Trial
-from .fit_estimator import fit_and_score_estimator
+from .history import History
+from .cross_validators import cached_splits
+from .fit_estimator import (fit_and_score_estimator, fit_and_score_path,
+                            check_dataset)
+from .warm_start import has_warm_start
+from .limits import run_with_limits, TrialLimitExceeded
 from .utils import Unbuffered, format_timedelta, current_pretty_time
 from .utils import is_msmbuilder_estimator, num_samples
 from .utils import is_json_serializable
@@ -45,6 +50,12 @@ def execute(args, parser):
     strategy = config.strategy()
     config_sha1 = config.sha1()
     scoring = config.scoring()
+    train_scoring, train_fraction = config.train_scoring()
+    batch_size = config.cv_batch_size()
+    fast_loo = config.cv_fast_loo()
+    warm_start = config.warm_start()
+    path = config.param_path(searchspace)
+    max_time, max_memory = config.limits()
 
     project_name = config.project_name()
 
@@ -61,14 +72,35 @@ def execute(args, parser):
                      else '(%s,)' % num_samples(X[i])
                      for i in range(min(num_samples(X), 20))]), end='')
     print(', ...]' if (num_samples(X) > 20) else ']')
+    dataset_fingerprint = config.dataset_fingerprint(X, y)
+    if dataset_fingerprint is not None:
+        print('Dataset fingerprint: %s' % dataset_fingerprint)
+    # the dataset doesn't change between trials, so it is only validated
+    # once
+    X, y = check_dataset(X, y)
     print('Instantiated estimator:')
     print('  %r' % estimator)
+    if warm_start is not None and not has_warm_start(estimator):
+        print('The estimator has no warm_start parameter, so the fits are '
+              'not warm started')
     print(searchspace)
-
-    # set up cross-validation
-    cv = config.cv(X, y)
+    if path is not None:
+        print('Each trial evaluates %s = %s' % path)
+        # the strategy only chooses the other hyperparameters, and each
+        # trial is saved with the first value of the path
+        strategy_space = searchspace.without(path[0])
+        fixed_params = {path[0]: path[1][0]}
+    else:
+        strategy_space, fixed_params = searchspace, None
+
+    # set up cross-validation. The splits are computed once (or loaded from
+    # the cache shared by the workers), and reused by every trial.
+    cv = cached_splits(config.cv(X, y), X, y,
+                       filename=config.cv_cache_path(dataset_fingerprint))
+    print('Cross-validation: %d splits' % cv.n_splits)
 
     statuses = [None for _ in range(args.n_iters)]
+    history = History(strategy_space)
 
     # install a signal handler to print the footer before exiting
     # from sigterm (e.g. PBS job kill)
@@ -84,9 +116,11 @@ def execute(args, parser):
 
         try:
             trial_id, params = initialize_trial(
-                strategy, searchspace, estimator, config_sha1=config_sha1,
+                strategy, strategy_space, estimator, config_sha1=config_sha1,
                 project_name=project_name, sessionbuilder=config.trialscontext,
-                max_param_suggestion_retries=max_param_suggestion_retries)
+                max_param_suggestion_retries=max_param_suggestion_retries,
+                history=history, dataset_fingerprint=dataset_fingerprint,
+                fixed_params=fixed_params)
         except MaxParamSuggestionRetriesExceeded:
             print('The search strategy failed to suggest a new set of params not already present in the database after {} attempts'.format(max_param_suggestion_retries))
             break
@@ -94,7 +128,10 @@ def execute(args, parser):
         s = run_single_trial(
             estimator=estimator, params=params, trial_id=trial_id,
             scoring=scoring, X=X, y=y, cv=cv, n_jobs=args.n_jobs,
-            sessionbuilder=config.trialscontext)
+            sessionbuilder=config.trialscontext, train_scoring=train_scoring,
+            train_fraction=train_fraction, batch_size=batch_size,
+            fast_loo=fast_loo, check_input=False, warm_start=warm_start,
+            path=path, max_time=max_time, max_memory=max_memory)
 
         statuses[i] = s
 
@@ -102,11 +139,17 @@ def execute(args, parser):
 
 
 def initialize_trial(strategy, searchspace, estimator, config_sha1,
-                     project_name, sessionbuilder, max_param_suggestion_retries):
+                     project_name, sessionbuilder, max_param_suggestion_retries,
+                     history=None, dataset_fingerprint=None,
+                     fixed_params=None):
+    """Add a PENDING trial with the params suggested by the strategy (and
+    the `fixed_params`, which aren't in `searchspace`), and return its id
+    and params"""
 
     def build_full_params(xparams):
         # make sure we get _all_ the parameters, including defaults on the
         # estimator class, to save in the database
+        xparams = dict(xparams, **(fixed_params or {}))
         params = clone(estimator).set_params(**xparams).get_params()
         params = dict((k, v) for k, v in iteritems(params)
                       if is_json_serializable(v) and
@@ -115,11 +158,14 @@ def initialize_trial(strategy, searchspace, estimator, config_sha1,
         return params
 
     with sessionbuilder() as session:
-        # requery the history ever iteration, because another worker
-        # process may have written to it in the mean time
-        history = [[t.parameters, t.test_scores, t.status]
-                   for t in session.query(Trial).all()
-                   if t.project_name == project_name]
+        # requery the history every iteration, because another worker
+        # process may have written to it in the mean time. Only the trials
+        # which are new, or were still pending last time, need to be read.
+        start = time.time()
+        if history is None:
+            history = History(searchspace)
+        update_history(history, session, project_name)
+        timings = {'history_load': time.time() - start}
 
         print('History contains: %d trials' % len(history))
         if strategy.short_name == 'gp' and strategy.y_best != None:
@@ -139,14 +185,17 @@ def initialize_trial(strategy, searchspace, estimator, config_sha1,
             else:
                 raise MaxParamSuggestionRetriesExceeded
 
+        timings['suggest'] = time.time() - start
         print('  %r' % params)
         print('(%s took %.3f s)\n' % (strategy.short_name,
-                                      time.time() - start))
+                                      timings['suggest']))
         assert len(params) == searchspace.n_dims
+        params = dict(params, **(fixed_params or {}))
 
         t = Trial(status='PENDING', parameters=full_params, host=gethostname(),
                   user=getuser(), started=datetime.now(),
-                  config_sha1=config_sha1)
+                  config_sha1=config_sha1, timings=timings,
+                  dataset_fingerprint=dataset_fingerprint)
         session.add(t)
         session.commit()
         trial_id = t.id
@@ -154,34 +203,148 @@ def initialize_trial(strategy, searchspace, estimator, config_sha1,
     return trial_id, params
 
 
+# the largest number of ids in an IN clause (SQLite allows 999 parameters)
+MAX_IN_IDS = 500
+
+
+def update_history(history, session, project_name):
+    """Bring `history` up to date with the trials in the database
+
+    Only the trials after the last one read, the pending ones, and the ids
+    that were missing from the previous read are queried. With several
+    workers, ids aren't necessarily committed in order (on PostgreSQL or
+    MySQL, a trial can become visible after one with a larger id), so the
+    gaps among the new ids which don't belong to other projects are read
+    once more on the next update (by which time the other workers have
+    committed them), and then forgotten (e.g. the ids of deleted trials).
+    """
+    old_max_id = history.max_id
+    recheck = history.pending_ids + sorted(history.missing_ids)
+    query = session.query(Trial).filter(Trial.project_name == project_name)
+    history.update_from_trials(
+        query.filter(Trial.id > old_max_id).order_by(Trial.id))
+    for i in range(0, len(recheck), MAX_IN_IDS):
+        history.update_from_trials(
+            query.filter(Trial.id.in_(recheck[i:i + MAX_IN_IDS]))
+            .order_by(Trial.id))
+
+    missing = set()
+    low, high = max(old_max_id + 1, 1), history.max_id - 1
+    if low <= high:
+        ids = np.arange(low, high + 1)
+        gaps = ids[~np.isin(ids, history.ids)]
+        if len(gaps) > 0:
+            other_projects = (session.query(Trial.id)
+                              .filter(Trial.id.between(low, high))
+                              .filter(Trial.project_name != project_name))
+            other_projects = [i for i, in other_projects]
+            missing = set(int(i) for i in gaps[~np.isin(gaps, other_projects)])
+    history.missing_ids = missing
+    return history
+
+
 def run_single_trial(estimator, params, trial_id, scoring, X, y, cv, n_jobs,
-                     sessionbuilder):
+                     sessionbuilder, train_scoring='full', train_fraction=0.1,
+                     batch_size='auto', fast_loo=True, check_input=True,
+                     warm_start=None, path=None, max_time=None,
+                     max_memory=None):
+    """Fit and score the trial `trial_id`, and save the results.
+
+    With a `path` (a parameter name and a list of values), the trial is
+    evaluated for each of the values with `fit_and_score_path`. The trial's
+    row gets the results of the first value, and a new row is added for each
+    of the others, so that the strategies see them all in the history.
+
+    With a `max_time` (in seconds) or `max_memory` (in megabytes) limit, the
+    trial is fit in a supervised child process (see `osprey.limits`), and
+    gets the EXCEEDED status if it is killed for going over the limit. The
+    `warm_start` cache isn't updated by the child process.
+    """
 
     status = None
 
     try:
-        score = fit_and_score_estimator(
-            estimator, params, cv=cv, scoring=scoring, X=X, y=y, n_jobs=n_jobs,
-            verbose=1)
+        if path is None:
+            scores = [run_with_limits(
+                fit_and_score_estimator, (estimator, params), dict(
+                    cv=cv, scoring=scoring, X=X, y=y, n_jobs=n_jobs,
+                    verbose=1, train_scoring=train_scoring,
+                    train_fraction=train_fraction, batch_size=batch_size,
+                    fast_loo=fast_loo, check_input=check_input,
+                    warm_start=warm_start),
+                max_time=max_time, max_memory=max_memory)]
+        else:
+            path_param, path_values = path
+            scores = run_with_limits(
+                fit_and_score_path,
+                (estimator, params, path_param, path_values), dict(
+                    cv=cv, scoring=scoring, X=X, y=y, n_jobs=n_jobs,
+                    verbose=1, train_scoring=train_scoring,
+                    train_fraction=train_fraction, batch_size=batch_size,
+                    check_input=check_input),
+                max_time=max_time, max_memory=max_memory)
         with sessionbuilder() as session:
             trial = session.query(Trial).get(trial_id)
-            trial.mean_test_score = score['mean_test_score']
-            trial.mean_train_score = score['mean_train_score']
-            trial.test_scores = score['test_scores']
-            trial.train_scores = score['train_scores']
-            trial.n_test_samples = score['n_test_samples']
-            trial.n_train_samples = score['n_train_samples']
-
-            trial.status = 'SUCCEEDED'
-            best_so_far = session.query(
-                func.max(Trial.mean_test_score)).first()
+            trials = [trial]
+            if path is not None:
+                trials = path_trials(session, trial, path_param, path_values)
+
+            for trial, score in zip(trials, scores):
+                trial.mean_test_score = score['mean_test_score']
+                trial.mean_train_score = score['mean_train_score']
+                trial.test_scores = score['test_scores']
+                trial.train_scores = score['train_scores']
+                trial.n_test_samples = score['n_test_samples']
+                trial.n_train_samples = score['n_train_samples']
+                trial.approximate_train_scores = \
+                    score['approximate_train_scores']
+                trial.status = 'SUCCEEDED'
+
+            mean_test_score = max(t.mean_test_score for t in trials)
+            best_so_far = best_score(session, trial.project_name)
+            if best_so_far is None:
+                best_so_far = mean_test_score
             print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
-            print('Success! Model score = %f' % trial.mean_test_score)
+            print('Success! Model score = %f' % mean_test_score)
             print('(best score so far   = %f)' %
-                  max(trial.mean_test_score, best_so_far[0]))
+                  max(mean_test_score, best_so_far))
             print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
+
+            completed = datetime.now()
+            all_timings = []
+            for trial, score in zip(trials, scores):
+                trial.completed = completed
+                trial.elapsed = trial.completed - trial.started
+                timings = dict(trial.timings or {})
+                timings['fit'] = score['fit_times']
+                timings['score_test'] = score['test_score_times']
+                timings['score_train'] = score['train_score_times']
+                trial.timings = timings
+                all_timings.append(timings)
+            status = trials[0].status
+            start = time.time()
+            session.commit()
+            db_write = time.time() - start
+
+            # the time of the write (flush and commit) is only known once
+            # it's done, so it's saved with a small follow-up update, which
+            # doesn't reload the (expired) trials
+            session.bulk_update_mappings(Trial, [
+                {'id': inspect(trial).identity[0],
+                 'timings': dict(timings, db_write=db_write)}
+                for trial, timings in zip(trials, all_timings)])
+            session.commit()
+
+    except TrialLimitExceeded as e:
+        with sessionbuilder() as session:
+            trial = session.query(Trial).get(trial_id)
+            trial.traceback = str(e)
+            trial.status = 'EXCEEDED'
             trial.completed = datetime.now()
             trial.elapsed = trial.completed - trial.started
+            print('-'*78, file=sys.stderr)
+            print('Trial killed: %s' % e, file=sys.stderr)
+            print('-'*78, file=sys.stderr)
             session.commit()
             status = trial.status
 
@@ -211,6 +374,39 @@ def run_single_trial(estimator, params, trial_id, scoring, X, y, cv, n_jobs,
     return status
 
 
+def path_trials(session, trial, path_param, path_values):
+    """The trials for each value of a path: `trial` itself for the first
+    value, and copies of it, added to the session, for the others. The
+    copies don't get the history load and suggestion timings of `trial`,
+    only their own fit and score timings."""
+    first = trial
+    trials = []
+    for value in path_values:
+        if trials:
+            trial = Trial(
+                project_name=first.project_name, status=first.status,
+                host=first.host, user=first.user, started=first.started,
+                config_sha1=first.config_sha1,
+                dataset_fingerprint=first.dataset_fingerprint)
+            session.add(trial)
+        parameters = dict(first.parameters)
+        parameters[path_param] = value
+        trial.parameters = parameters
+        trials.append(trial)
+    return trials
+
+
+def best_score(session, project_name):
+    """Best mean test score of the project's trials (None if there are
+    none yet)"""
+    # only successful trials have a mean_test_score, so there's no need to
+    # filter on the status, and the query is answered from the
+    # (project_name, mean_test_score) index
+    return (session.query(func.max(Trial.mean_test_score))
+            .filter(Trial.project_name == project_name)
+            .scalar())
+
+
 def print_header():
     print('='*70)
     print('= osprey is a tool for machine learning '
@@ -248,6 +444,9 @@ def print_footer(statuses, start_time, signum=None):
         print('== exiting immediately.', file=sys.stderr)
 
     print('%d/%d models fit successfully.' % (n_successes, len(statuses)))
+    n_exceeded = sum(s == 'EXCEEDED' for s in statuses)
+    if n_exceeded > 0:
+        print('%d model(s) exceeded the time or memory limit.' % n_exceeded)
     print('time:         %s' % current_pretty_time())
     print('elapsed:      %s.' % elapsed)
     print('osprey worker exiting.')
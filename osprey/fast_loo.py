@@ -0,0 +1,102 @@
+from __future__ import print_function, absolute_import, division
+"""fast_loo.py
+
+Closed-form leave-one-out cross-validation.
+
+For some estimators, the predictions of the n models fit on all but one
+sample can be computed from a single fit on all of the samples (e.g. with
+the diagonal of the hat matrix for ridge regression), which makes
+leave-one-out cross-validation about as cheap as one fit. Such estimators
+register a function with `register_fast_loo`, which
+`fit_and_score_estimator` uses instead of fitting the estimator once per
+fold.
+"""
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import LeaveOneOut, LeavePOut
+
+__all__ = ['register_fast_loo', 'get_fast_loo', 'is_leave_one_out',
+           'loo_estimator']
+
+_FAST_LOO = {}
+
+
+def register_fast_loo(estimator_class):
+    """Register a closed-form leave-one-out function for an estimator class.
+
+    The function is called as `func(estimator, X, y)`, with an unfitted
+    estimator with its parameters set, and returns the array of leave-one-out
+    predictions, i.e. for every sample, the prediction of the estimator fit
+    on all of the other samples. It returns None if it doesn't support the
+    estimator's parameters or the data, in which case the folds are fit one
+    by one as usual.
+
+    Only exact instances of `estimator_class` use the function, not
+    instances of its subclasses.
+    """
+    def decorator(func):
+        _FAST_LOO[estimator_class] = func
+        return func
+    return decorator
+
+
+def get_fast_loo(estimator):
+    """The closed-form leave-one-out function for an estimator, or None"""
+    return _FAST_LOO.get(type(estimator))
+
+
+def is_leave_one_out(cv):
+    """Does the cross-validator hold out each sample in turn?"""
+    if hasattr(cv, 'is_leave_one_out'):
+        # osprey.cross_validators.CachedSplits
+        return cv.is_leave_one_out()
+    if isinstance(cv, LeavePOut):
+        return cv.p == 1
+    return isinstance(cv, LeaveOneOut)
+
+
+def loo_estimator(estimator, predictions):
+    """A stand-in for the estimators fit on all samples but one, which can be
+    passed to a scorer. Its `loo_index` attribute selects the held out
+    sample, for which it predicts `predictions[loo_index]`."""
+    estimator = clone(estimator)
+    estimator.loo_index = 0
+
+    def predict(X):
+        return np.asarray(predictions[estimator.loo_index])[np.newaxis]
+    estimator.predict = predict
+    return estimator
+
+
+@register_fast_loo(Ridge)
+def _ridge_loo(estimator, X, y):
+    params = estimator.get_params()
+    if (params.get('normalize') or params.get('positive') or
+            np.ndim(params['alpha']) != 0):
+        return None
+    if not isinstance(X, np.ndarray) or X.ndim != 2 or y is None:
+        return None
+
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_samples = X.shape[0]
+    if params['fit_intercept']:
+        X_mean, y_mean = X.mean(axis=0), y.mean(axis=0)
+    else:
+        X_mean, y_mean = 0, 0
+
+    # with X = U S V^T, the hat matrix of ridge regression is
+    # H = U diag(s^2 / (s^2 + alpha)) U^T (plus 1/n with an intercept), and
+    # the leave-one-out residuals are the residuals divided by 1 - H_ii
+    U, s, _ = np.linalg.svd(X - X_mean, full_matrices=False)
+    shrinkage = s ** 2 / (s ** 2 + params['alpha'])
+    fitted = U.dot((shrinkage * U.T.dot(y - y_mean).T).T) + y_mean
+    leverage = (U ** 2).dot(shrinkage)
+    if params['fit_intercept']:
+        leverage += 1 / n_samples
+    if y.ndim == 2:
+        leverage = leverage[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return y - (y - fitted) / (1 - leverage)
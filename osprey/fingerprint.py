@@ -0,0 +1,112 @@
+from __future__ import print_function, absolute_import, division
+"""fingerprint.py
+
+This module computes fingerprints of datasets: short strings which change
+whenever the data loaded by the dataset loader changes. Unlike the sha1 of
+the config file, the fingerprint is computed from the data itself, so it can
+be used to decide whether results computed earlier (and stored with the
+fingerprint of the data they were computed on) can be reused.
+
+Two modes are available:
+
+ - sample: hash the dtype and shape of every array, plus a fixed number of
+           evenly spaced blocks of its bytes. This takes constant time per
+           array, regardless of its size, but can miss changes which fall
+           entirely between two sampled blocks.
+ - full:   hash all of the bytes, with xxhash if it is installed (sha1
+           otherwise).
+"""
+
+import hashlib
+
+import numpy as np
+import six
+
+__all__ = ['dataset_fingerprint', 'FINGERPRINT_MODES']
+
+FINGERPRINT_MODES = ('sample', 'full', 'none')
+
+# number and size (in bytes) of the blocks hashed per array in 'sample' mode
+N_BLOCKS = 16
+BLOCK_SIZE = 1 << 16
+
+
+def dataset_fingerprint(X, y=None, mode='sample'):
+    """Fingerprint of a dataset, as returned by a dataset loader.
+
+    Parameters
+    ----------
+    X : array-like, or list of array-like
+    y : array-like, or list of array-like, optional
+    mode : {'sample', 'full', 'none'}
+
+    Returns
+    -------
+    fingerprint : str or None
+        A string of the form '<mode>-<algorithm>:<hexdigest>', or None if
+        mode is 'none'. Fingerprints computed with different modes never
+        compare equal.
+    """
+    if mode == 'none':
+        return None
+    elif mode == 'sample':
+        algorithm, h = 'sha1', hashlib.sha1()
+    elif mode == 'full':
+        try:
+            import xxhash
+            algorithm, h = 'xxh64', xxhash.xxh64()
+        except ImportError:
+            algorithm, h = 'sha1', hashlib.sha1()
+    else:
+        raise ValueError('mode must be one of %s, not %r' % (
+            ', '.join(FINGERPRINT_MODES), mode))
+
+    full = (mode == 'full')
+    _update(h, X, full)
+    h.update(b'|')
+    _update(h, y, full)
+    return '%s-%s:%s' % (mode, algorithm, h.hexdigest())
+
+
+def _update(h, obj, full):
+    if obj is None:
+        h.update(b'N')
+    elif isinstance(obj, six.text_type):
+        h.update(b'U%d:' % len(obj) + obj.encode('utf-8'))
+    elif isinstance(obj, six.binary_type):
+        h.update(b'B%d:' % len(obj) + obj)
+    elif hasattr(obj, 'xyz'):
+        # mdtraj.Trajectory
+        _update(h, obj.xyz, full)
+    elif isinstance(obj, (np.ndarray, np.generic)):
+        _update_array(h, np.asarray(obj), full)
+    elif hasattr(obj, 'keys'):
+        # dict-like datasets, e.g. msmbuilder.dataset
+        keys = sorted(obj.keys())
+        h.update(b'D%d:' % len(keys))
+        for key in keys:
+            _update(h, key, full)
+            _update(h, obj[key], full)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'L%d:' % len(obj))
+        for item in obj:
+            _update(h, item, full)
+    else:
+        _update_array(h, np.asarray(obj), full)
+
+
+def _update_array(h, a, full):
+    if a.dtype.hasobject:
+        h.update(b'O%d:' % a.size)
+        for item in a.ravel():
+            _update(h, item, full)
+        return
+
+    h.update(('A%s%r' % (a.dtype.str, a.shape)).encode('ascii'))
+    buf = np.ascontiguousarray(a).reshape(-1).view(np.uint8)
+    if full or buf.size <= N_BLOCKS * BLOCK_SIZE:
+        h.update(buf)
+        return
+    offsets = np.linspace(0, buf.size - BLOCK_SIZE, N_BLOCKS).astype(int)
+    for offset in offsets:
+        h.update(buf[offset:offset + BLOCK_SIZE])
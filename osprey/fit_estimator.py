@@ -1,6 +1,8 @@
 from __future__ import print_function, absolute_import, division
 
 import time
+from itertools import islice
+from multiprocessing import cpu_count
 from distutils.version import LooseVersion
 
 import numpy as np
@@ -11,7 +13,10 @@ from sklearn.externals.joblib import Parallel, delayed
 from sklearn.model_selection import check_cv
 from sklearn.model_selection._validation import _safe_split, _score
 
-from .utils import check_arrays, num_samples
+from .fast_loo import get_fast_loo, is_leave_one_out, loo_estimator
+from .paths import fit_path
+from .utils import check_arrays, num_samples, FoldView
+from .warm_start import has_warm_start, set_warm_start
 from .utils import short_format_time, is_msmbuilder_estimator
 
 
@@ -21,7 +26,10 @@ if LooseVersion(sklearn.__version__) < LooseVersion('0.16.1'):
 
 def fit_and_score_estimator(estimator, parameters, cv, X, y=None, scoring=None,
                             iid=True, n_jobs=1, verbose=1,
-                            pre_dispatch='2*n_jobs'):
+                            pre_dispatch='2*n_jobs', train_scoring='full',
+                            train_fraction=0.1, batch_size='auto',
+                            fast_loo=True, check_input=True,
+                            warm_start=None):
     """Fit and score an estimator with cross-validation
 
     This function is basically a copy of sklearn's
@@ -34,46 +42,188 @@ def fit_and_score_estimator(estimator, parameters, cv, X, y=None, scoring=None,
     It was written against sklearn version 0.16.1. Prior Versions are likely
     to fail due to changes in the design of cross_validation module.
 
+    Scoring the training set can be much more expensive than scoring the
+    test set for predict-heavy models. With `train_scoring='skip'`, the
+    training set is not scored and the training scores are None. With
+    `train_scoring='subsample'`, only a random `train_fraction` of the
+    training set is scored, and the training scores are approximate.
+
+    The folds are dispatched to the workers in batches of `batch_size`
+    folds, to amortize the overhead of each task over several cheap fits
+    (e.g. with LeaveOneOut). By default ('auto') each job gets about four
+    batches.
+
+    With `fast_loo`, leave-one-out cross-validation of estimators which
+    support it (see `osprey.fast_loo`) is done in closed form from a single
+    fit. The training scores are then those of the fit on all the samples,
+    and are approximate.
+
+    With a `warm_start` cache (an `osprey.warm_start.WarmStartCache`), the
+    estimator of each fold is warm started from the one fit on the same fold
+    by a previous call, when their parameters only differ in those which the
+    cache allows to change. This requires an estimator with a `warm_start`
+    parameter; the cache is ignored otherwise.
+
+    The dataset is validated with `check_dataset`. When fitting many
+    estimators on the same dataset, validate it once with `check_dataset`
+    and pass `check_input=False`, which only checks that X and y have the
+    same number of samples.
+
     Returns
     -------
     out : dict, with keys 'mean_test_score' 'test_scores', 'train_scores'
         The scores on the training and test sets, as well as the mean test set
-        score.
+        score. The wall-clock time spent fitting, scoring the test set and
+        scoring the training set in each fold are in 'fit_times',
+        'test_score_times' and 'train_score_times'.
     """
 
+    _check_train_scoring(train_scoring, train_fraction)
     scorer = check_scoring(estimator, scoring=scoring)
-    n_samples = num_samples(X)
-    X, y = check_arrays(X, y, allow_lists=True, sparse_format='csr',
-                        allow_nans=True)
-    if y is not None:
-        if len(y) != n_samples:
-            raise ValueError('Target variable (y) has a different number '
-                             'of samples (%i) than data (X: %i samples)'
-                             % (len(y), n_samples))
+    if check_input:
+        X, y = check_dataset(X, y)
+    else:
+        _check_n_samples(X, y)
+    cv = check_cv(cv=cv, y=y, classifier=is_classifier(estimator))
+    n_splits = _get_n_splits(cv, X, y)
+
+    if warm_start is not None and not has_warm_start(estimator):
+        warm_start = None
+
+    out = None
+    if fast_loo and is_leave_one_out(cv) and get_fast_loo(estimator):
+        out = _fast_loo_and_score(estimator, X, y, scorer, parameters,
+                                  train_scoring)
+    if out is None:
+        if batch_size == 'auto':
+            batch_size = _auto_batch_size(n_splits, n_jobs)
+        splits = enumerate(cv.split(X, y))
+        batches = iter(lambda: list(islice(splits, batch_size)), [])
+        trains = []
+
+        def tasks():
+            for batch in batches:
+                warm_estimators = None
+                if warm_start is not None:
+                    trains.extend(train for _, (train, test) in batch)
+                    warm_estimators = [warm_start.get(i, parameters, train)
+                                       for i, (train, test) in batch]
+                yield delayed(_fit_and_score_batch)(
+                    estimator, X, y, scorer, [fold for _, fold in batch],
+                    verbose, parameters, warm_estimators=warm_estimators,
+                    fit_params=None, train_scoring=train_scoring,
+                    train_fraction=train_fraction)
+
+        out = Parallel(
+            n_jobs=n_jobs, verbose=verbose, pre_dispatch=pre_dispatch
+        )(tasks())
+        out = [fold for batch in out for fold in batch]
+        if warm_start is not None:
+            for i, (train, (_, fitted)) in enumerate(zip(trains, out)):
+                warm_start.put(i, parameters, train, fitted)
+            out = [scores for scores, _ in out]
+        approximate_train_scores = train_scoring == 'subsample'
+    else:
+        approximate_train_scores = True
+
+    assert len(out) == n_splits
+    return _collect_scores(estimator, out, iid, verbose, train_scoring,
+                           approximate_train_scores)
+
+
+def fit_and_score_path(estimator, parameters, path_param, path_values, cv, X,
+                       y=None, scoring=None, iid=True, n_jobs=1, verbose=1,
+                       pre_dispatch='2*n_jobs', train_scoring='full',
+                       train_fraction=0.1, batch_size='auto',
+                       check_input=True):
+    """Fit and score an estimator with cross-validation, for many values of
+    one of its parameters.
+
+    Each fold is fit for all of `path_values` at once with
+    `osprey.paths.fit_path`, e.g. along the regularization path of a linear
+    model, or with the stages of a boosting model, for estimators which
+    support it. Other estimators are fit once per value.
+
+    The other arguments are those of `fit_and_score_estimator`.
+
+    Returns
+    -------
+    out : list of dict
+        The result of `fit_and_score_estimator` for each of the values. The
+        time spent fitting each fold is spread evenly over the values.
+    """
+    _check_train_scoring(train_scoring, train_fraction)
+    if len(path_values) == 0:
+        raise ValueError('path_values is empty')
+    if parameters is not None:
+        parameters = dict((k, v) for k, v in parameters.items()
+                          if k != path_param)
+
+    scorer = check_scoring(estimator, scoring=scoring)
+    if check_input:
+        X, y = check_dataset(X, y)
+    else:
+        _check_n_samples(X, y)
     cv = check_cv(cv=cv, y=y, classifier=is_classifier(estimator))
+    n_splits = _get_n_splits(cv, X, y)
 
+    if batch_size == 'auto':
+        batch_size = _auto_batch_size(n_splits, n_jobs)
+    splits = cv.split(X, y)
+    batches = iter(lambda: list(islice(splits, batch_size)), [])
     out = Parallel(
         n_jobs=n_jobs, verbose=verbose, pre_dispatch=pre_dispatch
     )(
-        delayed(_fit_and_score)(clone(estimator), X, y, scorer,
-                                train, test, verbose, parameters,
-                                fit_params=None)
-        for train, test in cv.split(X, y))
+        delayed(_fit_and_score_path_batch)(
+            estimator, X, y, scorer, batch, parameters, path_param,
+            path_values, train_scoring=train_scoring,
+            train_fraction=train_fraction)
+        for batch in batches)
+    out = [fold for batch in out for fold in batch]
+    assert len(out) == n_splits
+
+    # from the scores of each value in each fold, to those of each fold for
+    # each value
+    return [_collect_scores(estimator, list(folds), iid, verbose,
+                            train_scoring, train_scoring == 'subsample')
+            for folds in zip(*out)]
+
+
+def _check_train_scoring(train_scoring, train_fraction):
+    if train_scoring not in ('full', 'skip', 'subsample'):
+        raise ValueError('train_scoring must be one of "full", "skip" or '
+                         '"subsample", not %r' % train_scoring)
+    if train_scoring == 'subsample' and not 0 < train_fraction <= 1:
+        raise ValueError('train_fraction must be in (0, 1], not %r'
+                         % train_fraction)
 
-    assert len(out) == cv.n_splits
 
+def _collect_scores(estimator, out, iid, verbose, train_scoring,
+                    approximate_train_scores):
+    """The result of `fit_and_score_estimator`, from the scores and timings
+    of each fold"""
     train_scores, test_scores = [], []
     n_train_samples, n_test_samples = [], []
-    for test_score, n_test, train_score, n_train, _ in out:
+    fit_times, test_score_times, train_score_times = [], [], []
+    for (test_score, n_test, train_score, n_train, fit_time, test_score_time,
+         train_score_time) in out:
         train_scores.append(train_score)
         test_scores.append(test_score)
         n_test_samples.append(n_test)
         n_train_samples.append(n_train)
+        fit_times.append(fit_time)
+        test_score_times.append(test_score_time)
+        train_score_times.append(train_score_time)
 
-    train_scores, test_scores = map(list, check_arrays(train_scores,
-                                                       test_scores,
-                                                       warn_nans=True,
-                                                       replace_nans=True))
+    if train_scoring == 'skip':
+        test_scores, = map(list, check_arrays(test_scores, warn_nans=True,
+                                              replace_nans=True))
+        train_scores = None
+    else:
+        train_scores, test_scores = map(list, check_arrays(train_scores,
+                                                           test_scores,
+                                                           warn_nans=True,
+                                                           replace_nans=True))
 
     if iid:
         if verbose > 0 and is_msmbuilder_estimator(estimator):
@@ -81,20 +231,146 @@ def fit_and_score_estimator(estimator, parameters, cv, X, y=None, scoring=None,
             print('[CV]   n_train_samples: %s' % str(n_train_samples))
             print('[CV]   n_test_samples: %s' % str(n_test_samples))
         mean_test_score = np.average(test_scores, weights=n_test_samples)
-        mean_train_score = np.average(train_scores, weights=n_train_samples)
+        mean_train_score = (None if train_scores is None else
+                            np.average(train_scores, weights=n_train_samples))
     else:
         mean_test_score = np.average(test_scores)
-        mean_train_score = np.average(train_scores)
+        mean_train_score = (None if train_scores is None else
+                            np.average(train_scores))
 
     grid_scores = {
         'mean_test_score': mean_test_score, 'test_scores': test_scores,
         'mean_train_score': mean_train_score, 'train_scores': train_scores,
-        'n_test_samples': n_test_samples, 'n_train_samples': n_train_samples}
+        'n_test_samples': n_test_samples, 'n_train_samples': n_train_samples,
+        'fit_times': fit_times, 'test_score_times': test_score_times,
+        'train_score_times': train_score_times,
+        'approximate_train_scores': (None if train_scores is None else
+                                     approximate_train_scores)}
     return grid_scores
 
 
+def check_dataset(X, y=None):
+    """Validate a dataset for `fit_and_score_estimator`.
+
+    Arrays are converted to numpy arrays (and sparse matrices to CSR), and
+    X and y must have the same number of samples. Lists (e.g. of
+    trajectories) are wrapped in a `FoldView`, so that the number of
+    samples of each of their elements is only computed once.
+
+    Returns
+    -------
+    X, y : the validated dataset
+    """
+    _check_n_samples(X, y)
+    X, y = check_arrays(X, y, allow_lists=True, sparse_format='csr',
+                        allow_nans=True)
+    # the folds of a list dataset are views of it, until they are given to
+    # the estimator
+    if isinstance(X, list):
+        X = FoldView(X)
+    if isinstance(y, list):
+        y = FoldView(y)
+    return X, y
+
+
+def _check_n_samples(X, y):
+    n_samples = num_samples(X)
+    if y is not None and num_samples(y) != n_samples:
+        raise ValueError('Target variable (y) has a different number '
+                         'of samples (%i) than data (X: %i samples)'
+                         % (num_samples(y), n_samples))
+
+
+def _get_n_splits(cv, X, y):
+    n_splits = getattr(cv, 'n_splits', None)
+    if n_splits is None:
+        n_splits = cv.get_n_splits(X, y)
+    return n_splits
+
+
+def _auto_batch_size(n_splits, n_jobs):
+    if n_jobs < 0:
+        n_jobs = max(cpu_count() + 1 + n_jobs, 1)
+    # a few batches per job, so that the jobs stay balanced when some folds
+    # take longer than others
+    return max(1, int(np.ceil(n_splits / (4 * n_jobs))))
+
+
+def _fit_and_score_batch(estimator, X, y, scorer, splits, verbose, parameters,
+                         warm_estimators=None, **kwargs):
+    """Fit and score the folds of a batch.
+
+    With `warm_estimators` (for each fold, the estimator to warm start from,
+    or None), the fitted estimators are returned along with the scores.
+    """
+    if warm_estimators is None:
+        return [_fit_and_score(clone(estimator), X, y, scorer, train, test,
+                               verbose, parameters, **kwargs)
+                for train, test in splits]
+
+    out = []
+    for (train, test), warm in zip(splits, warm_estimators):
+        fitted = warm
+        if fitted is None:
+            fitted = set_warm_start(clone(estimator))
+        try:
+            scores = _fit_and_score(fitted, X, y, scorer, train, test,
+                                    verbose, parameters, **kwargs)
+        except Exception:
+            if warm is None:
+                raise
+            # some estimators can't be warm started to every parameter
+            # (e.g. a forest to fewer trees): fit a fresh one instead
+            fitted = set_warm_start(clone(estimator))
+            scores = _fit_and_score(fitted, X, y, scorer, train, test,
+                                    verbose, parameters, **kwargs)
+        out.append((scores, fitted))
+    return out
+
+
+def _fit_and_score_path_batch(estimator, X, y, scorer, splits, parameters,
+                              path_param, path_values, **kwargs):
+    return [_fit_and_score_path(estimator, X, y, scorer, train, test,
+                                parameters, path_param, path_values, **kwargs)
+            for train, test in splits]
+
+
+def _fast_loo_and_score(estimator, X, y, scorer, parameters, train_scoring):
+    """Leave-one-out cross-validation from a single fit, with the closed-form
+    function registered for the estimator. Returns None if the function
+    doesn't support the estimator or the data."""
+    estimator = clone(estimator)
+    if parameters is not None:
+        estimator.set_params(**parameters)
+
+    n_samples = num_samples(X)
+    start_time = time.time()
+    predictions = get_fast_loo(estimator)(estimator, X, y)
+    if predictions is None:
+        return None
+    fit_time = time.time() - start_time
+
+    test_scores = []
+    held_out = loo_estimator(estimator, predictions)
+    for i in range(n_samples):
+        held_out.loo_index = i
+        test_scores.append(_score(held_out, X[i:i + 1], y[i:i + 1], scorer))
+    test_score_time = time.time() - start_time - fit_time
+
+    train_score = None
+    if train_scoring != 'skip':
+        estimator.fit(X, y)
+        train_score = _score(estimator, X, y, scorer)
+    train_score_time = time.time() - start_time - fit_time - test_score_time
+
+    # the time is spread evenly over the folds
+    return [(test_score, 1, train_score, n_samples - 1, fit_time / n_samples,
+             test_score_time / n_samples, train_score_time / n_samples)
+            for test_score in test_scores]
+
+
 def _fit_and_score(estimator, X, y, scorer, train, test, verbose, parameters,
-                   fit_params=None):
+                   fit_params=None, train_scoring='full', train_fraction=0.1):
     if verbose > 1:
         if parameters is None:
             msg = "no parameters to be set"
@@ -103,14 +379,7 @@ def _fit_and_score(estimator, X, y, scorer, train, test, verbose, parameters,
                           for k, v in parameters.items()))
         print("[CV] %s %s" % (msg, (64 - len(msg)) * '.'))
 
-    if num_samples(train) == 0 or num_samples(test) == 0:
-        raise RuntimeError(
-            'Cross validation error in fit_estimator. The total data set '
-            'contains %d elements, which were split into a training set '
-            'of %d elements and a test set of %d elements. Unfortunately, '
-            'you can\'t have a %s set with 0 elements.' % (
-                num_samples(X), num_samples(train), num_samples(test),
-                'training' if num_samples(train) == 0 else 'test'))
+    _check_fold(X, train, test)
 
     # adjust length of sample weights
     n_samples = num_samples(X)
@@ -125,20 +394,20 @@ def _fit_and_score(estimator, X, y, scorer, train, test, verbose, parameters,
     # fit and score
     start_time = time.time()
 
-    X_train, y_train = _safe_split(estimator, X, y, train)
-    X_test, y_test = _safe_split(estimator, X, y, test, train)
+    X_train, y_train = _split(estimator, X, y, train)
+    X_test, y_test = _split(estimator, X, y, test, train)
     if y_train is None:
-        estimator.fit(X_train, **fit_params)
+        estimator.fit(_as_input(X_train), **fit_params)
     else:
-        estimator.fit(X_train, y_train, **fit_params)
-    test_score = _score(estimator, X_test, y_test, scorer)
-    train_score = _score(estimator, X_train, y_train, scorer)
+        estimator.fit(_as_input(X_train), _as_input(y_train), **fit_params)
+    fit_time = time.time() - start_time
 
+    (test_score, n_samples_test, train_score, n_samples_train,
+     test_score_time, train_score_time) = _score_fold(
+        estimator, X, y, scorer, train, X_train, y_train, X_test, y_test,
+        train_scoring, train_fraction)
     scoring_time = time.time() - start_time
 
-    msmbuilder_api = is_msmbuilder_estimator(estimator)
-    n_samples_test = num_samples(X_test, is_nested=msmbuilder_api)
-    n_samples_train = num_samples(X_train, is_nested=msmbuilder_api)
     if verbose > 2:
         msg += ", score=%f" % test_score
     if verbose > 1:
@@ -146,4 +415,89 @@ def _fit_and_score(estimator, X, y, scorer, train, test, verbose, parameters,
         print("[CV] %s %s" % ((64 - len(end_msg)) * '.', end_msg))
 
     return (test_score, n_samples_test, train_score, n_samples_train,
-            scoring_time)
+            fit_time, test_score_time, train_score_time)
+
+
+def _fit_and_score_path(estimator, X, y, scorer, train, test, parameters,
+                        path_param, path_values, train_scoring='full',
+                        train_fraction=0.1):
+    """Fit a fold for all the values of `path_param` with `fit_path`, and
+    score each of them. The fit time is spread evenly over the values."""
+    _check_fold(X, train, test)
+    estimator = clone(estimator)
+    if parameters is not None:
+        estimator.set_params(**parameters)
+
+    start_time = time.time()
+    X_train, y_train = _split(estimator, X, y, train)
+    X_test, y_test = _split(estimator, X, y, test, train)
+    fitted = fit_path(estimator, path_param, path_values, _as_input(X_train),
+                      _as_input(y_train))
+    fit_time = (time.time() - start_time) / len(path_values)
+
+    out = []
+    for est in fitted:
+        (test_score, n_samples_test, train_score, n_samples_train,
+         test_score_time, train_score_time) = _score_fold(
+            est, X, y, scorer, train, X_train, y_train, X_test, y_test,
+            train_scoring, train_fraction)
+        out.append((test_score, n_samples_test, train_score, n_samples_train,
+                    fit_time, test_score_time, train_score_time))
+    return out
+
+
+def _check_fold(X, train, test):
+    if num_samples(train) == 0 or num_samples(test) == 0:
+        raise RuntimeError(
+            'Cross validation error in fit_estimator. The total data set '
+            'contains %d elements, which were split into a training set '
+            'of %d elements and a test set of %d elements. Unfortunately, '
+            'you can\'t have a %s set with 0 elements.' % (
+                num_samples(X), num_samples(train), num_samples(test),
+                'training' if num_samples(train) == 0 else 'test'))
+
+
+def _score_fold(estimator, X, y, scorer, train, X_train, y_train, X_test,
+                y_test, train_scoring, train_fraction):
+    """Score an estimator fit on a fold, on its test set and (depending on
+    `train_scoring`) its training set"""
+    start_time = time.time()
+    test_score = _score(estimator, _as_input(X_test), _as_input(y_test),
+                        scorer)
+    test_score_time = time.time() - start_time
+
+    if train_scoring == 'skip':
+        train_score = None
+    elif train_scoring == 'subsample':
+        # use a fixed seed, so that the same subset of each fold is scored
+        # in every trial
+        n_subsample = max(1, int(round(train_fraction * num_samples(train))))
+        subsample = np.sort(np.random.RandomState(0).choice(
+            train, n_subsample, replace=False))
+        X_sub, y_sub = _split(estimator, X, y, subsample, train)
+        train_score = _score(estimator, _as_input(X_sub), _as_input(y_sub),
+                             scorer)
+    else:
+        train_score = _score(estimator, _as_input(X_train),
+                             _as_input(y_train), scorer)
+    train_score_time = time.time() - start_time - test_score_time
+
+    msmbuilder_api = is_msmbuilder_estimator(estimator)
+    n_samples_test = num_samples(X_test, is_nested=msmbuilder_api)
+    n_samples_train = num_samples(X_train, is_nested=msmbuilder_api)
+    return (test_score, n_samples_test, train_score, n_samples_train,
+            test_score_time, train_score_time)
+
+
+def _as_input(data):
+    # the estimators get lists rather than views (see FoldView)
+    if isinstance(data, FoldView):
+        return data.tolist()
+    return data
+
+
+def _split(estimator, X, y, indices, train_indices=None):
+    """Like sklearn's _safe_split, but returns views of FoldView datasets"""
+    if isinstance(X, FoldView):
+        return X[indices], None if y is None else y[indices]
+    return _safe_split(estimator, X, y, indices, train_indices)
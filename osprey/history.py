@@ -0,0 +1,222 @@
+from __future__ import print_function, absolute_import, division
+"""history.py
+
+This module contains the in-memory representation of the history of past
+trials that is handed to the search strategies. Instead of a list of
+`(params, scores, status)` tuples, the history is stored column-wise in numpy
+arrays, with the parameters already mapped onto the unit cube used by the
+gaussian process (see `SearchSpace.point_to_gp`). The arrays are built once
+from the trials database and then appended to incrementally as new trials
+show up, so the strategies don't need to rebuild them on every suggestion.
+"""
+
+import numpy as np
+
+__all__ = ['History', 'STATUS_CODES']
+
+STATUS_CODES = {'PENDING': 0, 'SUCCEEDED': 1, 'FAILED': 2, 'EXCEEDED': 3}
+_STATUS_NAMES = dict((v, k) for k, v in STATUS_CODES.items())
+
+
+class History(object):
+    """Columnar history of past function evaluations.
+
+    Parameters
+    ----------
+    searchspace : SearchSpace
+        The search space the parameters are drawn from. It defines the
+        columns of the unit-cube parameter matrix, `X`.
+    capacity : int, optional
+        Initial number of rows to allocate. The arrays grow geometrically
+        when they fill up.
+
+    Attributes
+    ----------
+    X : array, shape=(n_trials, n_dims)
+        The parameters of each trial, mapped onto the unit cube. Rows of
+        parameters that can't be represented in the search space (e.g. an
+        enum value which has since been removed) are NaN.
+    mean : array, shape=(n_trials,)
+        Mean of the test scores of each trial (NaN if not available).
+    var : array, shape=(n_trials,)
+        Variance of the test scores of each trial (NaN if not available).
+    status : array, shape=(n_trials,)
+        Status of each trial, encoded with `STATUS_CODES`.
+    ids : array, shape=(n_trials,)
+        Database id of each trial (-1 if not known).
+    elapsed : array, shape=(n_trials,)
+        Wall-clock time taken by each trial, in seconds (NaN if not known,
+        e.g. for pending trials).
+    params : list of dict
+        The raw parameter dict of each trial.
+    scores : list
+        The raw test scores of each trial.
+    missing_ids : set of int
+        Database ids below `max_id` which weren't found when the history was
+        read (see `osprey.execute_worker.update_history`), e.g. trials that
+        another worker had not committed yet.
+    """
+
+    def __init__(self, searchspace, capacity=16):
+        self.searchspace = searchspace
+        self.n_dims = searchspace.n_dims
+        self.params = []
+        self.scores = []
+        self._n = 0
+        self._index = {}
+        self.missing_ids = set()
+        self._allocate(max(int(capacity), 1))
+
+    @classmethod
+    def from_list(cls, history, searchspace):
+        """Build a History from a list of `(params, scores, status)` tuples.
+
+        If `history` is already a History, it is returned unchanged.
+        """
+        if isinstance(history, cls):
+            return history
+        out = cls(searchspace, capacity=len(history))
+        for params, scores, status in history:
+            out.append(params, scores, status)
+        return out
+
+    def _allocate(self, capacity):
+        self._X = np.empty((capacity, self.n_dims))
+        self._mean = np.empty(capacity)
+        self._var = np.empty(capacity)
+        self._status = np.empty(capacity, dtype=np.int8)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._elapsed = np.empty(capacity)
+
+    def _grow(self):
+        old = (self._X, self._mean, self._var, self._status, self._ids,
+               self._elapsed)
+        self._allocate(2 * len(self._mean))
+        for src, dst in zip(old, (self._X, self._mean, self._var,
+                                  self._status, self._ids, self._elapsed)):
+            dst[:self._n] = src[:self._n]
+
+    def _set_row(self, i, params, scores, status, elapsed):
+        if status not in STATUS_CODES:
+            raise RuntimeError('unrecognized status: %s' % status)
+        try:
+            self._X[i] = self.searchspace.point_to_gp(params)
+        except (KeyError, ValueError, TypeError):
+            self._X[i] = np.nan
+        if scores is None or status != 'SUCCEEDED':
+            self._mean[i] = self._var[i] = np.nan
+        else:
+            self._mean[i] = np.mean(scores)
+            self._var[i] = np.var(scores)
+        self._status[i] = STATUS_CODES[status]
+        self._elapsed[i] = np.nan if elapsed is None else elapsed
+        self.params[i] = params
+        self.scores[i] = scores
+
+    def append(self, params, scores, status, trial_id=None, elapsed=None):
+        """Add a trial to the history.
+
+        `elapsed` is the wall-clock time the trial took, in seconds.
+
+        If `trial_id` is already present (e.g. a trial that was PENDING the
+        last time the database was read, and has since completed), that
+        row is updated in place instead.
+        """
+        if trial_id is not None and trial_id in self._index:
+            self._set_row(self._index[trial_id], params, scores, status,
+                          elapsed)
+            return
+
+        if self._n == len(self._mean):
+            self._grow()
+        i = self._n
+        self.params.append(None)
+        self.scores.append(None)
+        self._set_row(i, params, scores, status, elapsed)
+        self._ids[i] = -1 if trial_id is None else trial_id
+        if trial_id is not None:
+            self._index[trial_id] = i
+        self._n += 1
+
+    def update_from_trials(self, trials):
+        """Append (or update) rows from an iterable of `Trial` objects."""
+        for t in trials:
+            elapsed = None
+            if t.elapsed is not None:
+                elapsed = t.elapsed.total_seconds()
+            self.append(t.parameters, t.test_scores, t.status, trial_id=t.id,
+                        elapsed=elapsed)
+
+    @property
+    def X(self):
+        return self._X[:self._n]
+
+    @property
+    def mean(self):
+        return self._mean[:self._n]
+
+    @property
+    def var(self):
+        return self._var[:self._n]
+
+    @property
+    def status(self):
+        return self._status[:self._n]
+
+    @property
+    def ids(self):
+        return self._ids[:self._n]
+
+    @property
+    def elapsed(self):
+        return self._elapsed[:self._n]
+
+    @property
+    def max_id(self):
+        """Largest database id in the history (-1 if empty)"""
+        if self._n == 0:
+            return -1
+        return int(self.ids.max())
+
+    @property
+    def pending_ids(self):
+        """Database ids of the trials that are still PENDING"""
+        mask = (self.status == STATUS_CODES['PENDING']) & (self.ids >= 0)
+        return [int(i) for i in self.ids[mask]]
+
+    def has_trial(self, trial_id):
+        """Is the trial with database id `trial_id` in the history?"""
+        return trial_id in self._index
+
+    def mask(self, status):
+        """Boolean mask selecting the trials with a given status"""
+        return self.status == STATUS_CODES[status]
+
+    def worst_mean(self):
+        """The worst mean test score of the successful trials (NaN if there
+        are none). The strategies use it as the score of the trials which
+        EXCEEDED their time or memory limit, to steer away from them."""
+        mean = self.mean[self.mask('SUCCEEDED') & np.isfinite(self.mean)]
+        if len(mean) == 0:
+            return np.nan
+        return float(mean.min())
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError('history index out of range')
+        return [self.params[i], self.scores[i],
+                _STATUS_NAMES[int(self._status[i])]]
+
+    def __iter__(self):
+        # iterating over the history yields the same [params, scores, status]
+        # records as the old list-based format, for third party strategies
+        for i in range(self._n):
+            yield self[i]
+
+    def __repr__(self):
+        return '<History: %d trials, %d dims>' % (self._n, self.n_dims)
@@ -0,0 +1,153 @@
+from __future__ import print_function, absolute_import, division
+"""limits.py
+
+Wall-clock time and memory limits for the trials.
+
+A trial with limits is fit in a child process, which the worker supervises:
+if the child runs for too long, or its resident memory (including that of
+its own child processes, e.g. the joblib workers, when psutil is installed)
+grows too large, it is killed, and the trial is recorded with the EXCEEDED
+status instead of hanging the worker or getting the node OOM-killed.
+"""
+
+import os
+import sys
+import time
+import signal
+import traceback
+import multiprocessing
+
+__all__ = ['TrialLimitExceeded', 'run_with_limits']
+
+# seconds between two checks of the child process
+POLL_INTERVAL = 0.1
+
+
+class TrialLimitExceeded(Exception):
+    """A trial went over its time or memory limit"""
+
+
+def run_with_limits(func, args=(), kwargs=None, max_time=None,
+                    max_memory=None, poll_interval=POLL_INTERVAL):
+    """Call `func(*args, **kwargs)` in a child process, and return its result.
+
+    Parameters
+    ----------
+    func : callable
+        The function, and its arguments and result, must be picklable on
+        platforms which don't fork.
+    max_time : float, optional
+        Wall-clock time limit, in seconds.
+    max_memory : float, optional
+        Resident memory limit, in megabytes.
+
+    Without limits, `func` is simply called in this process.
+
+    Raises
+    ------
+    TrialLimitExceeded
+        If the child went over a limit, and was killed.
+    RuntimeError
+        If `func` raised an exception (whose traceback is the message), or
+        the child died without returning.
+    """
+    kwargs = kwargs or {}
+    if max_time is None and max_memory is None:
+        return func(*args, **kwargs)
+    if max_memory is not None and _rss(os.getpid()) is None:
+        raise RuntimeError('memory limits require the psutil package, or a '
+                           '/proc filesystem')
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_child,
+                                      args=(sender, func, args, kwargs))
+    process.start()
+    sender.close()
+    start = time.time()
+    try:
+        while not receiver.poll(poll_interval):
+            if not process.is_alive():
+                raise RuntimeError('the trial process exited unexpectedly '
+                                   'with code %s' % process.exitcode)
+            elapsed = time.time() - start
+            if max_time is not None and elapsed > max_time:
+                raise TrialLimitExceeded(
+                    'time limit exceeded: the trial ran for more than %g s'
+                    % max_time)
+            rss = _rss(process.pid)
+            if max_memory is not None and rss is not None and \
+                    rss > max_memory * 2 ** 20:
+                raise TrialLimitExceeded(
+                    'memory limit exceeded: the trial used %.0f MB, more '
+                    'than %g MB' % (rss / 2 ** 20, max_memory))
+        ok, value = receiver.recv()
+    finally:
+        receiver.close()
+        _kill(process)
+
+    if not ok:
+        raise RuntimeError(value)
+    return value
+
+
+def _child(sender, func, args, kwargs):
+    # the worker's SIGTERM handler prints the worker's footer and exits
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        result = (True, func(*args, **kwargs))
+    except Exception:
+        result = (False, traceback.format_exc())
+    sender.send(result)
+    sender.close()
+    # skip the cleanup of the state inherited from the worker
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def _rss(pid):
+    """Resident memory of a process and its children, in bytes (None if it
+    can't be measured)"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return 0
+        total = 0
+        for p in processes:
+            try:
+                total += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    # without psutil, only the process itself (Linux)
+    try:
+        with open('/proc/%d/statm' % pid) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+
+
+def _kill(process):
+    if process.is_alive():
+        try:
+            import psutil
+            children = psutil.Process(process.pid).children(recursive=True)
+        except Exception:
+            children = []
+        process.terminate()
+        process.join(5)
+        for child in children:
+            try:
+                child.kill()
+            except Exception:
+                pass
+        if process.is_alive() and hasattr(os, 'kill'):
+            os.kill(process.pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+    process.join()
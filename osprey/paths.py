@@ -0,0 +1,176 @@
+from __future__ import print_function, absolute_import, division
+"""paths.py
+
+Evaluation of many values of one hyperparameter from a single fit.
+
+Some estimators can be fit for a whole sequence of values of a parameter
+about as fast as for the most expensive one of them: linear models with a
+regularization path solver (e.g. `lasso_path` for the `alpha` of a Lasso),
+or ensembles whose first `n` members are exactly the ensemble fit with
+`n_estimators=n` (boosting stages, the trees of a forest). Such estimators
+register a function with `register_path`, which `fit_path` uses instead of
+fitting the estimator once per value.
+"""
+
+import copy
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.ensemble import (GradientBoostingClassifier,
+                              GradientBoostingRegressor,
+                              RandomForestClassifier, RandomForestRegressor,
+                              ExtraTreesClassifier, ExtraTreesRegressor)
+from sklearn.linear_model import Lasso, ElasticNet, enet_path
+
+from .search_space import IntVariable, FloatVariable
+
+__all__ = ['register_path', 'get_path', 'fit_path', 'path_values']
+
+_PATHS = {}
+
+
+def register_path(estimator_class, param):
+    """Register a function fitting an estimator class for many values of one
+    of its parameters at once.
+
+    The function is called as `func(estimator, values, X, y)`, with an
+    unfitted estimator with its other parameters set, and returns a list of
+    fitted estimators, one for each of the values (in the same order), which
+    can be scored like estimators fit with `set_params(param=value)`. It
+    returns None if it doesn't support the estimator's parameters or the
+    data, in which case the estimator is fit once per value.
+
+    Only exact instances of `estimator_class` use the function, not
+    instances of its subclasses.
+    """
+    def decorator(func):
+        _PATHS[(estimator_class, param)] = func
+        return func
+    return decorator
+
+
+def get_path(estimator, param):
+    """The path function for an estimator's parameter, or None"""
+    return _PATHS.get((type(estimator), param))
+
+
+def fit_path(estimator, param, values, X, y=None):
+    """Fit `estimator` for each of the values of the parameter `param`.
+
+    Returns
+    -------
+    estimators : list
+        A fitted estimator for each value.
+    """
+    func = get_path(estimator, param)
+    fitted = None
+    if func is not None:
+        fitted = func(estimator, values, X, y)
+    if fitted is None:
+        fitted = []
+        for value in values:
+            est = clone(estimator).set_params(**{param: value})
+            if y is None:
+                est.fit(X)
+            else:
+                est.fit(X, y)
+            fitted.append(est)
+    return fitted
+
+
+def path_values(variable, n_values):
+    """`n_values` values spread over the range of a search space variable,
+    evenly in log space for log-warped variables. Integer variables may get
+    fewer values, without duplicates."""
+    if not isinstance(variable, (IntVariable, FloatVariable)):
+        raise ValueError('the path parameter %s must be an int or float '
+                         'variable' % variable.name)
+    if variable.warp == 'log':
+        values = np.geomspace(variable.min, variable.max, n_values)
+    else:
+        values = np.linspace(variable.min, variable.max, n_values)
+    if isinstance(variable, IntVariable):
+        return [int(v) for v in np.unique(np.round(values))]
+    return [float(v) for v in values]
+
+
+@register_path(Lasso, 'alpha')
+@register_path(ElasticNet, 'alpha')
+def _enet_alpha_path(estimator, values, X, y):
+    params = estimator.get_params()
+    if (params.get('normalize') or params.get('precompute') is True or
+            params.get('selection') != 'cyclic'):
+        return None
+    if sp.issparse(X) or not isinstance(X, np.ndarray) or X.ndim != 2:
+        return None
+    if y is None or np.ndim(y) != 1:
+        return None
+
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if params['fit_intercept']:
+        X_mean, y_mean = X.mean(axis=0), y.mean()
+    else:
+        X_mean, y_mean = np.zeros(X.shape[1]), 0.0
+
+    # the path solver goes from the largest alpha to the smallest, warm
+    # starting each solution from the previous one
+    order = np.argsort(values)[::-1]
+    alphas = np.asarray(values, dtype=float)[order]
+    _, coefs, _ = enet_path(
+        X - X_mean, y - y_mean, l1_ratio=params.get('l1_ratio', 1.0),
+        alphas=alphas, max_iter=params['max_iter'], tol=params['tol'],
+        positive=params['positive'])
+
+    fitted = [None] * len(values)
+    for k, i in enumerate(order):
+        est = clone(estimator).set_params(alpha=values[i])
+        est.coef_ = coefs[:, k]
+        est.intercept_ = y_mean - X_mean.dot(est.coef_)
+        est.n_features_in_ = X.shape[1]
+        fitted[i] = est
+    return fitted
+
+
+@register_path(GradientBoostingClassifier, 'n_estimators')
+@register_path(GradientBoostingRegressor, 'n_estimators')
+def _boosting_stages_path(estimator, values, X, y):
+    # with early stopping, the number of stages isn't n_estimators
+    if estimator.get_params().get('n_iter_no_change') is not None:
+        return None
+    estimator = clone(estimator).set_params(n_estimators=max(values))
+    estimator.fit(X, y)
+
+    # the model with n stages is the first n stages of the model with more
+    fitted = []
+    for n in values:
+        est = copy.copy(estimator)
+        est.n_estimators = n
+        est.estimators_ = estimator.estimators_[:n]
+        est.train_score_ = estimator.train_score_[:n]
+        if hasattr(estimator, 'n_estimators_'):
+            est.n_estimators_ = n
+        fitted.append(est)
+    return fitted
+
+
+@register_path(RandomForestClassifier, 'n_estimators')
+@register_path(RandomForestRegressor, 'n_estimators')
+@register_path(ExtraTreesClassifier, 'n_estimators')
+@register_path(ExtraTreesRegressor, 'n_estimators')
+def _forest_trees_path(estimator, values, X, y):
+    if estimator.get_params().get('oob_score'):
+        return None
+    estimator = clone(estimator).set_params(n_estimators=max(values))
+    estimator.fit(X, y)
+
+    # the random states of the trees are drawn in sequence, so the first n
+    # trees of a forest are the forest with n_estimators=n
+    fitted = []
+    for n in values:
+        est = copy.copy(estimator)
+        est.n_estimators = n
+        est.estimators_ = estimator.estimators_[:n]
+        fitted.append(est)
+    return fitted
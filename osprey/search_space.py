@@ -14,12 +14,18 @@ from collections import namedtuple, Iterable
 
 import numpy as np
 from sklearn.utils import check_random_state
-try:
-    from hyperopt import hp, pyll
-except ImportError:
-    from .utils import mock_module
-    hp = mock_module('hyperopt')
-    pyll = mock_module('hyperopt')
+
+
+def _import_hyperopt():
+    # hyperopt is optional, and only needed for `to_hyperopt()`, so it is
+    # only imported on first use.
+    try:
+        from hyperopt import hp, pyll
+    except ImportError:
+        from .utils import mock_module
+        hp = mock_module('hyperopt')
+        pyll = mock_module('hyperopt')
+    return hp, pyll
 
 
 class SearchSpace(object):
@@ -119,6 +125,13 @@ class SearchSpace(object):
     def __getitem__(self, name):
         return self.variables[name]
 
+    def without(self, name):
+        """A copy of the search space without the variable `name`"""
+        out = SearchSpace()
+        out.variables = dict((k, v) for k, v in self.variables.items()
+                             if k != name)
+        return out
+
     def __iter__(self):
         return iter(self.variables.values())
 
@@ -161,6 +174,7 @@ class IntVariable(namedtuple('IntVariable', ('name', 'min', 'max', 'warp'))):
         raise ValueError('unknown warp: %s' % self.warp)
 
     def to_hyperopt(self):
+        hp, pyll = _import_hyperopt()
         if self.warp is None:
             return pyll.scope.int(hp.uniform(self.name, self.min, self.max+1))
         raise ValueError('warped integers are not supported for hyperopt')
@@ -203,6 +217,7 @@ class FloatVariable(namedtuple('FloatVariable',
         raise ValueError('unknown warp: %s' % self.warp)
 
     def to_hyperopt(self):
+        hp, pyll = _import_hyperopt()
         if self.warp is None:
             return hp.uniform(self.name, self.min, self.max)
         elif self.warp == 'log':
@@ -245,6 +260,7 @@ class EnumVariable(namedtuple('EnumVariable', ('name', 'choices'))):
         return self.choices[random.randint(len(self.choices))]
 
     def to_hyperopt(self):
+        hp, pyll = _import_hyperopt()
         return hp.choice(self.name, self.choices)
 
     def domain_to_gp(self):
@@ -1,5 +1,4 @@
 from __future__ import print_function, absolute_import, division
-import sys
 import inspect
 import socket
 
@@ -7,34 +6,14 @@ import numpy as np
 from sklearn.utils import check_random_state
 from sklearn.model_selection import ParameterGrid
 import math
-try:
-    from hyperopt import (Trials, tpe, fmin, STATUS_OK, STATUS_RUNNING,
-                          STATUS_FAIL)
-except ImportError:
-    # hyperopt is optional, but required for hyperopt_tpe()
-    pass
-
-try:
-    from GPy import kern
-    from GPy.kern import RBF, Fixed, Bias
-    from GPy.util.linalg import tdot
-    from GPy.models import GPRegression
-    from scipy.optimize import minimize
-    from scipy.stats import norm
-    # If the GPy modules fail we won't do this unnecessarily.
-    from .entry_point import load_entry_point
-    KERNEL_BASE_CLASS = kern.src.kern.Kern
-except:
-    # GPy is optional, but required for gp
-    GPRegression = kern = minimize = None
-    pass
+
+# The optional backends (hyperopt for hyperopt_tpe(), GPy and scipy for gp,
+# and SALib for sobol) are only imported once a strategy which needs them is
+# used, so that importing this module stays cheap.
+from .entry_point import load_entry_point
 from .search_space import EnumVariable
+from .history import History, STATUS_CODES
 
-try:
-    from SALib.sample import sobol_sequence as ss
-except:
-    ss = None
-    pass
 
 DEFAULT_TIMEOUT = socket._GLOBAL_DEFAULT_TIMEOUT
 
@@ -46,10 +25,12 @@ class BaseStrategy(object):
         """
         Parameters
         ----------
-        history : list of 3-tuples
-            History of past function evaluations. Each element in history
-            should be a tuple `(params, score, status)`, where `params` is a
-            dict mapping parameter names to values
+        history : History or list of 3-tuples
+            History of past function evaluations. Either a `History`, or a
+            list where each element should be a tuple
+            `(params, score, status)`, where `params` is a dict mapping
+            parameter names to values. Use `History.from_list` to convert
+            the latter into the former.
         searchspace : SearchSpace
             Instance of search_space.SearchSpace
         random_state :i nteger or numpy.RandomState, optional
@@ -97,6 +78,7 @@ class SobolSearch(BaseStrategy):
         self.counter = 0
 
     def _set_sequence(self):
+        from SALib.sample import sobol_sequence as ss
         #TODO could get rid of first part of sequence
         self.sequence = ss.sample(self.length + self._SKIP, self.n_dims)
 
@@ -112,7 +94,9 @@ class SobolSearch(BaseStrategy):
         return out
 
     def suggest(self, history, searchspace):
-        if 'SALib' not in sys.modules:
+        try:
+            import SALib
+        except ImportError:
             raise ImportError('No module named SALib')
 
         if self.sequence is None:
@@ -173,24 +157,35 @@ class HyperoptTPE(BaseStrategy):
         # the code -- most of this comes from reverse engineering it, by
         # running fmin() on a simple function and then inspecting the form of
         # the resulting trials object.
-        if 'hyperopt' not in sys.modules:
+        try:
+            from hyperopt import (Trials, tpe, fmin, STATUS_OK,
+                                  STATUS_RUNNING, STATUS_FAIL)
+        except ImportError:
             raise ImportError('No module named hyperopt')
 
         random = check_random_state(self.seed)
         hp_searchspace = searchspace.to_hyperopt()
 
+        history = History.from_list(history, searchspace)
+        status_codes = history.status
+        losses = -history.mean
+        # trials which went over their time or memory limit count as the
+        # worst of the successful ones
+        exceeded_loss = -history.worst_mean()
+
         trials = Trials()
-        for i, (params, scores, status) in enumerate(history):
-            if status == 'SUCCEEDED':
+        for i, params in enumerate(history.params):
+            if status_codes[i] == STATUS_CODES['SUCCEEDED']:
                 # we're doing maximization, hyperopt.fmin() does minimization,
                 # so we need to swap the sign
-                result = {'loss': -np.mean(scores), 'status': STATUS_OK}
-            elif status == 'PENDING':
+                result = {'loss': losses[i], 'status': STATUS_OK}
+            elif (status_codes[i] == STATUS_CODES['EXCEEDED'] and
+                    np.isfinite(exceeded_loss)):
+                result = {'loss': exceeded_loss, 'status': STATUS_OK}
+            elif status_codes[i] == STATUS_CODES['PENDING']:
                 result = {'status': STATUS_RUNNING}
-            elif status == 'FAILED':
-                result = {'status': STATUS_FAIL}
             else:
-                raise RuntimeError('unrecognized status: %s' % status)
+                result = {'status': STATUS_FAIL}
 
             # the vals key in the trials dict is basically just the params
             # dict, but enum variables (hyperopt hp.choice() nodes) are
@@ -248,6 +243,7 @@ class HyperoptTPE(BaseStrategy):
 
     @staticmethod
     def _hyperopt_fmin_random_kwarg(random):
+        from hyperopt import fmin
         if 'rstate' in inspect.getargspec(fmin).args:
             # 0.0.3-dev version uses this argument
             kwargs = {'rstate': random, 'allow_trials_fmin': False}
@@ -257,21 +253,62 @@ class HyperoptTPE(BaseStrategy):
         return kwargs
 
 
+def _history_random_state(seed, history):
+    # a seeded strategy draws different points for each trial, but the same
+    # ones for the same history: the state is seeded with the seed and the
+    # length of the history, rather than with the seed alone
+    if seed is None:
+        return check_random_state(None)
+    return np.random.RandomState([int(seed), len(history)])
+
+
+def _scored_points(history, rows=None):
+    # the points and mean scores of the successful trials (of a boolean mask
+    # of the rows), for the model based strategies. Failed trials and points
+    # which can't be mapped into the search space are ignored, and trials
+    # which went over their limits count as the worst successful trial
+    valid = np.isfinite(history.X).all(axis=1)
+    if rows is not None:
+        valid &= rows
+    succeeded = valid & history.mask('SUCCEEDED')
+    exceeded = valid & history.mask('EXCEEDED')
+    X, Y = history.X[succeeded], history.mean[succeeded]
+    if exceeded.any() and succeeded.any():
+        X = np.vstack([X, history.X[exceeded]])
+        Y = np.concatenate([Y, np.repeat(history.worst_mean(),
+                                         exceeded.sum())])
+    return X, Y
+
+
+def _optimize_restart(model, x):
+    # one restart of GP._optimize_restarts: the negative log likelihood and
+    # the parameters of the model optimized from x
+    model = model.copy()
+    model.optimizer_array = x
+    try:
+        model.optimize()
+    except np.linalg.linalg.LinAlgError:
+        return np.inf, None
+    return float(model.objective_function()), model.optimizer_array.copy()
+
+
 class GP(BaseStrategy):
     short_name = 'gp'
 
     def __init__(self, kernels=None, acquisition=None, seed=None, seeds=1, n_iter=50, 
             n_init = 20, sobol_init=False, optimize_best=False, max_iter=1E5,
-            predict_from_gp=True):
+            predict_from_gp=True, n_jobs=1):
         self.seed = seed
         self.seeds = seeds
         self.max_iter = int(max_iter)
         self.n_iter = int(n_iter)
         self.n_init = int(n_init)
+        self.n_jobs = int(n_jobs)
         self.sobol_init = bool(sobol_init)
         self.optimize_best = bool(optimize_best)
         self.predict_from_gp = bool(predict_from_gp)
         self.model = None
+        self.cost_model = None
         self.n_dims = None
         self.kernel = None
         self.x_best = None
@@ -297,6 +334,9 @@ class GP(BaseStrategy):
                 raise RuntimeError(
                     'strategy/params/kernels must contain keys: "name", "options", "params"')
 
+        from GPy import kern as gpy_kern
+        KERNEL_BASE_CLASS = gpy_kern.src.kern.Kern
+
         # Turn into entry points.
         # TODO use eval to allow user to specify internal variables for kernels (e.g. V) in config file.
         kernels = []
@@ -318,6 +358,7 @@ class GP(BaseStrategy):
         self.kernel = np.sum(kernels)
 
     def _fit_model(self, X, Y):
+        from GPy.models import GPRegression
         if max(Y) < 0:
             self.transformed = True
         else:
@@ -328,11 +369,51 @@ class GP(BaseStrategy):
         model = GPRegression(X, Y_trans, self.kernel)
         # Catch fitting error
         try:
-            model.optimize_restarts(num_restarts=self.n_init, verbose=False)
+            self._optimize_restarts(model)
             self.model = model
         except np.linalg.linalg.LinAlgError:
             self.model = None
 
+    def _optimize_restarts(self, model):
+        # Like model.optimize_restarts(num_restarts=self.n_init), with the
+        # restarts run over n_jobs processes. The starting points are drawn
+        # here, in order, and the first of the best restarts is kept, so the
+        # result doesn't depend on n_jobs.
+        from sklearn.externals.joblib import Parallel, delayed
+        random = check_random_state(self.seed)
+        starts = [model.optimizer_array.copy()]
+        for _ in range(self.n_init - 1):
+            model.randomize(rand_gen=random.normal)
+            starts.append(model.optimizer_array.copy())
+
+        runs = Parallel(n_jobs=self.n_jobs)(
+            delayed(_optimize_restart)(model, x) for x in starts)
+        f_opts = np.array([f_opt for f_opt, _ in runs])
+        f_opts[~np.isfinite(f_opts)] = np.inf
+        if not np.isfinite(f_opts).any():
+            raise np.linalg.linalg.LinAlgError('all the restarts failed')
+        model.optimizer_array = runs[int(np.argmin(f_opts))][1]
+        return model
+
+    def _fit_cost_model(self, X, log_elapsed):
+        # a second GP, on the log of the time taken by the trials, for the
+        # 'eips' acquisition function
+        from GPy.models import GPRegression
+        self._create_kernel()
+        model = GPRegression(X, log_elapsed, self.kernel)
+        try:
+            self._optimize_restarts(model)
+            self.cost_model = model
+        except np.linalg.linalg.LinAlgError:
+            self.cost_model = None
+
+    def _update_cost_model(self, history, searchspace):
+        self.cost_model = None
+        X_cost, log_elapsed = self._get_cost_data(history, searchspace)
+        # without enough timings, eips is the same as ei
+        if len(log_elapsed) >= max(self.seeds, 2):
+            self._fit_cost_model(X_cost, log_elapsed)
+
     def _transform_score(self, Y):
         if self.transformed:
             return -np.log(-Y)
@@ -352,6 +433,7 @@ class GP(BaseStrategy):
         return np.random.random((self.n_iter, self.n_dims))
 
     def _get_sobol_points(self):
+        from SALib.sample import sobol_sequence as ss
         return ss.sample(self.n_iter + np.random.randint(1000), self.n_dims)[-self.n_iter:]
 
     def _is_var_positive(self, var):
@@ -369,11 +451,21 @@ class GP(BaseStrategy):
     #    return result
 
     def _ei(self, x, y_mean, y_var, kappa=0.01):
+        from scipy.stats import norm
         y_std = np.sqrt(y_var + self.y_best_var)
         z = (y_mean - self._transform_score(self.y_best) - kappa)/y_std
         result = y_std*(z*norm.cdf(z) + norm.pdf(z))
         return result
 
+    def _eips(self, x, y_mean, y_var, kappa=0.01):
+        # expected improvement per second: the expected improvement divided
+        # by the predicted time taken by the trial
+        ei = self._ei(x, y_mean, y_var, kappa=kappa)
+        if self.cost_model is None:
+            return ei
+        log_elapsed, _ = self.cost_model.predict(x)
+        return ei / np.exp(log_elapsed)
+
     def _ucb(self, x, y_mean, y_var, kappa=1.0):
         result = y_mean + kappa*np.sqrt(y_var + self.y_best_var)
         return result
@@ -382,6 +474,8 @@ class GP(BaseStrategy):
         return (y_mean+y_var).flatten()
 
     def get_gp_best(self):
+        from scipy.optimize import minimize
+
         # Objective function
         def z(x):
             X = x.reshape(-1, self.n_dims)
@@ -397,6 +491,8 @@ class GP(BaseStrategy):
         return res.x
 
     def _optimize_acquisition(self):
+        from scipy.optimize import minimize
+
         # Objective function
         def z(x):
             # TODO make spread of points around x and take mean value.
@@ -445,9 +541,10 @@ class GP(BaseStrategy):
         if sorted(self.acquisition_function.keys()) != ['name', 'params']:
             raise RuntimeError('strategy/params/acquisition must contain keys '
                                '"name" and "params"')
-        if self.acquisition_function['name'] not in ['ei', 'ucb', 'osprey']:
+        if self.acquisition_function['name'] not in ['ei', 'eips', 'ucb',
+                                                     'osprey']:
             raise RuntimeError('strategy/params/acquisition name must be one of '
-                               '"ei", "ucb", "osprey"')
+                               '"ei", "eips", "ucb", "osprey"')
 
         if 'params' in self.acquisition_function \
                 and 'kappa' in self.acquisition_function['params']:
@@ -462,32 +559,40 @@ class GP(BaseStrategy):
         self._acquisition_function = g
 
     def _get_data(self, history, searchspace):
-        X = []
-        Y = []
-        V = []
-        ignore = []
-        for param_dict, scores, status in history:
-            # transform points into the GP domain. This invloves bringing
-            # int and enum variables to floating point, etc.
-            if status == 'FAILED':
-                # not sure how to deal with these yet
-                continue
-
-            point = searchspace.point_to_gp(param_dict)
-            if status == 'SUCCEEDED':
-                X.append(point)
-                Y.append(np.mean(scores))
-                V.append(np.var(scores))
-
-            elif status == 'PENDING':
-                ignore.append(point)
-            else:
-                raise RuntimeError('unrecognized status: %s' % status)
-
-        return (np.array(X).reshape(-1, self.n_dims),
-                np.array(Y).reshape(-1, 1),
-                np.array(V).reshape(-1, 1),
-                np.array(ignore).reshape(-1, self.n_dims))
+        # the History already holds the points transformed into the GP
+        # domain, which involves bringing int and enum variables to floating
+        # point, etc. Failed trials are ignored (not sure how to deal with
+        # these yet), as are points which can't be mapped into the search
+        # space. Trials which went over their time or memory limit count as
+        # the worst of the successful ones, so that the model learns to
+        # avoid that region.
+        history = History.from_list(history, searchspace)
+        valid = np.isfinite(history.X).all(axis=1)
+        succeeded = valid & history.mask('SUCCEEDED')
+        pending = valid & history.mask('PENDING')
+        exceeded = valid & history.mask('EXCEEDED')
+
+        X, Y, V = history.X[succeeded], history.mean[succeeded], \
+            history.var[succeeded]
+        if exceeded.any() and succeeded.any():
+            n_exceeded = int(exceeded.sum())
+            X = np.vstack([X, history.X[exceeded]])
+            Y = np.concatenate([Y, np.repeat(history.worst_mean(),
+                                             n_exceeded)])
+            V = np.concatenate([V, np.zeros(n_exceeded)])
+
+        return (X.reshape(-1, self.n_dims), Y.reshape(-1, 1),
+                V.reshape(-1, 1), history.X[pending].reshape(-1, self.n_dims))
+
+    def _get_cost_data(self, history, searchspace):
+        # the time taken by the completed trials (including those which went
+        # over their limits, which are the most expensive), on a log scale
+        history = History.from_list(history, searchspace)
+        valid = np.isfinite(history.X).all(axis=1)
+        valid &= np.isfinite(history.elapsed) & (history.elapsed > 0)
+        valid &= history.mask('SUCCEEDED') | history.mask('EXCEEDED')
+        return (history.X[valid].reshape(-1, self.n_dims),
+                np.log(history.elapsed[valid]).reshape(-1, 1))
 
     def _from_gp(self, result, searchspace):
 
@@ -507,15 +612,20 @@ class GP(BaseStrategy):
         return False
 
     def suggest(self, history, searchspace, max_tries=5):
-        if not GPRegression:
+        try:
+            import GPy
+        except ImportError:
             raise ImportError('No module named GPy')
-        if not minimize:
+        try:
+            import scipy.optimize
+        except ImportError:
             raise ImportError('No module named SciPy')
 
         if len(history) < self.seeds:
             return RandomSearch().suggest(history, searchspace)
 
         self.n_dims = searchspace.n_dims
+        history = History.from_list(history, searchspace)
 
         X, Y, V, ignore = self._get_data(history, searchspace)
 
@@ -530,6 +640,10 @@ class GP(BaseStrategy):
         if self.model is None:
             return RandomSearch().suggest(history, searchspace)
 
+        self.cost_model = None
+        if self.acquisition_function['name'] == 'eips':
+            self._update_cost_model(history, searchspace)
+
         if self.optimize_best:
             x_best = self.get_gp_best()
             y_best, self.y_best_var = self.model.predict(x_best.reshape(-1, self.n_dims))
@@ -552,6 +666,368 @@ class GP(BaseStrategy):
         return self._from_gp(suggestion, searchspace)
 
 
+class TuRBO(BaseStrategy):
+    """Trust region Bayesian optimization (TuRBO-1) [1].
+
+    A local Gaussian process is fit to the trials in a hyper-rectangular
+    trust region around the best trial, and the next point is the maximum of
+    a Thompson sample of it over random candidates in the region. The region
+    doubles in size after `success_tolerance` consecutive improvements, and
+    halves after `failure_tolerance` consecutive trials without one. Once it
+    is smaller than `length_min`, the search restarts from `seeds` random
+    trials, with a new region. Unlike `GP`, which models the whole search
+    space, it keeps working in high dimensional spaces (50+ variables).
+
+    The trust region is rebuilt from the history on every suggestion, so
+    the workers don't need to share any state.
+
+    Parameters
+    ----------
+    seed : int, optional
+        The random seed.
+    seeds : int, optional
+        The number of random trials at the start of each trust region.
+        Defaults to twice the number of dimensions of the search space.
+    n_candidates : int, optional
+        The number of candidate points of the Thompson sample. Defaults to
+        100 times the number of dimensions, at most 1000.
+    length_init, length_min, length_max : float
+        The initial, minimum and maximum side length of the trust region, in
+        the unit hypercube of `SearchSpace.point_to_gp`.
+    success_tolerance : int
+    failure_tolerance : int, optional
+        Defaults to the number of dimensions, and at least 4.
+
+    References
+    ----------
+    .. [1] Eriksson et al., Scalable global optimization via local Bayesian
+       optimization, NeurIPS 2019.
+    """
+    short_name = 'turbo'
+
+    def __init__(self, seed=None, seeds=None, n_candidates=None,
+                 length_init=0.8, length_min=0.5 ** 7, length_max=1.6,
+                 success_tolerance=3, failure_tolerance=None):
+        self.seed = seed
+        self.seeds = seeds
+        self.n_candidates = n_candidates
+        self.length_init = float(length_init)
+        self.length_min = float(length_min)
+        self.length_max = float(length_max)
+        self.success_tolerance = int(success_tolerance)
+        self.failure_tolerance = failure_tolerance
+        if not 0 < self.length_min <= self.length_init <= self.length_max:
+            raise RuntimeError('strategy/params must have 0 < length_min <= '
+                               'length_init <= length_max')
+        self.length = None
+        self.center = None
+        self.bounds = None
+        self.model = None
+
+    def _tolerances(self, n_dims):
+        seeds = self.seeds
+        if seeds is None:
+            seeds = 2 * n_dims
+        failure_tolerance = self.failure_tolerance
+        if failure_tolerance is None:
+            failure_tolerance = max(4, n_dims)
+        return int(seeds), int(failure_tolerance)
+
+    def _trust_region(self, history):
+        """Replay the completed trials, in order, through the trust region
+        updates.
+
+        Returns
+        -------
+        start : int
+            The index in the history of the first trial of the current trust
+            region.
+        length : float
+            The current side length of the trust region.
+        """
+        seeds, failure_tolerance = self._tolerances(history.n_dims)
+        valid = np.isfinite(history.X).all(axis=1)
+        succeeded = valid & history.mask('SUCCEEDED')
+        pending = history.mask('PENDING')
+
+        start, length = 0, self.length_init
+        best, n_completed, n_success, n_failure = -np.inf, 0, 0, 0
+        for i in range(len(history)):
+            if pending[i]:
+                continue
+            n_completed += 1
+            y = history.mean[i] if succeeded[i] else -np.inf
+            # failed trials, and those over their limits, are failures
+            improved = y > best + 1e-3 * abs(best) if np.isfinite(best) \
+                else np.isfinite(y)
+            best = max(best, y)
+            if n_completed <= seeds:
+                continue
+
+            if improved:
+                n_success, n_failure = n_success + 1, 0
+            else:
+                n_success, n_failure = 0, n_failure + 1
+            if n_success == self.success_tolerance:
+                length, n_success = min(2 * length, self.length_max), 0
+            elif n_failure == failure_tolerance:
+                length, n_failure = length / 2, 0
+
+            if length < self.length_min:
+                # restart, forgetting the trials of the old region
+                start, length = i + 1, self.length_init
+                best, n_completed, n_success, n_failure = -np.inf, 0, 0, 0
+
+        return start, length
+
+    def _get_data(self, history, start):
+        # the trials of the current trust region
+        return _scored_points(history, np.arange(len(history)) >= start)
+
+    @staticmethod
+    def _optimize_kernel(obj_func, initial_theta, bounds):
+        # a few iterations are enough for a local model, and the full
+        # optimization of an ARD kernel is slow in many dimensions
+        import scipy.optimize
+        result = scipy.optimize.minimize(
+            obj_func, initial_theta, method='L-BFGS-B', jac=True,
+            bounds=bounds, options={'maxiter': 50})
+        return result.x, result.fun
+
+    def _thompson_sample(self, candidates, random):
+        # one joint sample of the model at the candidates (like
+        # model.sample_y, with a Cholesky rather than an SVD factorization)
+        mean, cov = self.model.predict(candidates, return_cov=True)
+        cov[np.diag_indices_from(cov)] += 1e-8 * max(np.mean(np.diag(cov)),
+                                                     1e-12)
+        try:
+            L = np.linalg.cholesky(cov)
+        except np.linalg.LinAlgError:
+            return mean + np.sqrt(np.clip(np.diag(cov), 0, None)) * \
+                random.randn(len(mean))
+        return mean + L.dot(random.randn(len(mean)))
+
+    def _fit_model(self, X, Y, random):
+        import warnings
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import (ConstantKernel, Matern,
+                                                      WhiteKernel)
+        n_dims = X.shape[1]
+        kernel = ConstantKernel(1.0, (0.05, 20.0)) * \
+            Matern(length_scale=np.full(n_dims, 0.5),
+                   length_scale_bounds=(0.005, 2.0), nu=2.5) + \
+            WhiteKernel(1e-3, (1e-6, 0.1))
+        model = GaussianProcessRegressor(kernel, normalize_y=True,
+                                         optimizer=self._optimize_kernel,
+                                         random_state=random)
+        with warnings.catch_warnings():
+            # the length scales often hit their bounds
+            warnings.simplefilter('ignore')
+            model.fit(X, Y)
+        return model
+
+    def _candidates(self, center, lengthscales, length, random):
+        n_dims = len(center)
+        n_candidates = self.n_candidates
+        if n_candidates is None:
+            n_candidates = min(100 * n_dims, 1000)
+
+        # the region is stretched along the dimensions the model is least
+        # sensitive to, keeping its volume length ** n_dims
+        weights = lengthscales / lengthscales.mean()
+        weights = weights / np.prod(np.power(weights, 1.0 / n_dims))
+        lower = np.clip(center - weights * length / 2, 0.0, 1.0)
+        upper = np.clip(center + weights * length / 2, 0.0, 1.0)
+        self.bounds = (lower, upper)
+
+        # in high dimensions, only perturb a few of the coordinates of the
+        # center (and at least one) in each candidate
+        perturb = random.rand(n_candidates, n_dims) <= min(20.0 / n_dims, 1.0)
+        empty = ~perturb.any(axis=1)
+        perturb[empty, random.randint(n_dims, size=empty.sum())] = True
+        candidates = np.tile(center, (n_candidates, 1))
+        uniform = lower + (upper - lower) * random.rand(n_candidates, n_dims)
+        candidates[perturb] = uniform[perturb]
+        return candidates
+
+    def suggest(self, history, searchspace):
+        random = _history_random_state(self.seed, history)
+        history = History.from_list(history, searchspace)
+        seeds, _ = self._tolerances(searchspace.n_dims)
+
+        start, self.length = self._trust_region(history)
+        X, Y = self._get_data(history, start)
+        if len(history) - start < seeds or len(Y) < 2:
+            return searchspace.rvs(random)
+
+        self.model = self._fit_model(X, Y, random)
+        self.center = X[np.argmax(Y)]
+        lengthscales = np.atleast_1d(
+            self.model.kernel_.k1.k2.length_scale).astype(float)
+        lengthscales = np.broadcast_to(lengthscales, self.center.shape)
+        candidates = self._candidates(self.center, lengthscales, self.length,
+                                      random)
+
+        sample = self._thompson_sample(candidates, random)
+        suggestion = candidates[np.argmax(sample)]
+        return searchspace.point_from_gp(suggestion)
+
+
+class ForestSearch(BaseStrategy):
+    """Sequential model-based optimization with a tree ensemble surrogate,
+    as in SMAC [1].
+
+    A random forest (or extra trees) regressor is fit to the scores of the
+    trials, and the next point is the candidate with the largest expected
+    improvement, with the mean and variance of the predictions of the
+    individual trees. The candidates are random points of the search space,
+    and neighbours of the best trials. Unlike `GP`, the trees split on the
+    choices of enum variables directly (one-hot encoded), and on the order of
+    int variables and jumps, and the fit time stays close to linear in the
+    number of trials.
+
+    Parameters
+    ----------
+    seed : int, optional
+        The random seed.
+    seeds : int
+        The number of random trials before the model is used.
+    estimator : {'random_forest', 'extra_trees'}
+    n_estimators : int
+        The number of trees.
+    min_samples_leaf : int
+    n_candidates : int
+        The number of random candidates.
+    n_local : int
+        The number of best trials whose neighbours are candidates.
+    n_neighbours : int
+        The number of neighbours of each of them, which differ from it in
+        one variable.
+
+    References
+    ----------
+    .. [1] Hutter et al., Sequential model-based optimization for general
+       algorithm configuration, LION 2011.
+    """
+    short_name = 'forest'
+
+    def __init__(self, seed=None, seeds=10, estimator='random_forest',
+                 n_estimators=50, min_samples_leaf=3, n_candidates=1000,
+                 n_local=10, n_neighbours=50):
+        if estimator not in ('random_forest', 'extra_trees'):
+            raise RuntimeError('strategy/params/estimator must be one of '
+                               '"random_forest", "extra_trees"')
+        self.seed = seed
+        self.seeds = int(seeds)
+        self.estimator = estimator
+        self.n_estimators = int(n_estimators)
+        self.min_samples_leaf = int(min_samples_leaf)
+        self.n_candidates = int(n_candidates)
+        self.n_local = int(n_local)
+        self.n_neighbours = int(n_neighbours)
+        self.model = None
+
+    @staticmethod
+    def _is_categorical(var):
+        # enums of numbers (e.g. jumps) are ordered, like ints
+        return isinstance(var, EnumVariable) and len(var.choices) > 2 and \
+            not all(isinstance(c, (int, float)) and not isinstance(c, bool)
+                    for c in var.choices)
+
+    def _encode(self, X, searchspace):
+        # the points of the GP domain (in which enums are their index), with
+        # the unordered enums one-hot encoded
+        columns = []
+        for j, var in enumerate(searchspace):
+            if self._is_categorical(var):
+                index = np.round(X[:, j] * (len(var.choices) - 1)).astype(int)
+                columns.append(
+                    (index[:, np.newaxis] ==
+                     np.arange(len(var.choices))).astype(float))
+            else:
+                columns.append(X[:, j:j + 1])
+        return np.hstack(columns)
+
+    def _fit_model(self, X, Y, random):
+        from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+        cls = {'random_forest': RandomForestRegressor,
+               'extra_trees': ExtraTreesRegressor}[self.estimator]
+        model = cls(n_estimators=self.n_estimators,
+                    min_samples_leaf=self.min_samples_leaf,
+                    max_features=5. / 6, bootstrap=True,
+                    random_state=random)
+        return model.fit(X, Y)
+
+    def _predict(self, X):
+        # the mean and variance of the predictions of the trees
+        predictions = np.array([tree.predict(X)
+                                for tree in self.model.estimators_])
+        return predictions.mean(axis=0), predictions.var(axis=0)
+
+    def _neighbour(self, params, searchspace, random):
+        # the stored params of a trial may hold other estimator params too
+        out = dict((var.name, params[var.name]) for var in searchspace)
+        var = list(searchspace)[random.randint(searchspace.n_dims)]
+        if isinstance(var, EnumVariable):
+            if len(var.choices) < 2:
+                return out
+            index = var.choices.index(params[var.name])
+            if self._is_categorical(var):
+                # any other choice
+                index = (index + random.randint(1, len(var.choices))) % \
+                    len(var.choices)
+            else:
+                # the next or the previous choice
+                index = int(np.clip(index + random.choice([-1, 1]), 0,
+                                    len(var.choices) - 1))
+            out[var.name] = var.choices[index]
+        else:
+            x = var.point_to_gp(params[var.name]) + random.normal(0, 0.2)
+            out[var.name] = var.point_from_gp(float(np.clip(x, 0, 1)))
+        return out
+
+    def _candidates(self, history, searchspace, random):
+        candidates = [searchspace.rvs(random)
+                      for _ in range(self.n_candidates)]
+        succeeded = history.mask('SUCCEEDED') & \
+            np.isfinite(history.X).all(axis=1)
+        best = np.flatnonzero(succeeded)[
+            np.argsort(-history.mean[succeeded], kind='mergesort')]
+        for i in best[:self.n_local]:
+            candidates.extend(
+                self._neighbour(history.params[i], searchspace, random)
+                for _ in range(self.n_neighbours))
+        return candidates
+
+    def suggest(self, history, searchspace):
+        from scipy.stats import norm
+        random = _history_random_state(self.seed, history)
+        history = History.from_list(history, searchspace)
+        X, Y = _scored_points(history)
+        if len(Y) < max(self.seeds, 2):
+            return searchspace.rvs(random)
+
+        self.model = self._fit_model(self._encode(X, searchspace), Y, random)
+        candidates = self._candidates(history, searchspace, random)
+        X_candidates = np.array([searchspace.point_to_gp(c)
+                                 for c in candidates])
+        mean, var = self._predict(self._encode(X_candidates, searchspace))
+
+        # expected improvement over the best trial
+        std = np.sqrt(var) + 1e-12
+        z = (mean - Y.max()) / std
+        ei = (mean - Y.max()) * norm.cdf(z) + std * norm.pdf(z)
+
+        # the points already tried are compared in the GP domain, since the
+        # stored params of the trials hold other estimator params too
+        tried = ~history.mask('FAILED') & np.isfinite(history.X).all(axis=1)
+        tried = set(tuple(x) for x in np.round(history.X[tried], 9))
+        for i in np.argsort(-ei, kind='mergesort'):
+            if tuple(np.round(X_candidates[i], 9)) not in tried:
+                return candidates[i]
+        return searchspace.rvs(random)
+
+
 class GridSearch(BaseStrategy):
     short_name = 'grid'
 
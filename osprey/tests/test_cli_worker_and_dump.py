@@ -7,14 +7,29 @@ import shutil
 import subprocess
 import tempfile
 from distutils.spawn import find_executable
+from datetime import datetime
+import numpy as np
 from numpy.testing.decorators import skipif
 
+from osprey.trials import Trial, make_session
+from six.moves import cStringIO
+from osprey.execute_dump import dump_columnar, dump_text, filter_criteria
+from osprey.cli.parser_dump import parse_date
+from osprey.execute_currentbest import best_trials
+from osprey.execute_worker import best_score
+
 try:
     __import__('msmbuilder')
     HAVE_MSMBUILDER = True
 except:
     HAVE_MSMBUILDER = False
 
+try:
+    __import__('pyarrow')
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
 OSPREY_BIN = find_executable('osprey')
 
 
@@ -167,6 +182,170 @@ def _test_dump_1():
     json.loads(out)
 
 
+def _make_trials_db(dirname, n_trials=5):
+    session = make_session('sqlite:///%s' % os.path.join(dirname, 'trials.db'),
+                           project_name='default')
+    for i in range(n_trials):
+        session.add(Trial(
+            status='SUCCEEDED' if i < 3 else 'FAILED',
+            mean_test_score=float(i), test_scores=[float(i), float(i)],
+            n_test_samples=[10, 10],
+            started=datetime(2017, 1, i + 1),
+            parameters={'C': 10.0 ** i, 'n': i, 'kernel': 'rbf',
+                        'status': 'clashes with a column'}))
+    session.commit()
+    return session
+
+
+def test_dump_npz():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        filename = os.path.join(dirname, 'trials.npz')
+        assert dump_columnar(session, 'npz', filename, chunk_size=2) == 5
+
+        data = np.load(filename)
+        np.testing.assert_array_equal(data['id'], np.arange(1, 6))
+        np.testing.assert_array_equal(data['n'], np.arange(5))
+        assert data['n'].dtype == np.int64
+        assert data['C'].dtype == np.float64
+        assert list(data['kernel']) == ['rbf'] * 5
+        assert list(data['status']) == ['SUCCEEDED'] * 3 + ['FAILED'] * 2
+        assert 'param_status' in data.files
+        assert np.isnan(data['mean_train_score']).all()
+        assert json.loads(data['test_scores'][1]) == [1.0, 1.0]
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_dump_npz_param_prefix():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = make_session(
+            'sqlite:///%s' % os.path.join(dirname, 'trials.db'),
+            project_name='default')
+        # 'status' clashes with a column, and its prefixed name with
+        # another hyperparameter
+        session.add(Trial(status='SUCCEEDED', parameters={
+            'status': 'a', 'param_status': 'b', 'param_param_status': 'c'}))
+        session.commit()
+
+        filename = os.path.join(dirname, 'trials.npz')
+        assert dump_columnar(session, 'npz', filename) == 1
+        data = np.load(filename)
+        assert list(data['status']) == ['SUCCEEDED']
+        assert list(data['param_status']) == ['b']
+        assert list(data['param_param_status']) == ['c']
+        assert list(data['param_param_param_status']) == ['a']
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_dump_text():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        buf = cStringIO()
+        assert dump_text(session, 'json', buf, chunk_size=2) == 5
+        items = json.loads(buf.getvalue())
+        assert [item['n'] for item in items] == list(range(5))
+        assert items[3]['mean_test_score'] == 3.0
+        assert items[0]['started'] == '2017-01-01 00:00:00'
+
+        buf = cStringIO()
+        criteria = filter_criteria(status=['SUCCEEDED'],
+                                   since=datetime(2017, 1, 2))
+        assert dump_text(session, 'jsonl', buf, criteria=criteria) == 2
+        lines = buf.getvalue().splitlines()
+        assert [json.loads(l)['n'] for l in lines] == [1, 2]
+
+        buf = cStringIO()
+        criteria = filter_criteria(project='another project')
+        assert dump_text(session, 'json', buf, criteria=criteria) == 0
+        assert json.loads(buf.getvalue()) == []
+
+        buf = cStringIO()
+        dump_text(session, 'csv', buf)
+        header, first = buf.getvalue().splitlines()[:2]
+        assert header.startswith('id,project_name,status,')
+        assert '[0.0, 0.0]' in first
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_dump_until_date():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        session.add(Trial(status='SUCCEEDED', project_name='default',
+                          started=datetime(2017, 1, 2, 15, 30),
+                          parameters={'n': 5}))
+        session.commit()
+
+        # a date-only --until includes the whole day
+        until = parse_date('2017-01-02')
+        buf = cStringIO()
+        criteria = filter_criteria(until=until)
+        assert dump_text(session, 'jsonl', buf, criteria=criteria) == 3
+        lines = buf.getvalue().splitlines()
+        assert [json.loads(l)['n'] for l in lines] == [0, 1, 5]
+
+        # a datetime --until is inclusive, to the second
+        buf = cStringIO()
+        criteria = filter_criteria(until=parse_date('2017-01-02T15:30:00'),
+                                   since=parse_date('2017-01-02'))
+        assert dump_text(session, 'jsonl', buf, criteria=criteria) == 2
+        buf = cStringIO()
+        criteria = filter_criteria(until=parse_date('2017-01-02 15:29:59'))
+        assert dump_text(session, 'jsonl', buf, criteria=criteria) == 2
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_best_trials():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        # the FAILED trials are ignored, whatever their score
+        assert [t.id for t in best_trials(session, 'default')] == [3]
+        assert [t.id for t in best_trials(session, 'default', k=5)] == [
+            3, 2, 1]
+        assert best_trials(session, 'another project') == []
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_best_score():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        session.add(Trial(project_name='another project', status='SUCCEEDED',
+                          mean_test_score=100.0))
+        session.commit()
+        assert best_score(session, 'default') == 4.0
+        assert best_score(session, 'another project') == 100.0
+        assert best_score(session, 'no trials') is None
+    finally:
+        shutil.rmtree(dirname)
+
+
+@skipif(not HAVE_PYARROW, 'this test requires pyarrow')
+def test_dump_parquet():
+    import pyarrow.parquet as pq
+    dirname = tempfile.mkdtemp()
+    try:
+        session = _make_trials_db(dirname)
+        filename = os.path.join(dirname, 'trials.parquet')
+        assert dump_columnar(session, 'parquet', filename, chunk_size=2) == 5
+
+        table = pq.read_table(filename)
+        assert table.num_rows == 5
+        assert table.column('C').to_pylist() == [10.0 ** i for i in range(5)]
+        assert table.column('mean_train_score').null_count == 5
+    finally:
+        shutil.rmtree(dirname)
+
+
 def _test_plot_1():
     _ = subprocess.check_output(
         [OSPREY_BIN, 'plot', 'config.yaml', '--no-browser'])
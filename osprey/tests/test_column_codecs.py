@@ -0,0 +1,87 @@
+from __future__ import print_function, absolute_import, division
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing.decorators import skipif
+
+from osprey.column_codecs import encode, decode, check_codec
+from osprey.trials import make_session, Trial
+
+try:
+    __import__('msgpack')
+    HAVE_MSGPACK = True
+except ImportError:
+    HAVE_MSGPACK = False
+
+VALUES = [[0.5, 1.5, float('inf')], [1, 2, 3], [1, 2.5], [], {'a': [1.0]},
+          'string', [True, False], None, 1.0]
+
+
+def _check_roundtrip(codec):
+    for value in VALUES:
+        assert decode(encode(value, codec)) == value
+
+
+def test_roundtrip():
+    for codec in ['json', 'numpy', 'numpy+zlib']:
+        yield _check_roundtrip, codec
+
+
+@skipif(not HAVE_MSGPACK, 'this test requires msgpack')
+def test_roundtrip_msgpack():
+    for codec in ['msgpack', 'msgpack+zlib']:
+        _check_roundtrip(codec)
+
+
+def test_numpy_codec():
+    scores = np.random.RandomState(0).rand(1000).tolist()
+    assert encode(scores, 'json').startswith('[')
+    assert encode(scores, 'numpy').startswith('~numpy:')
+    assert len(encode(scores, 'numpy')) < len(encode(scores, 'json')) / 1.5
+    ones = [1] * 1000
+    assert len(encode(ones, 'numpy+zlib')) < 100
+    # anything but a flat list of numbers is stored as JSON
+    assert encode([1, 2.5], 'numpy') == '[1, 2.5]'
+
+
+def test_check_codec():
+    for codec in ['zip', 'json+zlib', 'numpy+bz2']:
+        try:
+            check_codec(codec)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+
+def test_mixed_codecs():
+    # rows written with different codecs can all be read back
+    cwd = os.path.abspath(os.curdir)
+    dirname = tempfile.mkdtemp()
+    try:
+        os.chdir(dirname)
+        for codec in ['json', 'numpy+zlib']:
+            session = make_session('sqlite:///db', project_name='abc123',
+                                   codec=codec)
+            session.add(Trial(test_scores=[0.5, 0.25], n_test_samples=[1, 1],
+                              parameters={'C': 1.0}))
+            session.commit()
+            session.close()
+
+        raw = [row[0] for row in session.execute(
+            'SELECT test_scores FROM trials_v3 ORDER BY id')]
+        assert raw[0] == '[0.5, 0.25]'
+        assert raw[1].startswith('~numpy+zlib:')
+
+        trials = session.query(Trial).order_by(Trial.id).all()
+        for t in trials:
+            assert t.test_scores == [0.5, 0.25]
+            assert t.n_test_samples == [1, 1]
+            assert t.parameters == {'C': 1.0}
+        session.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(dirname)
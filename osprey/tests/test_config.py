@@ -156,6 +156,45 @@ def test_stratified_cv():
     assert cv.n_splits == 10
 
 
+def test_dataset_fingerprint():
+    X = np.arange(10)
+    config = Config.fromdict({}, check_fields=False)
+    assert config.dataset_fingerprint(X).startswith('sample-')
+    config = Config.fromdict({
+        'dataset_loader': {'fingerprint': 'none'}
+    }, check_fields=False)
+    assert config.dataset_fingerprint(X) is None
+
+
+def test_cv_cache_path():
+    config = Config.fromdict({
+        'cv': {'name': 'kfold', 'params': {'n_splits': 5}},
+        'trials': {'uri': 'sqlite:////tmp/osprey-trials.db'},
+    }, check_fields=False)
+    assert config.cv_cache_path('sample-sha1:0') is None
+
+    config.config['cv']['cache'] = True
+    path = config.cv_cache_path('sample-sha1:0')
+    assert os.path.dirname(path) == '/tmp'
+    assert config.cv_cache_path('sample-sha1:1') != path
+    config.config['cv']['params']['n_splits'] = 3
+    assert config.cv_cache_path('sample-sha1:0') != path
+
+
+def test_param_path():
+    config = Config.fromdict({
+        'search_space': {'alpha': {'min': 0.01, 'max': 1, 'warp': 'log',
+                                   'type': 'float'}},
+        'path': {'param': 'alpha', 'n_values': 3},
+    }, check_fields=False)
+    param, values = config.param_path(config.search_space())
+    assert param == 'alpha'
+    np.testing.assert_array_almost_equal(values, [0.01, 0.1, 1])
+
+    config = Config.fromdict({}, check_fields=False)
+    assert config.param_path(config.search_space()) is None
+
+
 def test_trial_results():
     assert OSPREY_BIN is not None
     cwd = os.path.abspath(os.curdir)
@@ -0,0 +1,68 @@
+from __future__ import print_function, absolute_import, division
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.model_selection import KFold, ShuffleSplit, LeaveOneOut
+
+from osprey.cross_validators import CachedSplits, cached_splits
+from osprey.fast_loo import is_leave_one_out
+
+
+def _assert_same_splits(cv, splits, X):
+    expected = list(cv.split(X))
+    got = list(splits.split(X))
+    assert len(expected) == len(got) == splits.get_n_splits()
+    for (train1, test1), (train2, test2) in zip(expected, got):
+        np.testing.assert_array_equal(train1, train2)
+        np.testing.assert_array_equal(test1, test2)
+
+
+def test_cached_splits():
+    X = np.arange(50)
+    for cv in [KFold(5), KFold(4, shuffle=True, random_state=0),
+               ShuffleSplit(3, test_size=10, train_size=20, random_state=0),
+               LeaveOneOut()]:
+        splits = CachedSplits.from_cv(cv, X)
+        _assert_same_splits(cv, splits, X)
+        assert is_leave_one_out(splits) == isinstance(cv, LeaveOneOut)
+
+
+def test_cached_splits_complement():
+    X = np.arange(50)
+    splits = CachedSplits.from_cv(LeaveOneOut(), X)
+    # only the test indices are stored
+    assert splits.train_is_complement.all()
+    assert len(splits.train_indices) == 0
+    assert len(splits.test_indices) == 50
+
+    splits = CachedSplits.from_cv(
+        ShuffleSplit(3, test_size=10, train_size=20, random_state=0), X)
+    assert not splits.train_is_complement.any()
+    assert len(splits.train_indices) == 60
+
+
+def test_cached_splits_file():
+    X = np.arange(50)
+    dirname = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(dirname, 'splits.npz')
+        cv = ShuffleSplit(3, random_state=0)
+        splits = cached_splits(cv, X, filename=filename)
+        assert os.path.exists(filename)
+        assert os.listdir(dirname) == ['splits.npz']
+        _assert_same_splits(cv, splits, X)
+
+        # the splits in the file win over those of the cross-validator
+        splits = cached_splits(ShuffleSplit(3, random_state=1), X,
+                               filename=filename)
+        _assert_same_splits(cv, splits, X)
+
+        # saving to an existing file keeps the file
+        CachedSplits.from_cv(KFold(5), X).save(filename)
+        _assert_same_splits(cv, CachedSplits.load(filename), X)
+        assert os.listdir(dirname) == ['splits.npz']
+    finally:
+        shutil.rmtree(dirname)
@@ -0,0 +1,85 @@
+from __future__ import print_function, absolute_import, division
+
+import os
+import sys
+import shutil
+import tempfile
+import importlib
+
+from osprey import eval_scopes
+
+PKG_INIT = "__version__ = '1.0'\n"
+PKG_MODULE = """
+from sklearn.base import BaseEstimator
+
+
+class FakeEstimator(BaseEstimator):
+    pass
+
+
+class _PrivateEstimator(BaseEstimator):
+    pass
+"""
+
+
+def _make_package(dirname, name):
+    os.mkdir(os.path.join(dirname, name))
+    with open(os.path.join(dirname, name, '__init__.py'), 'w') as f:
+        f.write(PKG_INIT)
+    with open(os.path.join(dirname, name, 'models.py'), 'w') as f:
+        f.write(PKG_MODULE)
+    sys.path.insert(0, dirname)
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(dirname)
+
+
+def test_estimator_registry():
+    dirname = tempfile.mkdtemp()
+    old_cache_dir = os.environ.get('OSPREY_CACHE_DIR')
+    os.environ['OSPREY_CACHE_DIR'] = os.path.join(dirname, 'cache')
+    try:
+        pkg = _make_package(dirname, 'osprey_fake_estimators')
+        registry = eval_scopes.estimator_registry(pkg)
+        assert registry == {'FakeEstimator': 'osprey_fake_estimators.models'}
+        # memoized in-process, and written to the disk cache
+        assert eval_scopes.estimator_registry(pkg) is registry
+        assert os.listdir(os.path.join(dirname, 'cache')) == [
+            'estimators-osprey_fake_estimators-1.0.json']
+
+        # the disk cache is used by a fresh process
+        eval_scopes._REGISTRY.clear()
+        del sys.modules['osprey_fake_estimators.models']
+        assert eval_scopes.estimator_registry(pkg) == registry
+        assert 'osprey_fake_estimators.models' not in sys.modules
+
+        scope = eval_scopes.import_all_estimators(pkg)
+        assert 'FakeEstimator' in scope
+        assert 'FakeEstimator' not in dict(scope)
+        kls = eval('FakeEstimator', {}, scope)
+        assert kls.__module__ == 'osprey_fake_estimators.models'
+        assert 'FakeEstimator' in dict(scope)
+    finally:
+        if old_cache_dir is None:
+            del os.environ['OSPREY_CACHE_DIR']
+        else:
+            os.environ['OSPREY_CACHE_DIR'] = old_cache_dir
+        eval_scopes._REGISTRY.clear()
+        shutil.rmtree(dirname)
+
+
+def test_estimator_scope_update():
+    a = eval_scopes.EstimatorScope({'Foo': 'os.path'})
+    a['Foo'] = 1
+    b = eval_scopes.EstimatorScope({'Foo': 'os', 'Bar': 'os'})
+    a.update(b)
+    assert 'Bar' in a
+    assert a.paths['Foo'] == 'os'
+    assert 'Foo' not in dict(a)
+    try:
+        a['Baz']
+    except KeyError:
+        pass
+    else:
+        assert False
@@ -0,0 +1,47 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from osprey.fingerprint import dataset_fingerprint, N_BLOCKS, BLOCK_SIZE
+
+
+def test_fingerprint_small():
+    X = np.random.RandomState(0).randn(10, 3)
+    y = np.arange(10)
+    fp = dataset_fingerprint(X, y)
+    assert fp.startswith('sample-sha1:')
+    assert dataset_fingerprint(X.copy(), y.copy()) == fp
+    assert dataset_fingerprint([X], y) != fp
+    assert dataset_fingerprint(X, None) != fp
+    assert dataset_fingerprint(X.reshape(3, 10), y) != fp
+    assert dataset_fingerprint(X.astype(np.float32), y) != fp
+    # non-contiguous inputs fingerprint like their contents
+    assert dataset_fingerprint(np.asfortranarray(X), y) == fp
+
+    X[4, 1] += 1
+    assert dataset_fingerprint(X, y) != fp
+    assert dataset_fingerprint(X, y, mode='none') is None
+
+
+def test_fingerprint_sampled():
+    # a change between two of the sampled blocks is only seen by mode='full'
+    X = np.zeros(4 * N_BLOCKS * BLOCK_SIZE, dtype=np.uint8)
+    sample, full = dataset_fingerprint(X), dataset_fingerprint(X, mode='full')
+    assert sample != full
+
+    X[0] = 1
+    assert dataset_fingerprint(X) != sample
+    X[0] = 0
+    X[BLOCK_SIZE + 1] = 1
+    assert dataset_fingerprint(X) == sample
+    assert dataset_fingerprint(X, mode='full') != full
+
+
+def test_fingerprint_sequences():
+    X = [np.ones((5, 2)), np.zeros((3, 2))]
+    fp = dataset_fingerprint(X)
+    assert dataset_fingerprint(list(reversed(X))) != fp
+    assert dataset_fingerprint(['a.h5', 'b.h5']) != \
+        dataset_fingerprint(['a.h5', 'c.h5'])
+    assert dataset_fingerprint({'a': X[0], 'b': X[1]}) == \
+        dataset_fingerprint({'b': X[1], 'a': X[0]})
@@ -3,6 +3,7 @@ from __future__ import print_function, absolute_import, division
 import numpy as np
 from nose.plugins.skip import SkipTest
 from six import iteritems
+from sklearn.base import BaseEstimator
 from sklearn.datasets import make_regression
 from sklearn.linear_model import Lasso
 from sklearn.grid_search import GridSearchCV
@@ -39,3 +40,132 @@ def test_2():
         MarkovStateModel(), {'verbose': False}, cv=2, X=X, y=None, verbose=0)
     np.testing.assert_array_equal(out['n_train_samples'], [11, 10])
     np.testing.assert_array_equal(out['n_test_samples'], [10, 11])
+
+
+def test_train_scoring():
+    X, y = make_regression(n_features=10)
+    full = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=3, X=X, y=y,
+                                   verbose=0)
+    skip = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=3, X=X, y=y,
+                                   verbose=0, train_scoring='skip')
+    sub = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=3, X=X, y=y,
+                                  verbose=0, train_scoring='subsample',
+                                  train_fraction=0.5)
+
+    assert full['approximate_train_scores'] is False
+    assert skip['train_scores'] is None
+    assert skip['mean_train_score'] is None
+    assert skip['approximate_train_scores'] is None
+    assert sub['approximate_train_scores'] is True
+    assert len(sub['train_scores']) == 3
+    for out in (skip, sub):
+        assert out['test_scores'] == full['test_scores']
+        assert out['n_train_samples'] == full['n_train_samples']
+
+
+def test_batch_size():
+    X, y = make_regression(n_features=10)
+    ref = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=5, X=X, y=y,
+                                  verbose=0, batch_size=1)
+    for batch_size in [2, 5, 'auto']:
+        out = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=5, X=X, y=y,
+                                      verbose=0, batch_size=batch_size)
+        assert out['test_scores'] == ref['test_scores']
+        assert out['train_scores'] == ref['train_scores']
+
+
+def test_fast_loo():
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import LeaveOneOut
+    X, y = make_regression(n_samples=30, n_features=5, noise=1.0,
+                           random_state=0)
+    y2 = np.column_stack([y, -y])
+    for fit_intercept in [True, False]:
+        for target in [y, y2]:
+            params = {'alpha': 0.5, 'fit_intercept': fit_intercept}
+            kwargs = dict(cv=LeaveOneOut(), X=X, y=target, verbose=0,
+                          scoring='neg_mean_squared_error')
+            slow = fit_and_score_estimator(Ridge(), params, fast_loo=False,
+                                           **kwargs)
+            fast = fit_and_score_estimator(Ridge(), params, **kwargs)
+
+            np.testing.assert_array_almost_equal(fast['test_scores'],
+                                                 slow['test_scores'])
+            assert fast['n_test_samples'] == slow['n_test_samples']
+            assert fast['approximate_train_scores'] is True
+            assert slow['approximate_train_scores'] is False
+
+
+class _SequenceMean(BaseEstimator):
+    """Fits the mean of a list of sequences of different lengths"""
+
+    def fit(self, sequences, y=None):
+        self.mean_ = np.concatenate(list(sequences)).mean(axis=0)
+        return self
+
+    def score(self, sequences, y=None):
+        return -np.mean([np.sum((x - self.mean_) ** 2) for x in sequences])
+
+
+class _ListSequenceMean(_SequenceMean):
+    """Only accepts lists, like the estimators which check their input
+    with `isinstance(X, list)`"""
+
+    def fit(self, sequences, y=None):
+        assert isinstance(sequences, list)
+        return super(_ListSequenceMean, self).fit(sequences, y)
+
+    def score(self, sequences, y=None):
+        assert isinstance(sequences, list)
+        return super(_ListSequenceMean, self).score(sequences, y)
+
+
+def test_list_dataset():
+    random = np.random.RandomState(0)
+    X = [random.randn(random.randint(1, 20), 3) for _ in range(30)]
+    # lists are split into views, other sequences with sklearn's indexing
+    out1 = fit_and_score_estimator(_SequenceMean(), {}, cv=5, X=X, verbose=0)
+    out2 = fit_and_score_estimator(_SequenceMean(), {}, cv=5, X=tuple(X),
+                                   verbose=0)
+    assert out1['test_scores'] == out2['test_scores']
+    assert out1['train_scores'] == out2['train_scores']
+    assert out1['n_test_samples'] == [6] * 5
+
+    # the folds of a list dataset are lists
+    out3 = fit_and_score_estimator(_ListSequenceMean(), {}, cv=5, X=X,
+                                   verbose=0)
+    assert out3['test_scores'] == out1['test_scores']
+
+
+def test_check_input():
+    from osprey.fit_estimator import check_dataset
+    X, y = make_regression(n_features=10)
+    ref = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=5, X=X, y=y,
+                                  verbose=0)
+    X_checked, y_checked = check_dataset(X, y)
+    out = fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=5, X=X_checked,
+                                  y=y_checked, verbose=0, check_input=False)
+    assert out['test_scores'] == ref['test_scores']
+
+    try:
+        fit_and_score_estimator(Lasso(), {'alpha': 2}, cv=5, X=X, y=y[1:],
+                                verbose=0, check_input=False)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_fit_and_score_path():
+    from osprey.fit_estimator import fit_and_score_path
+    X, y = make_regression(n_features=10, random_state=0)
+    values = [0.5, 2, 8]
+    out = fit_and_score_path(Lasso(), {'alpha': 1}, 'alpha', values, cv=5,
+                             X=X, y=y, verbose=0)
+    assert len(out) == 3
+    for value, scores in zip(values, out):
+        ref = fit_and_score_estimator(Lasso(), {'alpha': value}, cv=5, X=X,
+                                      y=y, verbose=0)
+        np.testing.assert_array_almost_equal(scores['test_scores'],
+                                             ref['test_scores'], decimal=3)
+        assert scores['n_test_samples'] == ref['n_test_samples']
@@ -0,0 +1,168 @@
+from __future__ import print_function, absolute_import, division
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from osprey.search_space import SearchSpace
+from osprey.history import History, STATUS_CODES
+from osprey.trials import make_session, Trial
+from osprey.execute_worker import update_history
+
+
+def _searchspace():
+    searchspace = SearchSpace()
+    searchspace.add_float('x', 0, 10)
+    searchspace.add_enum('w', ['a', 'b', 'c'])
+    return searchspace
+
+
+def test_from_list():
+    searchspace = _searchspace()
+    records = [({'x': 5.0, 'w': 'c'}, [1.0, 3.0], 'SUCCEEDED'),
+               ({'x': 0.0, 'w': 'a'}, None, 'PENDING'),
+               ({'x': 10.0, 'w': 'b'}, None, 'FAILED')]
+    history = History.from_list(records, searchspace)
+
+    assert len(history) == 3
+    np.testing.assert_array_almost_equal(history.X[0], [0.5, 1.0])
+    np.testing.assert_array_almost_equal(history.X[2], [1.0, 0.5])
+    assert history.mean[0] == 2.0
+    assert history.var[0] == 1.0
+    assert np.isnan(history.mean[1])
+    np.testing.assert_array_equal(
+        history.status, [STATUS_CODES[s] for s in ('SUCCEEDED', 'PENDING',
+                                                   'FAILED')])
+    assert [list(r) for r in history] == [list(r) for r in records]
+    assert History.from_list(history, searchspace) is history
+
+
+def test_append_and_update():
+    searchspace = _searchspace()
+    history = History(searchspace, capacity=1)
+    for i in range(10):
+        history.append({'x': float(i), 'w': 'a'}, None, 'PENDING',
+                       trial_id=i)
+    assert len(history) == 10
+    assert history.max_id == 9
+    assert history.pending_ids == list(range(10))
+
+    history.append({'x': 3.0, 'w': 'a'}, [0.5], 'SUCCEEDED', trial_id=3)
+    assert len(history) == 10
+    assert history.mean[3] == 0.5
+    assert 3 not in history.pending_ids
+
+
+def test_invalid_point():
+    searchspace = _searchspace()
+    history = History(searchspace)
+    history.append({'x': 1.0, 'w': 'not-a-choice'}, [0.0], 'SUCCEEDED')
+    assert np.isnan(history.X[0]).all()
+
+
+def test_exceeded():
+    searchspace = _searchspace()
+    history = History(searchspace)
+    history.append({'x': 9.0, 'w': 'a'}, None, 'EXCEEDED')
+    assert np.isnan(history.worst_mean())
+    history.append({'x': 1.0, 'w': 'a'}, [0.5], 'SUCCEEDED')
+    history.append({'x': 2.0, 'w': 'b'}, [0.8], 'SUCCEEDED')
+    assert history.worst_mean() == 0.5
+
+    # the GP strategy models the trials over their limits as the worst ones
+    from osprey.strategies import GP
+    gp = GP()
+    gp.n_dims = searchspace.n_dims
+    X, Y, V, pending = gp._get_data(history, searchspace)
+    assert len(X) == 3
+    np.testing.assert_array_almost_equal(X[-1], [0.9, 0.0])
+    assert Y[-1, 0] == 0.5
+
+    # and so do the turbo and forest strategies
+    from osprey.strategies import _scored_points
+    X, Y = _scored_points(history)
+    np.testing.assert_array_equal(Y, [0.5, 0.8, 0.5])
+
+
+def test_elapsed():
+    searchspace = _searchspace()
+    history = History(searchspace, capacity=1)
+    history.append({'x': 1.0, 'w': 'a'}, None, 'PENDING', trial_id=1)
+    history.append({'x': 2.0, 'w': 'a'}, [0.5], 'SUCCEEDED', trial_id=2,
+                   elapsed=4.0)
+    history.append({'x': 3.0, 'w': 'b'}, None, 'EXCEEDED', trial_id=3,
+                   elapsed=60.0)
+    assert np.isnan(history.elapsed[0])
+    history.append({'x': 1.0, 'w': 'a'}, [0.2], 'SUCCEEDED', trial_id=1,
+                   elapsed=2.0)
+    np.testing.assert_array_equal(history.elapsed, [2.0, 4.0, 60.0])
+
+    # the eips acquisition function models the log of the elapsed time
+    from osprey.strategies import GP
+    gp = GP(acquisition={'name': 'eips', 'params': {}})
+    gp.n_dims = searchspace.n_dims
+    X, log_elapsed = gp._get_cost_data(history, searchspace)
+    assert X.shape == (3, 2)
+    np.testing.assert_array_almost_equal(log_elapsed[:, 0],
+                                         np.log([2.0, 4.0, 60.0]))
+
+
+def test_update_history_out_of_order():
+    dirname = tempfile.mkdtemp()
+    try:
+        session = make_session('sqlite:///' + os.path.join(dirname, 'db'),
+                               project_name='a')
+
+        def add(trial_id, project_name='a'):
+            session.add(Trial(id=trial_id, project_name=project_name,
+                              status='SUCCEEDED',
+                              parameters={'x': 1.0, 'w': 'a'},
+                              test_scores=[float(trial_id)]))
+            session.commit()
+
+        history = History(_searchspace())
+        # trial 2 is committed after trial 3 (e.g. by another worker), and
+        # trial 4 is from another project
+        add(1)
+        add(3)
+        add(4, project_name='b')
+        add(5)
+        update_history(history, session, 'a')
+        assert list(history.ids) == [1, 3, 5]
+        assert history.missing_ids == set([2])
+
+        add(2)
+        add(6)
+        update_history(history, session, 'a')
+        assert sorted(history.ids) == [1, 2, 3, 5, 6]
+        assert history.missing_ids == set()
+
+        # ids which never show up (e.g. deleted trials) are only read again
+        # once
+        add(8)
+        update_history(history, session, 'a')
+        assert history.missing_ids == set([7])
+        update_history(history, session, 'a')
+        assert history.missing_ids == set()
+
+        # the pending trials are read again in chunks
+        import osprey.execute_worker
+        for i in range(9, 15):
+            session.add(Trial(id=i, project_name='a', status='PENDING',
+                              parameters={'x': 1.0, 'w': 'a'}))
+        session.commit()
+        update_history(history, session, 'a')
+        session.query(Trial).filter(Trial.id >= 9).update(
+            {'status': 'SUCCEEDED'}, synchronize_session=False)
+        session.commit()
+        max_in_ids = osprey.execute_worker.MAX_IN_IDS
+        osprey.execute_worker.MAX_IN_IDS = 4
+        try:
+            update_history(history, session, 'a')
+        finally:
+            osprey.execute_worker.MAX_IN_IDS = max_in_ids
+        assert history.pending_ids == []
+    finally:
+        shutil.rmtree(dirname)
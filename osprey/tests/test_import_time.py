@@ -0,0 +1,90 @@
+from __future__ import print_function, absolute_import, division
+import sys
+import subprocess
+from numpy.testing.decorators import skipif
+
+# heavy or optional packages which must not be imported by the modules
+# behind each subcommand, just to start it up
+HEAVY = ['sklearn', 'scipy', 'pandas', 'matplotlib', 'bokeh', 'hyperopt',
+         'GPy', 'SALib', 'msmbuilder', 'mdtraj', 'pyemma', 'pkg_resources']
+OPTIONAL = ['matplotlib', 'bokeh', 'hyperopt', 'GPy', 'SALib']
+
+SUBCOMMANDS = [
+    # `osprey -h`
+    ('osprey.cli.main', HEAVY + ['numpy', 'sqlalchemy']),
+    # `osprey dump`
+    ('osprey.execute_dump', HEAVY),
+    # `osprey current_best`
+    ('osprey.execute_currentbest', HEAVY),
+    # `osprey worker` needs sklearn, but not the optional backends
+    ('osprey.execute_worker', OPTIONAL),
+]
+
+
+def importtime(module):
+    """Import `module` in a fresh interpreter with `python -X importtime`.
+
+    Returns
+    -------
+    imported : dict
+        The cumulative import time (in microseconds) of each module that
+        was imported.
+    """
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    _, stderr = proc.communicate()
+    assert proc.returncode == 0, '\n'.join(
+        line for line in stderr.splitlines()
+        if not line.startswith('import time:'))
+
+    imported = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(cumulative)
+    return imported
+
+
+def imported_modules(module):
+    """Import `module` in a fresh interpreter, and return the names of the
+    top-level packages in its `sys.modules` (works on any python version)
+    """
+    code = ('import sys; import %s; '
+            'print(" ".join(set(m.split(".")[0] for m in sys.modules)))'
+            % module)
+    proc = subprocess.Popen(
+        [sys.executable, '-c', code], stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, universal_newlines=True)
+    stdout, stderr = proc.communicate()
+    assert proc.returncode == 0, stderr
+    return set(stdout.split())
+
+
+def test_lazy_imports():
+    # unlike test_import_time, this doesn't need -X importtime, so it also
+    # runs on python < 3.7
+    for module, forbidden in SUBCOMMANDS:
+        yield _test_lazy_imports, module, forbidden
+
+
+def _test_lazy_imports(module, forbidden):
+    unexpected = sorted(imported_modules(module).intersection(forbidden))
+    assert not unexpected, '%s imports %s' % (module, ', '.join(unexpected))
+
+
+@skipif(sys.version_info < (3, 7), 'python -X importtime requires 3.7')
+def test_import_time():
+    for module, forbidden in SUBCOMMANDS:
+        yield _test_import_time, module, forbidden
+
+
+def _test_import_time(module, forbidden):
+    imported = importtime(module)
+    print('%s: %.3f s' % (module, imported[module] / 1e6))
+
+    toplevel = set(name.split('.')[0] for name in imported)
+    unexpected = sorted(toplevel.intersection(forbidden))
+    assert not unexpected, '%s imports %s' % (module, ', '.join(unexpected))
@@ -0,0 +1,59 @@
+from __future__ import print_function, absolute_import, division
+
+import time
+
+import numpy as np
+
+from osprey.limits import run_with_limits, TrialLimitExceeded
+
+
+def _add(a, b=0):
+    return a + b
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def _allocate(megabytes):
+    data = np.ones(int(megabytes * 2 ** 20 / 8))
+    time.sleep(10)
+    return data.sum()
+
+
+def _fail():
+    raise ValueError('bad parameters')
+
+
+def test_run_with_limits():
+    assert run_with_limits(_add, (1,), {'b': 2}) == 3
+    assert run_with_limits(_add, (1,), {'b': 2}, max_time=10) == 3
+
+
+def test_time_limit():
+    start = time.time()
+    try:
+        run_with_limits(_sleep, (30,), max_time=0.5)
+    except TrialLimitExceeded as e:
+        assert 'time limit' in str(e)
+    else:
+        assert False
+    assert time.time() - start < 10
+
+
+def test_memory_limit():
+    try:
+        run_with_limits(_allocate, (500,), max_memory=200)
+    except TrialLimitExceeded as e:
+        assert 'memory limit' in str(e)
+    else:
+        assert False
+
+
+def test_error():
+    try:
+        run_with_limits(_fail, max_time=10)
+    except RuntimeError as e:
+        assert 'bad parameters' in str(e)
+    else:
+        assert False
@@ -0,0 +1,107 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+from sklearn.datasets import make_classification, make_regression
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import Lasso, ElasticNet, Ridge
+
+from osprey.paths import fit_path, get_path, path_values
+from osprey.search_space import SearchSpace
+
+
+def test_path_values():
+    searchspace = SearchSpace()
+    searchspace.add_float('alpha', 1e-3, 10, warp='log')
+    searchspace.add_int('n_estimators', 10, 13)
+    searchspace.add_enum('kernel', ['linear', 'rbf'])
+
+    values = path_values(searchspace['alpha'], 5)
+    np.testing.assert_array_almost_equal(np.log10(values), [-3, -2, -1, 0, 1])
+    # integer values are not repeated
+    assert path_values(searchspace['n_estimators'], 10) == [10, 11, 12, 13]
+    try:
+        path_values(searchspace['kernel'], 2)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_linear_path():
+    X, y = make_regression(n_samples=100, n_features=20, noise=1.0,
+                           random_state=0)
+    values = [0.01, 1.0, 0.1]
+    # the path and the individual fits agree up to the solver's tolerance
+    for estimator in [Lasso(tol=1e-8), ElasticNet(l1_ratio=0.3, tol=1e-8),
+                      Lasso(fit_intercept=False, tol=1e-8)]:
+        assert get_path(estimator, 'alpha') is not None
+        fitted = fit_path(estimator, 'alpha', values, X, y)
+        for value, est in zip(values, fitted):
+            ref = estimator.set_params(alpha=value).fit(X, y)
+            assert est.alpha == value
+            np.testing.assert_array_almost_equal(est.predict(X),
+                                                 ref.predict(X), decimal=4)
+
+
+def test_ensemble_path():
+    X, y = make_classification(n_samples=100, random_state=0)
+    values = [3, 7, 5]
+    for estimator in [GradientBoostingClassifier(random_state=0),
+                      RandomForestClassifier(random_state=0)]:
+        fitted = fit_path(estimator, 'n_estimators', values, X, y)
+        for value, est in zip(values, fitted):
+            ref = estimator.set_params(n_estimators=value).fit(X, y)
+            np.testing.assert_array_equal(est.predict_proba(X),
+                                          ref.predict_proba(X))
+
+
+def test_path_fallback():
+    X, y = make_regression(n_samples=50, n_features=5, random_state=0)
+    assert get_path(Ridge(), 'alpha') is None
+    fitted = fit_path(Ridge(), 'alpha', [0.1, 10], X, y)
+    assert [est.alpha for est in fitted] == [0.1, 10]
+    np.testing.assert_array_almost_equal(
+        fitted[1].coef_, Ridge(alpha=10).fit(X, y).coef_)
+
+
+def test_path_trials():
+    import os
+    import shutil
+    import tempfile
+    from contextlib import contextmanager
+    from osprey.strategies import RandomSearch
+    from osprey.trials import make_session, Trial
+    from osprey.execute_worker import initialize_trial, path_trials
+
+    searchspace = SearchSpace()
+    searchspace.add_float('alpha', 0.01, 1, warp='log')
+    searchspace.add_int('max_iter', 100, 1000)
+    values = path_values(searchspace['alpha'], 3)
+
+    dirname = tempfile.mkdtemp()
+    try:
+        session = make_session('sqlite:///' + os.path.join(dirname, 'db'),
+                               project_name='default')
+
+        @contextmanager
+        def sessionbuilder():
+            yield session
+
+        # the strategy doesn't choose the path parameter, and the trial is
+        # saved with its first value
+        trial_id, params = initialize_trial(
+            RandomSearch(), searchspace.without('alpha'), Lasso(),
+            config_sha1=None, project_name='default',
+            sessionbuilder=sessionbuilder, max_param_suggestion_retries=None,
+            fixed_params={'alpha': values[0]})
+        assert params['alpha'] == values[0]
+        trial = session.query(Trial).get(trial_id)
+        assert trial.parameters['alpha'] == values[0]
+
+        # the copies for the other values only get their own timings
+        trials = path_trials(session, trial, 'alpha', values)
+        assert [t.parameters['alpha'] for t in trials] == values
+        assert 'suggest' in trials[0].timings
+        assert all(t.timings is None for t in trials[1:])
+    finally:
+        shutil.rmtree(dirname)
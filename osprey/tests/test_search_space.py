@@ -171,3 +171,12 @@ def test_gp_5():
     v = EnumVariable('name', ['a'])
     assert 'a' == v.point_from_gp(v.point_to_gp('a'))
     assert 0 == v.point_to_gp('a')
+
+
+def test_without():
+    searchspace = SearchSpace()
+    searchspace.add_float('x', 0, 1)
+    searchspace.add_int('y', 0, 1)
+    reduced = searchspace.without('x')
+    assert list(reduced.variables) == ['y']
+    assert searchspace.n_dims == 2
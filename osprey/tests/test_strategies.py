@@ -6,14 +6,22 @@ import numpy as np
 from numpy.testing.decorators import skipif
 
 from osprey.search_space import SearchSpace
+from osprey.history import History
 from osprey.search_space import IntVariable, EnumVariable, FloatVariable
-from osprey.strategies import RandomSearch, HyperoptTPE, GP, GridSearch
+from osprey.strategies import (RandomSearch, HyperoptTPE, GP, GridSearch, TuRBO,
+                               ForestSearch)
 
 try:
     from hyperopt import hp, fmin, tpe, Trials
 except:
     pass
 
+try:
+    # the gp strategy imports GPy lazily
+    import GPy
+except:
+    pass
+
 
 def test_random():
     searchspace = SearchSpace()
@@ -125,3 +133,226 @@ def test_gp():
             assert searchspace[k].min <= v <= searchspace[k].max
         else:
             assert False
+
+
+class _QuadraticModel(object):
+    # the parts of a GPy model used by GP._optimize_restarts
+    def __init__(self, x):
+        self.optimizer_array = np.asarray(x, dtype=float)
+
+    def copy(self):
+        return _QuadraticModel(self.optimizer_array.copy())
+
+    def randomize(self, rand_gen):
+        self.optimizer_array = rand_gen(size=self.optimizer_array.shape)
+
+    def optimize(self):
+        # a local optimizer which gets stuck at the nearest integer point
+        self.optimizer_array = np.round(self.optimizer_array)
+
+    def objective_function(self):
+        return np.sum((self.optimizer_array - 0.4) ** 2)
+
+
+def test_gp_parallel_restarts():
+    results = []
+    for n_jobs in [1, 2]:
+        model = _QuadraticModel([3.0, -3.0])
+        GP(seed=0, n_init=10, n_jobs=n_jobs)._optimize_restarts(model)
+        results.append(model.optimizer_array)
+    np.testing.assert_array_equal(results[0], [0.0, 0.0])
+    np.testing.assert_array_equal(results[0], results[1])
+
+
+class _LinearCostModel(object):
+    # the part of a GPy model used by GP._eips, fitted by least squares
+    def __init__(self, X, Y):
+        A = np.hstack([X, np.ones((len(X), 1))])
+        self.coef = np.linalg.lstsq(A, Y, rcond=None)[0]
+
+    def predict(self, X):
+        A = np.hstack([X, np.ones((len(X), 1))])
+        return A.dot(self.coef), np.zeros((len(X), 1))
+
+
+def _eips_history(searchspace, n_timings):
+    # the trials with a larger x take longer. Only the first `n_timings`
+    # trials have a time, the last one went over its limits.
+    history = History(searchspace)
+    for i, x in enumerate(np.linspace(0, 1, 6)):
+        status = 'EXCEEDED' if i == 5 else 'SUCCEEDED'
+        elapsed = 1.0 + 10 * x if i < n_timings else None
+        history.append({'x': x}, 0.5, status, trial_id=i + 1,
+                       elapsed=elapsed)
+    return history
+
+
+def _check_eips(fit_cost_model=None):
+    searchspace = SearchSpace()
+    searchspace.add_float('x', 0, 1)
+    gp = GP(acquisition={'name': 'eips', 'params': {}}, n_init=2, seed=0)
+    gp.n_dims = searchspace.n_dims
+    if fit_cost_model is not None:
+        gp._fit_cost_model = fit_cost_model(gp)
+    gp.y_best, gp.y_best_var = 0.5, 0.0
+
+    # two points with the same expected improvement
+    x = np.array([[0.1], [0.9]])
+    y_mean, y_var = np.array([[0.6], [0.6]]), np.array([[0.1], [0.1]])
+    ei = gp._ei(x, y_mean, y_var)
+    assert ei[0, 0] == ei[1, 0]
+
+    X_cost, log_elapsed = gp._get_cost_data(
+        _eips_history(searchspace, n_timings=6), searchspace)
+    # the trial which went over its limits is the most expensive one
+    np.testing.assert_array_almost_equal(
+        np.exp(log_elapsed).ravel(), 1.0 + 10 * np.linspace(0, 1, 6))
+    assert X_cost.shape == (6, 1)
+
+    gp._update_cost_model(_eips_history(searchspace, n_timings=6),
+                          searchspace)
+    assert gp.cost_model is not None
+    eips = gp._eips(x, y_mean, y_var)
+    assert eips[0, 0] > eips[1, 0], 'eips should prefer the cheaper point'
+
+    # below two timings, eips is the same as ei
+    gp._update_cost_model(_eips_history(searchspace, n_timings=1),
+                          searchspace)
+    assert gp.cost_model is None
+    np.testing.assert_array_equal(gp._eips(x, y_mean, y_var), ei)
+
+
+def test_gp_eips():
+    def fit_cost_model(gp):
+        def fit(X, log_elapsed):
+            gp.cost_model = _LinearCostModel(X, log_elapsed)
+        return fit
+    _check_eips(fit_cost_model)
+
+
+@skipif('GPy' not in sys.modules, 'this test requires GPy')
+def test_gp_eips_cost_model():
+    _check_eips()
+
+
+def test_turbo():
+    searchspace = SearchSpace()
+    for i in range(8):
+        searchspace.add_float('x%d' % i, -10, 10)
+    searchspace.add_float('y', 1, 10, warp='log')
+    searchspace.add_int('z', -10, 10)
+    searchspace.add_enum('w', ['opt1', 'opt2'])
+
+    random = np.random.RandomState(0)
+    history = [(searchspace.rvs(random), [random.random_sample()],
+                'SUCCEEDED') for _ in range(25)]
+
+    strategy = TuRBO(seed=0)
+    params = strategy.suggest(history, searchspace)
+    assert strategy.model is not None
+    for k, v in iteritems(params):
+        assert k in searchspace.variables
+        if isinstance(searchspace[k], EnumVariable):
+            assert v in searchspace[k].choices
+        else:
+            assert searchspace[k].min <= v <= searchspace[k].max
+
+    # the float variables of the suggestion are in the trust region around
+    # the best trial (ints and enums are rounded)
+    x = np.array(searchspace.point_to_gp(params))[:9]
+    lower, upper = strategy.bounds
+    assert np.all(lower[:9] - 1e-8 <= x) and np.all(x <= upper[:9] + 1e-8)
+
+
+def test_turbo_trust_region():
+    searchspace = SearchSpace()
+    searchspace.add_float('x', 0, 1)
+    strategy = TuRBO(seeds=2, success_tolerance=2, failure_tolerance=2,
+                     length_init=0.8, length_min=0.1)
+
+    history = History(searchspace)
+    for score in [0.0, 1.0, 2.0, 3.0]:
+        history.append({'x': score / 10}, [score], 'SUCCEEDED')
+    assert strategy._trust_region(history) == (0, 1.6)
+
+    # failures shrink the region, until the search restarts
+    for _ in range(4):
+        history.append({'x': 0.0}, None, 'FAILED')
+    assert strategy._trust_region(history) == (0, 0.4)
+    history.append({'x': 0.0}, None, 'PENDING')
+    for _ in range(6):
+        history.append({'x': 0.0}, [0.0], 'SUCCEEDED')
+    assert strategy._trust_region(history) == (15, 0.8)
+
+
+def test_forest():
+    searchspace = SearchSpace()
+    searchspace.add_float('x', -10, 10)
+    searchspace.add_int('z', -10, 10)
+    searchspace.add_jump('j', 1, 100, 10, var_type=int)
+    searchspace.add_enum('w', ['opt1', 'opt2', 'opt3'])
+
+    random = np.random.RandomState(0)
+    history = [(searchspace.rvs(random), [random.random_sample()],
+                'SUCCEEDED') for _ in range(20)]
+
+    strategy = ForestSearch(seed=0, n_candidates=100)
+    params = strategy.suggest(history, searchspace)
+    assert strategy.model is not None
+    assert params not in [h[0] for h in history]
+    for k, v in iteritems(params):
+        if isinstance(searchspace[k], EnumVariable):
+            assert v in searchspace[k].choices
+        else:
+            assert searchspace[k].min <= v <= searchspace[k].max
+
+    # the enum is one-hot encoded, the jump stays ordered
+    X = np.array([searchspace.point_to_gp(h[0]) for h in history])
+    encoded = strategy._encode(X, searchspace)
+    assert encoded.shape == (20, 6)
+    np.testing.assert_array_equal(encoded[:, 3:].sum(axis=1), 1)
+
+    neighbour = strategy._neighbour(history[0][0], searchspace, random)
+    assert sum(neighbour[k] != history[0][0][k] for k in neighbour) <= 1
+
+
+def _seeded_suggestions(strategy, n_trials):
+    searchspace = SearchSpace()
+    searchspace.add_float('x', -10, 10)
+    searchspace.add_int('z', -10, 10)
+    history = []
+    for _ in range(n_trials):
+        params = strategy.suggest(history, searchspace)
+        history.append((params, [-params['x'] ** 2], 'SUCCEEDED'))
+    return [h[0] for h in history]
+
+
+def test_turbo_seed():
+    points = _seeded_suggestions(TuRBO(seed=0, seeds=4), 6)
+    assert len(set(p['x'] for p in points)) == len(points)
+    assert points == _seeded_suggestions(TuRBO(seed=0, seeds=4), 6)
+
+
+def test_forest_seed():
+    points = _seeded_suggestions(ForestSearch(seed=0, seeds=4,
+                                              n_candidates=50), 6)
+    assert len(set(p['x'] for p in points)) == len(points)
+    assert points == _seeded_suggestions(
+        ForestSearch(seed=0, seeds=4, n_candidates=50), 6)
+
+
+def test_forest_full_params():
+    # in the worker, the stored params are the full estimator params, with
+    # keys which aren't in the search space
+    searchspace = SearchSpace()
+    searchspace.add_enum('e', ['x', 'y', 'z'])
+    searchspace.add_int('n', 1, 3)
+    history = [(dict(e=e, n=n, n_jobs=1), [float(n)], 'SUCCEEDED')
+               for e, n in [('x', 1), ('y', 2), ('z', 3)]]
+    strategy = ForestSearch(seed=0, seeds=2, n_candidates=20)
+    for _ in range(6):
+        params = strategy.suggest(history, searchspace)
+        assert sorted(params) == ['e', 'n']
+        history.append((dict(params, n_jobs=1), [0.0], 'SUCCEEDED'))
+    points = set((p['e'], p['n']) for p, _, _ in history)
+    assert len(points) == 9
@@ -5,7 +5,7 @@ import sqlite3
 import shutil
 import tempfile
 
-from osprey.trials import make_session, Trial
+from osprey.trials import make_session, Trial, MIGRATIONS
 
 
 def test_1():
@@ -29,3 +29,89 @@ def test_1():
     finally:
         os.chdir(cwd)
         shutil.rmtree(dirname)
+
+
+def test_add_missing_columns():
+    # a database created before the `timings` column existed
+    cwd = os.path.abspath(os.curdir)
+    dirname = tempfile.mkdtemp()
+    try:
+        os.chdir(dirname)
+        con = sqlite3.connect('db')
+        con.execute('CREATE TABLE trials_v3 (id INTEGER NOT NULL, '
+                    'project_name TEXT, PRIMARY KEY (id))')
+        con.execute("INSERT INTO trials_v3 (project_name) VALUES ('old')")
+        con.commit()
+        con.close()
+
+        session = make_session('sqlite:///db', project_name='abc123')
+        session.add(Trial(timings={'suggest': 1.0}))
+        session.commit()
+
+        trials = session.query(Trial).order_by(Trial.id).all()
+        assert [t.project_name for t in trials] == ['old', 'abc123']
+        assert trials[0].timings is None
+        assert trials[1].timings == {'suggest': 1.0}
+        session.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(dirname)
+
+
+def test_migrations():
+    cwd = os.path.abspath(os.curdir)
+    dirname = tempfile.mkdtemp()
+    try:
+        os.chdir(dirname)
+        con = sqlite3.connect('db')
+        con.execute('CREATE TABLE trials_v3 (id INTEGER NOT NULL, '
+                    'project_name TEXT, PRIMARY KEY (id))')
+        con.commit()
+        con.close()
+
+        for _ in range(2):
+            session = make_session('sqlite:///db', project_name='abc123')
+            session.close()
+
+        con = sqlite3.connect('db')
+        indexes = set(row[0] for row in con.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' "
+            "AND tbl_name='trials_v3'"))
+        assert set(ix.name for ix in Trial.__table__.indexes) <= indexes
+        assert con.execute('SELECT id, version FROM osprey_schema'
+                           ).fetchall() == [(1, len(MIGRATIONS))]
+        con.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(dirname)
+
+
+def test_exceeded_status():
+    # a database whose status column has a CHECK constraint on the values,
+    # as created by older versions of SQLAlchemy
+    cwd = os.path.abspath(os.curdir)
+    dirname = tempfile.mkdtemp()
+    try:
+        os.chdir(dirname)
+        con = sqlite3.connect('db')
+        con.execute("CREATE TABLE trials_v3 (id INTEGER NOT NULL, "
+                    "project_name TEXT, status VARCHAR(9), PRIMARY KEY (id), "
+                    "CHECK (status IN ('PENDING', 'SUCCEEDED', 'FAILED')))")
+        con.execute("CREATE TABLE osprey_schema (id INTEGER NOT NULL, "
+                    "version INTEGER NOT NULL, PRIMARY KEY (id))")
+        con.execute("INSERT INTO osprey_schema VALUES (1, 0)")
+        con.execute("INSERT INTO trials_v3 (project_name, status) "
+                    "VALUES ('old', 'SUCCEEDED')")
+        con.commit()
+        con.close()
+
+        session = make_session('sqlite:///db', project_name='abc123')
+        session.add(Trial(status='EXCEEDED'))
+        session.commit()
+        trials = session.query(Trial).order_by(Trial.id).all()
+        assert [(t.project_name, t.status) for t in trials] == [
+            ('old', 'SUCCEEDED'), ('abc123', 'EXCEEDED')]
+        session.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(dirname)
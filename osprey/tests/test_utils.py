@@ -6,6 +6,7 @@ import datetime
 from osprey.utils import dict_merge, in_directory
 from osprey.utils import format_timedelta, current_pretty_time
 from osprey.utils import is_json_serializable
+from osprey.utils import FoldView, num_samples
 import numpy as np
 from sklearn.base import BaseEstimator
 
@@ -62,3 +63,28 @@ def test_format_timedelta():
 
 def test_current_pretty_time():
     print(current_pretty_time())
+
+
+def test_fold_view():
+    data = [np.zeros((n, 2)) for n in [3, 1, 4, 1, 5]]
+    view = FoldView(data)
+    assert len(view) == 5
+    assert num_samples(view, is_nested=True) == 14
+
+    fold = view[np.array([4, 0, 2])]
+    assert isinstance(fold, FoldView)
+    assert [len(x) for x in fold] == [5, 3, 4]
+    assert fold[1] is data[0]
+    assert num_samples(fold, is_nested=True) == 12
+
+    # views of views index the original list, and share its lengths
+    sub = fold[1:]
+    assert [len(x) for x in sub] == [3, 4]
+    assert sub._root is view
+    assert num_samples(sub, is_nested=True) == 7
+
+    # views only hold indices, and the estimators get lists
+    assert not isinstance(sub, list)
+    assert isinstance(sub.tolist(), list)
+    assert all(x is y for x, y in zip(sub.tolist(), [data[0], data[2]]))
+    assert np.concatenate(sub.tolist()).shape == (7, 2)
@@ -0,0 +1,66 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Lasso
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from osprey.fit_estimator import fit_and_score_estimator
+from osprey.warm_start import WarmStartCache, has_warm_start, set_warm_start
+
+
+def test_has_warm_start():
+    assert has_warm_start(Lasso())
+    pipeline = Pipeline([('scale', StandardScaler()), ('lasso', Lasso())])
+    assert has_warm_start(pipeline)
+    assert set_warm_start(pipeline).get_params()['lasso__warm_start']
+    assert not has_warm_start(StandardScaler())
+
+
+def test_cache():
+    cache = WarmStartCache(['n_estimators'])
+    train = np.arange(10)
+    cache.put(0, {'n_estimators': 10, 'max_depth': 3}, train, 'fitted')
+    assert cache.get(0, {'n_estimators': 20, 'max_depth': 3}, train) == \
+        'fitted'
+    assert cache.get(0, {'n_estimators': 20, 'max_depth': 4}, train) is None
+    assert cache.get(0, {'n_estimators': 20}, train) is None
+    assert cache.get(0, {'n_estimators': 20, 'max_depth': 3},
+                     train[1:]) is None
+    assert cache.get(1, {'n_estimators': 20, 'max_depth': 3}, train) is None
+
+
+def test_warm_start_forest():
+    X, y = make_classification(n_samples=100, random_state=0)
+    forest = RandomForestClassifier(random_state=0)
+    cache = WarmStartCache(['n_estimators'])
+
+    fit_and_score_estimator(forest, {'n_estimators': 5}, cv=3, X=X, y=y,
+                            verbose=0, warm_start=cache)
+    assert len(cache) == 3
+    first = [cache.get(i, {'n_estimators': 5}, train)
+             for i, (train, test) in enumerate(_folds(X, y))]
+    assert all(len(f.estimators_) == 5 for f in first)
+
+    # the trees of the previous trial are reused, and grown to 10
+    fit_and_score_estimator(forest, {'n_estimators': 10}, cv=3, X=X, y=y,
+                            verbose=0, warm_start=cache)
+    second = [cache.get(i, {'n_estimators': 10}, train)
+              for i, (train, test) in enumerate(_folds(X, y))]
+    for f1, f2 in zip(first, second):
+        assert f1 is f2
+        assert len(f2.estimators_) == 10
+
+    # a forest can't be warm started to fewer trees: it is fit from scratch
+    fit_and_score_estimator(forest, {'n_estimators': 4}, cv=3, X=X, y=y,
+                            verbose=0, warm_start=cache)
+    third = [cache.get(i, {'n_estimators': 4}, train)
+             for i, (train, test) in enumerate(_folds(X, y))]
+    assert all(len(f.estimators_) == 4 for f in third)
+
+
+def _folds(X, y):
+    from sklearn.model_selection import StratifiedKFold
+    return StratifiedKFold(3).split(X, y)
@@ -1,5 +1,4 @@
 from __future__ import print_function, absolute_import, division
-import json
 import time
 import random
 from datetime import datetime, timedelta
@@ -7,38 +6,60 @@ from datetime import datetime, timedelta
 from six import iteritems
 
 from sqlalchemy.pool import NullPool
-from sqlalchemy.exc import OperationalError
-from sqlalchemy import Column, create_engine
+from sqlalchemy.exc import OperationalError, IntegrityError
+from sqlalchemy import (Column, Index, Table, MetaData, create_engine,
+                        inspect, select, text)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.types import (TypeDecorator, Text, Float, Integer, Enum,
-                              DateTime, String, Interval)
+                              DateTime, String, Interval, Boolean)
 from sqlalchemy.orm import Session
+
+from .column_codecs import encode, decode, check_codec
 Base = declarative_base()
 
-__all__ = ['Trial']
+__all__ = ['Trial', 'STATUSES']
+
+STATUSES = ('PENDING', 'SUCCEEDED', 'FAILED', 'EXCEEDED')
 
 
 class JSONEncoded(TypeDecorator):
     impl = Text
+    # the codec used to encode new values, see osprey.column_codecs. Values
+    # written with any codec can be read back.
+    codec = 'json'
+
+    @classmethod
+    def set_codec(cls, codec):
+        cls.codec = check_codec(codec)
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            value = json.dumps(value)
+            value = encode(value, self.codec)
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
-            value = json.loads(value)
+            value = decode(value)
         return value
 
 
 class Trial(Base):
     __tablename__ = 'trials_v3'
+    # the workers and `osprey current_best` filter on the project and status,
+    # and look for the best score within a project. (MySQL can only index
+    # a prefix of a TEXT column.)
+    __table_args__ = (
+        Index('ix_trials_v3_project_name_status', 'project_name', 'status',
+              mysql_length={'project_name': 255}),
+        Index('ix_trials_v3_project_name_mean_test_score', 'project_name',
+              'mean_test_score', mysql_length={'project_name': 255}),
+    )
     default_project_name = None
 
     id = Column(Integer, primary_key=True)
     project_name = Column(Text())
-    status = Column(Enum('PENDING', 'SUCCEEDED', 'FAILED'))
+    # EXCEEDED: the trial went over its time or memory limit
+    status = Column(Enum(*STATUSES))
     parameters = Column(JSONEncoded())
 
     mean_test_score = Column(Float)
@@ -47,6 +68,9 @@ class Trial(Base):
     test_scores = Column(JSONEncoded())
     n_train_samples = Column(JSONEncoded())
     n_test_samples = Column(JSONEncoded())
+    # True if the train scores were computed on a subsample of each training
+    # set. NULL if the train scores were not computed at all.
+    approximate_train_scores = Column(Boolean())
 
     started = Column(DateTime())
     completed = Column(DateTime())
@@ -55,6 +79,13 @@ class Trial(Base):
     user = Column(String(512))
     traceback = Column(Text())
     config_sha1 = Column(String(40))
+    # see osprey.fingerprint.dataset_fingerprint
+    dataset_fingerprint = Column(String(64))
+    # wall-clock time (in seconds) spent in each phase of the trial:
+    # 'history_load', 'suggest', 'db_write' and, per fold, 'fit',
+    # 'score_test' and 'score_train'. 'db_write' is the time of the commit
+    # of the results, which is saved by a second, smaller commit
+    timings = Column(JSONEncoded())
 
     @classmethod
     def set_default_project_name(cls, name):
@@ -76,8 +107,9 @@ class Trial(Base):
         return item
 
 
-def make_session(uri, project_name, echo=False):
+def make_session(uri, project_name, echo=False, codec='json'):
     Trial.set_default_project_name(project_name)
+    JSONEncoded.set_codec(codec)
     engine = create_engine(uri, echo=echo, poolclass=NullPool)
     _create_all(Base, engine)
     session = Session(engine)
@@ -90,8 +122,110 @@ def _create_all(base, engine):
     error = None
     for i in range(3):
         try:
-            return base.metadata.create_all(engine)
+            base.metadata.create_all(engine)
+            return _migrate(base, engine)
         except OperationalError as e:
             time.sleep(random.random())
             error = e
     raise error
+
+
+# The version of the schema of an existing database is the number of
+# MIGRATIONS which have been applied to it, stored in a table of its own.
+_SCHEMA = Table('osprey_schema', MetaData(),
+                Column('id', Integer, primary_key=True),
+                Column('version', Integer, nullable=False))
+
+
+def _migrate(base, engine):
+    """Apply the MIGRATIONS which haven't been applied to the database yet.
+
+    The migrations are idempotent, so it doesn't matter if several workers
+    run them at the same time, or if they are run on a database which
+    was just created (and is therefore up to date already).
+    """
+    _SCHEMA.create(engine, checkfirst=True)
+    version = engine.execute(
+        select([_SCHEMA.c.version]).where(_SCHEMA.c.id == 1)).scalar()
+    if version is not None and version >= len(MIGRATIONS):
+        return
+
+    for migration in MIGRATIONS[version or 0:]:
+        migration(base, engine)
+
+    if version is None:
+        try:
+            engine.execute(_SCHEMA.insert().values(id=1,
+                                                   version=len(MIGRATIONS)))
+        except IntegrityError:
+            # another worker recorded the version first
+            pass
+    else:
+        engine.execute(_SCHEMA.update().where(_SCHEMA.c.id == 1)
+                       .values(version=len(MIGRATIONS)))
+
+
+def _add_missing_columns(base, engine):
+    # tables created by an older version of osprey may be missing columns
+    # which have since been added to the model. Add them in place, so that
+    # existing databases keep working without losing their history.
+    for table in base.metadata.sorted_tables:
+        existing = set(c['name'] for c in
+                       inspect(engine).get_columns(table.name))
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            engine.execute(text('ALTER TABLE %s ADD COLUMN %s %s' % (
+                table.name, column.name,
+                column.type.compile(dialect=engine.dialect))))
+
+
+def _add_missing_indexes(base, engine):
+    # create_all() only creates the indexes of the tables it creates
+    for table in base.metadata.sorted_tables:
+        existing = set(ix['name'] for ix in
+                       inspect(engine).get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+
+
+def _add_exceeded_status(base, engine):
+    # the EXCEEDED status was added to the status column, which older
+    # versions of SQLAlchemy created as a native ENUM on MySQL, and with a
+    # CHECK constraint on the values on SQLite
+    table = Trial.__table__
+    if engine.dialect.name == 'mysql':
+        engine.execute(text('ALTER TABLE %s MODIFY status %s' % (
+            table.name, table.c.status.type.compile(dialect=engine.dialect))))
+    elif engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            sql = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' "
+                     "AND name = :name"), name=table.name).scalar()
+            if sql is None or 'CHECK' not in sql or 'EXCEEDED' in sql:
+                return
+            # SQLite can't alter a constraint, so the table is copied into
+            # a new one (the indexes are dropped, since their names would
+            # clash with the new table's)
+            old = '%s_old' % table.name
+            for index in table.indexes:
+                connection.execute(text('DROP INDEX IF EXISTS %s'
+                                        % index.name))
+            connection.execute(text('ALTER TABLE %s RENAME TO %s'
+                                    % (table.name, old)))
+            table.create(connection)
+            columns = ', '.join(c['name'] for c in
+                                inspect(connection).get_columns(old))
+            connection.execute(text('INSERT INTO %s (%s) SELECT %s FROM %s'
+                                    % (table.name, columns, columns, old)))
+            connection.execute(text('DROP TABLE %s' % old))
+
+
+# Each schema change appends a function here, which brings a database from
+# the previous version up to date. Never reorder or remove entries.
+MIGRATIONS = [
+    _add_missing_columns,
+    _add_missing_indexes,
+    _add_exceeded_status,
+]
@@ -1,24 +1,24 @@
 from __future__ import print_function, absolute_import, division
 import warnings
 import numpy as np
-import scipy.sparse as sp
 import os.path
 import sys
 import contextlib
 import json
 from datetime import datetime
-from sklearn.pipeline import Pipeline
-from six import StringIO
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
-
-from .eval_scopes import import_all_estimators
 from .trials import JSONEncoded
+from .column_codecs import decode
 
 __all__ = ['dict_merge', 'in_directory', 'prepend_syspath', 'prepend_syspath',
            'Unbuffered', 'format_timedelta', 'current_pretty_time',
            'short_format_time', 'mock_module', 'join_quoted', 'expand_path',
-           'is_msmbuilder_estimator', 'num_samples', 'check_arrays',
-           'trials_to_dict']
+           'is_msmbuilder_estimator', 'FoldView', 'num_samples',
+           'check_arrays', 'trials_to_dict']
 
 
 def is_json_serializable(obj):
@@ -171,11 +171,17 @@ def is_msmbuilder_estimator(estimator):
         import msmbuilder
     except ImportError:
         return False
-    msmbuilder_estimators = import_all_estimators(msmbuilder).values()
+    from sklearn.pipeline import Pipeline
+    from .eval_scopes import estimator_registry
+    # the registry is memoized, so this is cheap after the first call
+    registry = estimator_registry(msmbuilder)
+
+    def is_msmbuilder_class(kls):
+        return registry.get(kls.__name__) == kls.__module__
 
-    out = estimator.__class__ in msmbuilder_estimators
+    out = is_msmbuilder_class(estimator.__class__)
     if isinstance(estimator, Pipeline):
-        out = any(step.__class__ in msmbuilder_estimators
+        out = any(is_msmbuilder_class(step.__class__)
                   for name, step in estimator.steps)
     return out
 
@@ -205,6 +211,75 @@ def _warn_if_not_finite(X):
                       category=UserWarning)
 
 
+class FoldView(Sequence):
+    """A read-only view of some of the elements of a list dataset (e.g. a
+    list of trajectories), which doesn't copy the list.
+
+    Indexing a view with an array of indices (e.g. the training or test
+    indices of a fold) returns another view, so splitting a dataset into
+    folds (and subsampling them) only allocates the index arrays. Each
+    element's number of samples is computed once, and shared by all the
+    views of the same list, so that `num_samples(view, is_nested=True)`
+    doesn't walk the elements again.
+
+    The estimators are given `view.tolist()`, since some of them (e.g.
+    pyemma's) check for list inputs with `isinstance(X, list)`.
+
+    Parameters
+    ----------
+    data : list
+    indices : array-like of int, optional
+        The indices of the elements of `data` in the view. By default, all
+        of them.
+    """
+
+    def __init__(self, data, indices=None):
+        if isinstance(data, FoldView):
+            root = data._root
+            if indices is not None:
+                indices = data.indices[indices]
+            else:
+                indices = data.indices
+            data = data.data
+        else:
+            root = self
+        self.data = data
+        if indices is None:
+            indices = np.arange(len(data))
+        self.indices = np.asarray(indices, dtype=int)
+        self._root = root
+        self._lengths = None
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.data[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, (list, np.ndarray)):
+            return FoldView(self, np.asarray(key))
+        if isinstance(key, slice):
+            return FoldView(self, key)
+        return self.data[self.indices[key]]
+
+    def __repr__(self):
+        return 'FoldView(<%d of %d elements>)' % (len(self), len(self.data))
+
+    def tolist(self):
+        """A new list of the elements of the view"""
+        return [self.data[i] for i in self.indices]
+
+    def element_lengths(self):
+        """The number of samples in each element of the view"""
+        root = self._root
+        if root._lengths is None:
+            root._lengths = np.array([num_samples(x) for x in root.data],
+                                     dtype=int)
+        return root._lengths[self.indices]
+
+
 def num_samples(x, is_nested=False):
     """Return number of samples in array-like x."""
     if hasattr(x, 'fit'):
@@ -213,6 +288,8 @@ def num_samples(x, is_nested=False):
                         'estimator %s' % x)
 
     if is_nested:
+        if isinstance(x, FoldView):
+            return int(x.element_lengths().sum())
         return sum(num_samples(xx, is_nested=False) for xx in x)
 
     if not hasattr(x, '__len__') and not hasattr(x, 'shape'):
@@ -274,6 +351,8 @@ def check_arrays(*arrays, **options):
     allow_nd : boolean, False by default
         Allows arrays of more than 2 dimensions.
     """
+    import scipy.sparse as sp
+
     sparse_format = options.pop('sparse_format', None)
     if sparse_format not in (None, 'csr', 'csc', 'dense'):
         raise ValueError('Unexpected sparse format: %r' % sparse_format)
@@ -358,7 +437,7 @@ def trials_to_dict(trials, columns):
         for i, item in enumerate(columns.items()):
             key, val = item
             new_val = trial[i]
-            if isinstance(val.type, JSONEncoded):
-                new_val = json.load(StringIO(new_val))
+            if isinstance(val.type, JSONEncoded) and new_val is not None:
+                new_val = decode(new_val)
             d[key] = new_val
         yield d
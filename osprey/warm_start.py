@@ -0,0 +1,102 @@
+from __future__ import print_function, absolute_import, division
+"""warm_start.py
+
+Warm-started fitting across trials.
+
+Estimators with a `warm_start` parameter (e.g. the sklearn ensembles, SGD
+models or linear models fit along a regularization path) can continue from
+a previous fit instead of starting from scratch: a forest grows the extra
+trees, a boosting model adds stages, and a linear model starts its solver
+from the previous coefficients. When two consecutive trials only differ in
+such parameters (e.g. `n_estimators` or `alpha`), each fold's estimator
+from the previous trial is refit with the new parameters, which is much
+faster than fitting a fresh clone.
+"""
+
+import numpy as np
+from sklearn.base import clone
+
+__all__ = ['WarmStartCache', 'has_warm_start', 'set_warm_start']
+
+
+def _warm_start_keys(estimator):
+    return [key for key in estimator.get_params()
+            if key == 'warm_start' or key.endswith('__warm_start')]
+
+
+def has_warm_start(estimator):
+    """Does the estimator (or one of its steps) have a warm_start parameter?"""
+    return len(_warm_start_keys(estimator)) > 0
+
+
+def set_warm_start(estimator):
+    """Turn on every warm_start parameter of the estimator, in place"""
+    estimator.set_params(**dict((key, True)
+                                for key in _warm_start_keys(estimator)))
+    return estimator
+
+
+class WarmStartCache(object):
+    """The estimators most recently fit on each cross-validation fold.
+
+    `fit_and_score_estimator(..., warm_start=cache)` fits each fold starting
+    from the estimator the cache holds for it, if the new parameters only
+    differ from those it was fit with in `params`, and puts the estimators
+    it fits back into the cache.
+
+    Parameters
+    ----------
+    params : list of str
+        The parameters which can change between warm-started fits, e.g.
+        ['n_estimators'].
+
+    Notes
+    -----
+    The cache keeps one fitted estimator per fold in memory.
+    """
+
+    def __init__(self, params):
+        self.params = frozenset(params)
+        self._fits = {}
+
+    def __len__(self):
+        return len(self._fits)
+
+    def get(self, fold, parameters, train):
+        """The estimator to warm start the fold from, or None.
+
+        Parameters
+        ----------
+        fold : int
+            The index of the fold.
+        parameters : dict
+            The parameters of the new fit.
+        train : array of int
+            The training indices of the fold. The estimator is only reused
+            if it was fit on the same samples.
+        """
+        if fold not in self._fits:
+            return None
+        cached_parameters, cached_train, estimator = self._fits[fold]
+        if not self.compatible(cached_parameters, parameters):
+            return None
+        if not np.array_equal(cached_train, train):
+            return None
+        return estimator
+
+    def put(self, fold, parameters, train, estimator):
+        """Save the estimator fit on the fold with `parameters`"""
+        self._fits[fold] = (dict(parameters or {}), np.asarray(train),
+                            estimator)
+
+    def clear(self):
+        self._fits.clear()
+
+    def compatible(self, old, new):
+        """Can a fit with parameters `old` be warm started to `new`?"""
+        old, new = old or {}, new or {}
+        if set(old) != set(new):
+            return False
+        return all(old[key] == new[key] for key in old
+                   if key not in self.params)
+